@@ -1,14 +1,27 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 from flask_cors import CORS
-import joblib
+import importlib
+import json
 import os
+import re
 import logging
-from scraping.flipkart import scrape_flipkart_reviews
-from scraping.dell import scrape_dell_product
-from scraping.Nykaa import scrape_nykaa_product
-from scraping.nike import scrape_nike_product
-from scraping.Myntra import scrape_myntra_product
-import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from scraping.records import ScrapeResult
+from scraping.sinks import file_stamp, get_csv_sink
+from scraping.urls import canonicalize_url, detect_platform, is_platform_url
+from service.batch import run_batch
+from service import metrics
+from service.jobs import JobManager
+from service.profiling import ProfileStore, RequestProfiler, safe_request_id
+from service.result_cache import ResultCache
+from sentiment.cache import PredictionCache
+from sentiment.engine import SENTIMENT_LABELS, analyze_reviews, predict_probabilities, predict_sentiments
+from sentiment.microbatch import MicroBatcher
+from sentiment.model_store import ModelStore, watch_model_files
+from sentiment.preprocessing import nltk_ready, setup_nltk
+from storage.watermarks import HEAD_SIZE, HeadMatcher, WatermarkStore
 
 app = Flask(__name__)
 # Enable CORS for all routes
@@ -18,29 +31,312 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load the trained model and vectorizer
-model = joblib.load('models/sentiment_model.pkl')
-vectorizer = joblib.load('models/vectorizer.pkl')
+# Load the trained model and vectorizer. Under gunicorn this happens once in
+# the master and the workers share it (see gunicorn.conf.py). It is
+# memory-mapped from the exported artifact when that is up to date
+# (training_scripts/scripts_export_artifact.py), else unpickled; set
+# MODEL_ARTIFACT_DIR= to always load the pickles.
+models = ModelStore(artifact_dir=os.environ.get('MODEL_ARTIFACT_DIR', 'models/artifact') or None)
+
+def warm_up():
+    """Load the model, set up NLTK and classify one review, so the first request doesn't wait for them"""
+    try:
+        models.load()
+        # Fetch NLTK data and build the stopword set once, not on every request
+        setup_nltk()
+        model, vectorizer = models.current()
+        predict_sentiments(['warm up'], model, vectorizer)
+    except Exception as e:
+        logger.error(f"Error warming up the sentiment model: {str(e)}")
+
+# A preloading gunicorn master warms up before forking, so the workers share
+# the loaded model. Otherwise it happens in the background and the app
+# serves requests straight away; requests that need the model before then
+# load it themselves, as they all do with MODEL_WARM_UP=0.
+if os.environ.get('GUNICORN_PRELOAD'):
+    warm_up()
+elif int(os.environ.get('MODEL_WARM_UP', 1)):
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+# Predictions keyed by normalized review text and model version, so repeated
+# reviews and re-scraped products skip the model entirely
+# (versioned by the model that is loaded, not the files on disk)
+prediction_cache = PredictionCache(os.environ.get('PREDICTION_CACHE_PATH', 'cache/predictions.sqlite3'))
+models.add_listener(prediction_cache.set_version)
+
+def predict_texts(texts):
+    """Labels for a list of reviews in one model call, through the prediction cache"""
+    model, vectorizer, version = models.versioned()
+    return predict_sentiments(texts, model, vectorizer, cache=prediction_cache, version=version).tolist()
+
+# With PREDICT_MICROBATCH=1, concurrent /predict requests are scored
+# together: each batch takes up to PREDICT_MICROBATCH_MAX reviews already
+# queued and, only when others were waiting, gives more up to
+# PREDICT_MICROBATCH_WAIT_MS to arrive. Off by default: with the fused
+# kernel a single prediction is cheap enough that batching adds more
+# latency than it saves (see benchmarks/bench_microbatch.py).
+prediction_batcher = MicroBatcher(
+    predict_texts,
+    max_batch=int(os.environ.get('PREDICT_MICROBATCH_MAX', 64)),
+    max_wait=float(os.environ.get('PREDICT_MICROBATCH_WAIT_MS', 0)) / 1000,
+) if int(os.environ.get('PREDICT_MICROBATCH', 0)) else None
+
+# Scrape results keyed by canonical product URL; concurrent requests for the
+# same product share one browser session instead of launching one each
+scrape_results = ResultCache(ttl=int(os.environ.get('SCRAPE_CACHE_TTL', 600)))
+
+# Counts kept by the caches and the micro-batcher, read when /metrics is scraped
+metrics.REGISTRY.add_collector(
+    'sentiment_prediction_cache_lookups_total', 'counter', 'Prediction cache lookups by where they were answered',
+    lambda: [({'result': result}, prediction_cache.stats()[result]) for result in ('memory_hits', 'disk_hits', 'misses')])
+metrics.REGISTRY.add_collector(
+    'sentiment_result_cache_lookups_total', 'counter', 'Scrape result cache lookups by result',
+    lambda: [({'result': result}, scrape_results.stats()[result]) for result in ('hits', 'misses', 'coalesced')])
+if prediction_batcher:
+    metrics.REGISTRY.add_collector(
+        'sentiment_microbatch_batches_total', 'counter', 'Model calls made by the /predict micro-batcher',
+        lambda: [({}, prediction_batcher.stats()['batches'])])
+    metrics.REGISTRY.add_collector(
+        'sentiment_microbatch_items_total', 'counter', 'Reviews scored through the /predict micro-batcher',
+        lambda: [({}, prediction_batcher.stats()['items'])])
+
+def warm_driver_pool():
+    """Optionally start Chrome sessions in the background so the first scrapes don't pay for browser startup"""
+    if int(os.environ.get('DRIVER_POOL_WARM', 0)):
+        from scraping.driver_pool import get_pool
+        threading.Thread(target=get_pool().warm, args=(int(os.environ['DRIVER_POOL_WARM']),), daemon=True).start()
+
+# A preloading gunicorn master never scrapes; each worker warms its own pool after the fork
+if not os.environ.get('GUNICORN_PRELOAD'):
+    warm_driver_pool()
+
+# Every scrape is also appended to the partitioned Parquet review store
+# (needs pyarrow), opened by the first scrape. Writes happen on one
+# background thread; set REVIEW_STORE_PATH to an empty string to turn the
+# store off.
+review_store_path = os.environ.get('REVIEW_STORE_PATH', 'store')
+review_store = None
+store_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='review-store')
+
+# Per-product watermarks, so a re-scrape of a Flipkart product only reads and
+# classifies the reviews added since the last one and updates the stored
+# sentiment counts. Set WATERMARK_DB_PATH to an empty string to always
+# scrape every review.
+watermark_db_path = os.environ.get('WATERMARK_DB_PATH', 'cache/watermarks.sqlite3')
+watermarks = WatermarkStore(watermark_db_path) if watermark_db_path else None
+
+# Background scrape jobs, so long scrapes don't hold a request thread open.
+# Their state is kept in SQLite at JOB_DB_PATH so any gunicorn worker can
+# answer a poll; set it to an empty string to keep jobs in memory only.
+scrape_jobs = JobManager(max_workers=int(os.environ.get('SCRAPE_JOB_WORKERS', 2)),
+                         db_path=os.environ.get('JOB_DB_PATH', 'cache/jobs.sqlite3') or None)
+
+# Most reviews accepted by one POST /predict/batch
+MAX_PREDICT_BATCH = int(os.environ.get('PREDICT_BATCH_MAX', 1000))
+
+# Comment line sent this often to a stream waiting on the same product's scrape
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Limits for POST /scrape/batch
+MAX_BATCH_URLS = int(os.environ.get('BATCH_MAX_URLS', 500))
+BATCH_PER_DOMAIN = int(os.environ.get('BATCH_PER_DOMAIN', 2))
+
+# Opt-in request profiling, off unless REQUEST_PROFILING=1. Then a request
+# sent with an X-Profile: 1 header or ?profile=1 runs under the sampling
+# profiler and its collapsed stacks are saved in PROFILE_DIR under a profile
+# ID made from its X-Request-ID (or a generated ID) and returned as
+# X-Profile-ID; GET /profiles lists them. Requests that don't ask for a profile are not affected.
+request_profiling = int(os.environ.get('REQUEST_PROFILING', 0))
+profile_store = ProfileStore(os.environ.get('PROFILE_DIR', 'profiles'), keep=int(os.environ.get('PROFILE_KEEP', 100)))
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000
+
+def wants_profile():
+    flag = request.headers.get('X-Profile') or request.args.get('profile')
+    return flag is not None and flag.lower() in ('1', 'true', 'yes')
+
+@app.before_request
+def start_profile():
+    if request_profiling and wants_profile():
+        g.profiler = RequestProfiler(safe_request_id(request.headers.get('X-Request-ID')),
+                                     interval=PROFILE_INTERVAL).start()
+
+@app.after_request
+def finish_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    meta = {'method': request.method, 'path': request.path,
+            'query': request.query_string.decode('utf-8', 'replace'), 'status': response.status_code}
+
+    def save():
+        # Runs once the body is sent, so a streamed scrape is profiled until its last event
+        profiler.stop()
+        try:
+            profile_store.save(profiler, **meta)
+        except Exception as e:
+            logger.error(f"Error saving profile {profiler.profile_id}: {str(e)}")
+
+    response.call_on_close(save)
+    response.headers['X-Profile-ID'] = profiler.profile_id
+    return response
+
+@app.route('/profiles', methods=['GET'])
+def list_profiles():
+    """The most recent request profiles, newest first"""
+    if not request_profiling:
+        return jsonify({'error': 'Request profiling is off, set REQUEST_PROFILING=1'}), 404
+    return jsonify({'profiles': profile_store.list(limit=int(request.args.get('limit', 50)))})
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """A saved profile's collapsed stacks, for flamegraph.pl or speedscope"""
+    path = profile_store.path(profile_id) if request_profiling else None
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    with open(path) as f:
+        return Response(f.read(), mimetype='text/plain')
 
 @app.route('/')
 def index():
     return send_from_directory('static', 'index.html')
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness check: 200 once the model is loaded and NLTK set up, 503 until then"""
+    is_ready = models.loaded and nltk_ready()
+    return jsonify({'ready': is_ready, 'nltk': nltk_ready(), 'model': models.stats()}), 200 if is_ready else 503
+
 @app.route('/predict', methods=['POST'])
 def predict():
-    data = request.get_json()
-    review_text = data['review']
-    
-    # Preprocess the review text
-    processed_text = preprocess_text(review_text)
+    data = request.get_json(silent=True)
+    review_text = data.get('review') if isinstance(data, dict) else None
+    if not isinstance(review_text, str):
+        return jsonify({'error': 'Body must be a JSON object with a "review" string'}), 400
     
-    # Vectorize the text
-    text_vector = vectorizer.transform([processed_text])
+    # Preprocess, vectorize and predict, reusing a cached prediction if there is
+    # one, together with whatever other requests arrive at the same time
+    # A profiled request is scored on its own thread, so the model call shows up in its profile
+    if prediction_batcher and 'profiler' not in g:
+        sentiment = prediction_batcher.submit(review_text)
+    else:
+        sentiment = predict_texts([review_text])[0]
     
-    # Predict the sentiment
-    prediction = model.predict(text_vector)
-    
-    return jsonify({'sentiment': prediction[0]})
+    return jsonify({'sentiment': sentiment})
+
+@app.route('/predict/stats', methods=['GET'])
+def predict_stats():
+    """Micro-batching metrics: batch size distribution, queueing and model time"""
+    if prediction_batcher is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **prediction_batcher.stats()})
+
+class BatchInputError(Exception):
+    """A /predict/batch body that can't be scored, carries the HTTP status to respond with"""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def review_from_item(item, index):
+    """A batch item is a review string or a {"review": ...} object like /predict takes"""
+    if isinstance(item, dict):
+        item = item.get('review')
+    if not isinstance(item, str):
+        raise BatchInputError(f'Item {index} must be a string or an object with a "review" string')
+    return item
+
+def read_batch_reviews(ndjson):
+    """Review texts from a JSON array body, or an NDJSON body read line by line as it is uploaded"""
+    if not ndjson:
+        items = request.get_json(silent=True)
+        if isinstance(items, dict):
+            items = items.get('reviews')
+        if not isinstance(items, list):
+            raise BatchInputError('Body must be a JSON array of reviews or {"reviews": [...]}')
+        if len(items) > MAX_PREDICT_BATCH:
+            raise BatchInputError(f'At most {MAX_PREDICT_BATCH} reviews per batch', 413)
+        return [review_from_item(item, i) for i, item in enumerate(items)]
+
+    reviews = []
+    for line in request.stream:
+        line = line.strip()
+        if not line:
+            continue
+        if len(reviews) == MAX_PREDICT_BATCH:
+            raise BatchInputError(f'At most {MAX_PREDICT_BATCH} reviews per batch', 413)
+        try:
+            item = json.loads(line)
+        except ValueError:
+            raise BatchInputError(f'Line {len(reviews) + 1} is not valid JSON')
+        reviews.append(review_from_item(item, len(reviews)))
+    return reviews
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Classify many reviews in one request.
+
+    The body is a JSON array of reviews (strings or {"review": ...} objects),
+    or NDJSON with one review per line (Content-Type application/x-ndjson).
+    All of them go through a single preprocess, transform and predict_proba
+    call. Each result has the label and the probability of every class, in
+    input order, returned as {"results": [...]} or as NDJSON for NDJSON input.
+    """
+    ndjson = request.mimetype in ('application/x-ndjson', 'application/jsonl')
+    try:
+        reviews = read_batch_reviews(ndjson)
+    except BatchInputError as e:
+        return jsonify({'error': str(e)}), e.status
+
+    model, vectorizer = models.current()
+    labels, probabilities, classes = predict_probabilities(reviews, model, vectorizer)
+    classes = classes.tolist()
+    results = [{'sentiment': label, 'probabilities': dict(zip(classes, row))}
+               for label, row in zip(labels.tolist(), probabilities.tolist())]
+
+    if ndjson:
+        return Response(''.join(json.dumps(result) + '\n' for result in results), mimetype='application/x-ndjson')
+    return jsonify({'results': results})
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(prediction_cache.stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics for this process: stage latencies, scrape and classification counters, cache hits"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+class StreamCancelled(Exception):
+    """A streamed scrape stopped because its client disconnected"""
+
+class ScrapeError(Exception):
+    """Raised by the analyze_* functions, carries the HTTP status to respond with"""
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.status = status
+
+def cached_scrape(platform, product_url, analyze, progress=None):
+    """
+    Run analyze(product_url) through the result cache, keyed by platform and URL.
+
+    Requests for the same canonical product URL on the same platform within
+    the TTL reuse the last result, and concurrent requests for it share one
+    in-flight scrape.
+    """
+    key = (platform, canonicalize_url(product_url))
+    return scrape_results.get_or_compute(key, lambda: analyze(product_url, progress))
+
+def run_scrape(platform, product_url, analyze):
+    """Serve a blocking scrape request from the result cache"""
+    name = PLATFORMS[platform][0]
+    try:
+        return jsonify(cached_scrape(platform, product_url, analyze))
+    except ScrapeError as e:
+        logger.error(f"Error scraping {name} product: {str(e)}")
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        logger.error(f"Error scraping {name} product: {str(e)}")
+        return jsonify({'error': f'Error scraping product: {str(e)}'}), 500
 
 @app.route('/scrape', methods=['GET'])
 def scrape():
@@ -48,29 +344,42 @@ def scrape():
     if not product_url:
         logger.error("URL parameter is required")
         return jsonify({'error': 'URL parameter is required'}), 400
+
+    if not is_platform_url(product_url, 'flipkart'):
+        logger.error("Invalid Flipkart URL")
+        return jsonify({'error': 'Invalid Flipkart URL. Must be a Flipkart product URL'}), 400
     
     logger.info(f"Scraping reviews from URL: {product_url}")
+    return run_scrape('flipkart', product_url, analyze_flipkart)
+
+def analyze_flipkart(product_url, progress=None):
+    # Resume from the last scrape of this product if its counts came from the current model;
+    # the same model classifies the new reviews, whatever is swapped in meanwhile
+    state = models.versioned()
+    product_key = canonicalize_url(product_url)
+    watermark = watermarks.get('flipkart', product_key, state[2]) if watermarks else None
+
+    # Scrape the Flipkart product reviews, newest first, stopping at ones already seen
+    from scraping.flipkart import scrape_flipkart_reviews
+    result = scrape_flipkart_reviews(product_url, progress=progress,
+                                     known_head=watermark.head if watermark else None)
     
-    # Scrape the Flipkart product reviews
-    filename = scrape_flipkart_reviews(product_url)
+    if result is None:
+        raise ScrapeError('Failed to scrape product data')
+    store_result(result)
     
-    # Preprocess and predict sentiments for each review
-    reviews = get_reviews_from_csv(filename)
-    sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
+    # Preprocess and predict sentiments for all new reviews in one batch
+    sentiment_counts, total_reviews = classify_reviews(result.texts, result.platform, state)
+    if watermarks:
+        # Add them to the stored counts, or replace those after a full scrape
+        sentiment_counts, total_reviews = watermarks.update(
+            'flipkart', product_key, result.reviews, sentiment_counts, total_reviews,
+            previous=watermark if result.incremental else None, model_version=state[2])
+        logger.info(f"{len(result.reviews)} new reviews, {total_reviews} in total")
     
-    for review in reviews:
-        processed_text = preprocess_text(review)
-        text_vector = vectorizer.transform([processed_text])
-        prediction = model.predict(text_vector)[0]
-        
-        if prediction == 'positive':
-            sentiment_counts['positive'] += 1
-        elif prediction == 'neutral':
-            sentiment_counts['neutral'] += 1
-        elif prediction == 'negative':
-            sentiment_counts['negative'] += 1
+    if not total_reviews:
+        raise ScrapeError('No reviews found for this product', 404)
     
-    total_reviews = len(reviews)
     sentiment_percentages = {
         'positive': (sentiment_counts['positive'] / total_reviews) * 100,
         'neutral': (sentiment_counts['neutral'] / total_reviews) * 100,
@@ -79,7 +388,7 @@ def scrape():
     
     logger.info(f"Sentiment percentages: {sentiment_percentages}")
     
-    return jsonify(sentiment_percentages)
+    return sentiment_percentages
 
 @app.route('/scrape/dell', methods=['GET'])
 def scrape_dell():
@@ -93,42 +402,28 @@ def scrape_dell():
         return jsonify({'error': 'Invalid Dell URL. Must be a Dell product URL'}), 400
     
     logger.info(f"Scraping Dell product from URL: {product_url}")
+    return run_scrape('dell', product_url, analyze_dell)
+
+def analyze_dell(product_url, progress=None):
+    # Scrape the Dell product details and reviews
+    from scraping.dell import scrape_dell_product
+    result = scrape_dell_product(product_url, progress)
     
-    try:
-        # Scrape the Dell product details and reviews
-        filename = scrape_dell_product(product_url)
-        
-        if not filename:
-            return jsonify({'error': 'Failed to scrape product data'}), 500
-        
-        # Read the CSV file and process the data
-        df = pd.read_csv(filename)
-        
-        # Process reviews if they exist
-        reviews = df['review_text'].tolist()
-        sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
-        
-        for review in reviews:
-            if review != 'No Reviews':
-                processed_text = preprocess_text(review)
-                text_vector = vectorizer.transform([processed_text])
-                prediction = model.predict(text_vector)[0]
-                sentiment_counts[prediction] += 1
-        
-        response_data = {
-            'product_title': df['product_title'].iloc[0],
-            'product_images': df['product_images'].iloc[0].split(', '),
-            'specifications': df['specifications'].iloc[0].split(', '),
-            'sentiment_analysis': sentiment_counts,
-            'total_reviews': len(reviews) if reviews[0] != 'No Reviews' else 0,
-            'csv_file': filename
-        }
-        
-        return jsonify(response_data)
-        
-    except Exception as e:
-        logger.error(f"Error scraping Dell product: {str(e)}")
-        return jsonify({'error': f'Error scraping product: {str(e)}'}), 500
+    if result is None:
+        raise ScrapeError('Failed to scrape product data')
+    store_result(result)
+    
+    # Classify the scraped reviews straight from memory
+    sentiment_counts, total_analyzed = classify_reviews(result.texts, result.platform)
+    
+    return {
+        'product_title': result.product['product_title'],
+        'product_images': result.product['product_images'],
+        'specifications': result.product['specifications'],
+        'sentiment_analysis': sentiment_counts,
+        'total_reviews': total_analyzed,
+        'csv_file': result.csv_file
+    }
 
 @app.route('/scrape/nykaa', methods=['GET'])
 def scrape_nykaa():
@@ -142,49 +437,30 @@ def scrape_nykaa():
         return jsonify({'error': 'Invalid Nykaa URL. Must be a Nykaa product URL'}), 400
     
     logger.info(f"Scraping Nykaa product from URL: {product_url}")
+    return run_scrape('nykaa', product_url, analyze_nykaa)
+
+def analyze_nykaa(product_url, progress=None):
+    # Scrape the Nykaa product details and reviews
+    from scraping.Nykaa import scrape_nykaa_product
+    result = scrape_nykaa_product(product_url, progress)
     
-    try:
-        # Scrape the Nykaa product details and reviews
-        filename = scrape_nykaa_product(product_url)
-        
-        if not filename:
-            return jsonify({'error': 'Failed to scrape product data'}), 500
-        
-        # Read the CSV file and process the data
-        df = pd.read_csv(filename)
-        
-        # Process reviews if they exist
-        reviews = df['review_text'].tolist()
-        sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
-        
-        for review in reviews:
-            if review != 'No Reviews':
-                processed_text = preprocess_text(review)
-                text_vector = vectorizer.transform([processed_text])
-                prediction = model.predict(text_vector)[0]
-                sentiment_counts[prediction] += 1
-        
-        # Convert numpy.int64 to regular Python int
-        response_data = {
-            'product_title': df['product_title'].iloc[0],
-            'image_url': df['image_url'].iloc[0],
-            'description': df['description'].iloc[0],
-            'total_ratings': int(df['total_ratings'].iloc[0]),  # Convert to Python int
-            'total_reviews': int(df['total_reviews'].iloc[0]),  # Convert to Python int
-            'sentiment_analysis': {
-                'positive': int(sentiment_counts['positive']),
-                'neutral': int(sentiment_counts['neutral']),
-                'negative': int(sentiment_counts['negative'])
-            },
-            'total_reviews_analyzed': int(len(reviews)) if reviews[0] != 'No Reviews' else 0,
-            'csv_file': filename
-        }
-        
-        return jsonify(response_data)
-        
-    except Exception as e:
-        logger.error(f"Error scraping Nykaa product: {str(e)}")
-        return jsonify({'error': f'Error scraping product: {str(e)}'}), 500
+    if result is None:
+        raise ScrapeError('Failed to scrape product data')
+    store_result(result)
+    
+    # Classify the scraped reviews straight from memory
+    sentiment_counts, total_analyzed = classify_reviews(result.texts, result.platform)
+    
+    return {
+        'product_title': result.product['product_title'],
+        'image_url': result.product['image_url'],
+        'description': result.product['description'],
+        'total_ratings': parse_count(result.product['total_ratings']),
+        'total_reviews': parse_count(result.product['total_reviews']),
+        'sentiment_analysis': sentiment_counts,
+        'total_reviews_analyzed': total_analyzed,
+        'csv_file': result.csv_file
+    }
 
 @app.route('/scrape/nike', methods=['GET'])
 def scrape_nike():
@@ -196,46 +472,24 @@ def scrape_nike():
         logger.error("Invalid Nike URL")
         return jsonify({'error': 'Invalid Nike URL. Must be a Nike product URL'}), 400
     logger.info(f"Scraping Nike product from URL: {product_url}")
-    try:
-        filename = scrape_nike_product(product_url)
-        if not filename:
-            return jsonify({'error': 'Failed to scrape product data'}), 500
-        df = pd.read_csv(filename)
-        reviews = df['review_text'].tolist()
-        sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
-        for review in reviews:
-            if review != 'No Reviews':
-                processed_text = preprocess_text(review)
-                text_vector = vectorizer.transform([processed_text])
-                prediction = model.predict(text_vector)[0]
-                sentiment_counts[prediction] += 1
-        # Try to get product details from the product details CSV if available
-        product_details_file = filename.replace('reviews', 'details')
-        if os.path.exists(product_details_file):
-            df_product = pd.read_csv(product_details_file)
-            product_title = df_product['product_title'].iloc[0] if 'product_title' in df_product.columns else ''
-            image_url = df_product['image_url'].iloc[0] if 'image_url' in df_product.columns else ''
-            price = df_product['price'].iloc[0] if 'price' in df_product.columns else ''
-            description = df_product['description'].iloc[0] if 'description' in df_product.columns else ''
-        else:
-            product_title = image_url = price = description = ''
-        response_data = {
-            'product_title': product_title,
-            'image_url': image_url,
-            'price': price,
-            'description': description,
-            'sentiment_analysis': {
-                'positive': int(sentiment_counts['positive']),
-                'neutral': int(sentiment_counts['neutral']),
-                'negative': int(sentiment_counts['negative'])
-            },
-            'total_reviews_analyzed': int(len(reviews)) if reviews and reviews[0] != 'No Reviews' else 0,
-            'csv_file': filename
-        }
-        return jsonify(response_data)
-    except Exception as e:
-        logger.error(f"Error scraping Nike product: {str(e)}")
-        return jsonify({'error': f'Error scraping product: {str(e)}'}), 500
+    return run_scrape('nike', product_url, analyze_nike)
+
+def analyze_nike(product_url, progress=None):
+    from scraping.nike import scrape_nike_product
+    result = scrape_nike_product(product_url, progress)
+    if result is None:
+        raise ScrapeError('Failed to scrape product data')
+    store_result(result)
+    sentiment_counts, total_analyzed = classify_reviews(result.texts, result.platform)
+    return {
+        'product_title': result.product.get('product_title', ''),
+        'image_url': result.product.get('image_url', ''),
+        'price': result.product.get('price', ''),
+        'description': result.product.get('description', ''),
+        'sentiment_analysis': sentiment_counts,
+        'total_reviews_analyzed': total_analyzed,
+        'csv_file': result.csv_file
+    }
 
 @app.route('/scrape/myntra', methods=['GET'])
 def scrape_myntra():
@@ -247,67 +501,360 @@ def scrape_myntra():
         logger.error("Invalid Myntra URL")
         return jsonify({'error': 'Invalid Myntra URL. Must be a Myntra product URL'}), 400
     logger.info(f"Scraping Myntra product from URL: {product_url}")
+    return run_scrape('myntra', product_url, analyze_myntra)
+
+def analyze_myntra(product_url, progress=None):
+    from scraping.Myntra import scrape_myntra_product
+    result = scrape_myntra_product(product_url, progress)
+    if result is None:
+        raise ScrapeError('Failed to scrape product data')
+    store_result(result)
+    sentiment_counts, total_analyzed = classify_reviews(result.texts, result.platform)
+    return {
+        'product_title': result.product.get('product_title', ''),
+        'image_urls': result.product.get('image_urls', ''),
+        'product_details': result.product.get('product_details', ''),
+        'sentiment_analysis': sentiment_counts,
+        'total_reviews_analyzed': total_analyzed,
+        'csv_file': result.csv_file
+    }
+
+@app.route('/scrape/stats', methods=['GET'])
+def scrape_stats():
+    from scraping.driver_pool import get_pool
+    from scraping.fetcher import get_fetcher
+    return jsonify({'results': scrape_results.stats(), 'drivers': get_pool().stats(),
+                    'jobs': scrape_jobs.stats(), 'csv_sink': get_csv_sink().stats(),
+                    'fetcher': get_fetcher().stats(),
+                    'watermarks': watermarks.stats() if watermarks else None})
+
+# Platform name, required URL prefix (None: any URL on the platform's domain),
+# analyze function and scraper module for each platform. Scraper modules (and Selenium with them) are imported by the
+# first request that scrapes, so the app starts without them.
+PLATFORMS = {
+    'flipkart': ('Flipkart', None, analyze_flipkart, 'scraping.flipkart'),
+    'dell': ('Dell', 'https://www.dell.com', analyze_dell, 'scraping.dell'),
+    'nykaa': ('Nykaa', 'https://www.nykaa.com', analyze_nykaa, 'scraping.Nykaa'),
+    'nike': ('Nike', 'https://www.nike.com', analyze_nike, 'scraping.nike'),
+    'myntra': ('Myntra', 'https://www.myntra.com', analyze_myntra, 'scraping.Myntra'),
+}
+
+def stream_scraper(platform):
+    """The platform scraper's stream_product, importing its module on first use"""
+    return importlib.import_module(PLATFORMS[platform][3]).stream_product
+
+def validate_product_url(platform, product_url):
+    """Returns an error message if product_url can't be scraped as platform, otherwise None"""
+    if not product_url:
+        return 'URL parameter is required'
+    if platform not in PLATFORMS:
+        return f'Unknown platform: {platform}'
+    name, prefix = PLATFORMS[platform][:2]
+    if not (product_url.startswith(prefix) if prefix else is_platform_url(product_url, platform)):
+        return f'Invalid {name} URL. Must be a {name} product URL'
+    return None
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Start a scrape in the background and return its job id straight away.
+
+    Body: {"url": "<product url>", "platform": "flipkart|dell|nykaa|nike|myntra"}.
+    platform is optional and detected from the URL when omitted. Poll
+    GET /jobs/<job_id> for progress and the result.
+    """
+    data = request.get_json(silent=True) or {}
+    product_url = data.get('url')
+    platform = data.get('platform') or detect_platform(product_url or '')
+    error = validate_product_url(platform, product_url)
+    if error:
+        logger.error(error)
+        return jsonify({'error': error}), 400
+
+    name, _, analyze, _ = PLATFORMS[platform]
+    logger.info(f"Queueing {name} scrape job for URL: {product_url}")
+    job = scrape_jobs.submit(platform, product_url,
+                             lambda job: cached_scrape(platform, product_url, analyze, job.report_progress))
+    response = jsonify(job.to_dict())
+    response.headers['Location'] = f'/jobs/{job.id}'
+    return response, 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+def batch_analyzers():
+    """platform -> analyze(url) for run_batch, going through the result cache like single scrapes"""
+    return {platform: (lambda url, platform=platform, analyze=analyze: cached_scrape(platform, url, analyze))
+            for platform, (_, _, analyze, _) in PLATFORMS.items()}
+
+@app.route('/scrape/batch', methods=['POST'])
+def scrape_batch():
+    """
+    Scrape many products across platforms in one background job.
+
+    Body: {"urls": [...], "per_domain": 2}. Each URL is dispatched by its
+    domain, with at most per_domain concurrent scrapes per platform. Returns
+    202 with a job id; GET /jobs/<job_id> reports products done and, when
+    finished, the per-product results and a products/minute summary.
+    """
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls')
+    if not isinstance(urls, list) or not urls or not all(isinstance(url, str) for url in urls):
+        return jsonify({'error': 'urls must be a non-empty list of product URLs'}), 400
+    if len(urls) > MAX_BATCH_URLS:
+        return jsonify({'error': f'At most {MAX_BATCH_URLS} URLs per batch'}), 400
     try:
-        filename = scrape_myntra_product(product_url)
-        if not filename:
-            return jsonify({'error': 'Failed to scrape product data'}), 500
-        df = pd.read_csv(filename)
-        reviews = df['review_text'].tolist()
-        sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
-        for review in reviews:
-            if review != 'No Reviews':
-                processed_text = preprocess_text(review)
-                text_vector = vectorizer.transform([processed_text])
-                prediction = model.predict(text_vector)[0]
-                sentiment_counts[prediction] += 1
-        # Try to get product details from the product details CSV if available
-        product_details_file = filename.replace('reviews', 'data')
-        if os.path.exists(product_details_file):
-            # Read as key-value pairs
-            df_product = pd.read_csv(product_details_file)
-            product_title = df_product[df_product['Field'] == 'product_title']['Value'].values[0] if 'product_title' in df_product['Field'].values else ''
-            image_urls = df_product[df_product['Field'] == 'image_urls']['Value'].values[0] if 'image_urls' in df_product['Field'].values else ''
-            product_details = df_product[df_product['Field'] == 'product_details']['Value'].values[0] if 'product_details' in df_product['Field'].values else ''
-        else:
-            product_title = image_urls = product_details = ''
-        response_data = {
-            'product_title': product_title,
-            'image_urls': image_urls,
-            'product_details': product_details,
-            'sentiment_analysis': {
-                'positive': int(sentiment_counts['positive']),
-                'neutral': int(sentiment_counts['neutral']),
-                'negative': int(sentiment_counts['negative'])
-            },
-            'total_reviews_analyzed': int(len(reviews)) if reviews and reviews[0] != 'No Reviews' else 0,
-            'csv_file': filename
-        }
-        return jsonify(response_data)
-    except Exception as e:
-        logger.error(f"Error scraping Myntra product: {str(e)}")
-        return jsonify({'error': f'Error scraping product: {str(e)}'}), 500
+        per_domain = max(1, int(data.get('per_domain', BATCH_PER_DOMAIN)))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'per_domain must be an integer'}), 400
 
-def get_reviews_from_csv(file_path):
-    # Load the CSV file
-    df = pd.read_csv(file_path)
-    
-    # Extract the 'Review' column and convert it to a list
-    reviews = df['Review'].tolist()
-    
-    return reviews
+    logger.info(f"Queueing batch scrape of {len(urls)} URLs, {per_domain} per platform")
+    from scraping.driver_pool import get_pool
+    job = scrape_jobs.submit('batch', None, lambda job: run_batch(
+        urls, batch_analyzers(), per_domain, get_pool().max_size, validate_product_url, job.report_batch_progress))
+    response = jsonify(job.to_dict())
+    response.headers['Location'] = f'/jobs/{job.id}'
+    return response, 202
 
-def preprocess_text(text):
-    import nltk
-    nltk.download('punkt')
-    nltk.download('stopwords')
-    
-    # Tokenize text
-    tokens = nltk.word_tokenize(text)
-    # Remove stopwords
-    stopwords = nltk.corpus.stopwords.words('english')
-    tokens = [word for word in tokens if word.lower() not in stopwords]
-    # Join tokens back into a single string
-    return ' '.join(tokens)
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/scrape/<platform>/stream', methods=['GET'])
+def scrape_stream(platform):
+    """
+    Stream a scrape as Server-Sent Events while it runs.
+
+    Emits 'product' with the product details (not for Flipkart), then 'page'
+    after each page of reviews is classified with the running sentiment
+    counts, and finally 'done' or 'scrape_error'. Each page is classified as
+    one batch and saved as it arrives (see StreamedScrape), so the reviews
+    are never all held in memory. A Flipkart product with a watermark is
+    re-scraped incrementally like analyze_flipkart does: the pages carry the
+    counts of the new reviews, and 'done' the product's combined counts.
+
+    Finished streams go through the result cache: within the TTL a product
+    is answered with its cached 'product' and 'done' events straight away,
+    and a client asking for a product that is already streaming waits for
+    that scrape's result instead of starting another.
+
+    If the client disconnects, the scraper stops and its browser goes back
+    to the pool; the pages read so far stay saved, but a Flipkart product's
+    watermark is only updated by a scrape that finishes.
+    """
+    product_url = request.args.get('url')
+    error = validate_product_url(platform, product_url)
+    if error:
+        logger.error(error)
+        return jsonify({'error': error}), 400
+
+    name = PLATFORMS[platform][0]
+    stream = stream_scraper(platform)
+    # Apart from cached_scrape's keys, its results are events rather than analyze_* responses
+    key = ('stream', platform, canonicalize_url(product_url))
+
+    def events():
+        while True:
+            status, value = scrape_results.claim(key)
+            if status == 'hit':
+                yield from replay_stream(value)
+                return
+            if status == 'leader':
+                break
+            logger.info(f"Waiting for the {name} scrape already streaming for URL: {product_url}")
+            while not value.done.wait(STREAM_KEEPALIVE_SECONDS):
+                yield ': waiting for the same scrape\n\n'
+            if isinstance(value.error, StreamCancelled):
+                # Its client went away before it finished; scrape it here
+                continue
+            if value.error is not None:
+                yield sse_event('scrape_error', {'error': f'Error scraping product: {str(value.error)}'})
+            else:
+                yield from replay_stream(value.result)
+            return
+
+        flight = value
+        logger.info(f"Streaming {name} scrape for URL: {product_url}")
+        try:
+            product, done = yield from stream_scrape(platform, product_url, stream)
+        except Exception as e:
+            scrape_results.finish(key, flight, error=e)
+            logger.error(f"Error streaming {name} product: {str(e)}")
+            yield sse_event('scrape_error', {'error': f'Error scraping product: {str(e)}'})
+            return
+        except BaseException:
+            # GeneratorExit: the client disconnected
+            scrape_results.finish(key, flight, error=StreamCancelled())
+            raise
+        scrape_results.finish(key, flight, {'product': product, 'done': done})
+        yield sse_event('done', done)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def replay_stream(cached):
+    """A finished stream's events for a client that gets its result from the cache"""
+    if cached['product']:
+        yield sse_event('product', cached['product'])
+    yield sse_event('done', {**cached['done'], 'cached': True})
+
+def stream_scrape(platform, product_url, stream):
+    """
+    Yield the 'product' and 'page' events of one streamed scrape, returns (product, done payload).
+
+    Raises whatever the scraper raises; the caller reports it.
+    """
+    progress = {
+        'pages_done': 0,
+        'reviews_so_far': 0,
+        'sentiment_analysis': dict.fromkeys(SENTIMENT_LABELS, 0),
+    }
+    scrape = StreamedScrape(platform, product_url)
+    # One model for every page, so the counts saved with the watermark come from one version
+    state = models.versioned()
+    product_key = canonicalize_url(product_url)
+    watermark = watermarks.get('flipkart', product_key, state[2]) if platform == 'flipkart' and watermarks else None
+    # Stop at the reviews the last scrape saw first, as analyze_flipkart does
+    options = {'matcher': HeadMatcher(watermark.head)} if watermark else {}
+    try:
+        # Werkzeug runs the whole generator on one thread, so the scope's platform holds across yields
+        with metrics.scrape_scope(platform):
+            for kind, data in stream(product_url, **options):
+                if kind == 'product':
+                    scrape.product = data
+                    yield sse_event('product', data)
+                    continue
+                metrics.PAGES_SCRAPED.inc(platform=platform)
+                scrape.add_page(data)
+                page_counts, page_total = classify_reviews([review.text for review in data], platform, state)
+                for label, count in page_counts.items():
+                    progress['sentiment_analysis'][label] = progress['sentiment_analysis'].get(label, 0) + count
+                progress['pages_done'] += 1
+                progress['reviews_so_far'] += page_total
+                yield sse_event('page', progress)
+        scrape.finish()
+        if platform == 'flipkart' and watermarks:
+            # Add the new reviews to the stored counts, or replace those after a full scrape
+            incremental = bool(options and options['matcher'].reached)
+            counts, total = watermarks.update(
+                'flipkart', product_key, scrape.head, progress['sentiment_analysis'], progress['reviews_so_far'],
+                previous=watermark if incremental else None, model_version=state[2])
+            progress = {**progress, 'sentiment_analysis': counts, 'total_reviews': total,
+                        'incremental': incremental}
+        return scrape.product, progress
+    finally:
+        # Also after a disconnect or an error, so the pages already saved have their product
+        scrape.finish()
+
+class StreamedScrape:
+    """
+    Saves a streamed scrape page by page, the way the analyze_* functions save a whole one.
+
+    add_page() appends a page to the scraper's review CSV and queues it for
+    the review store, keeping only the first HEAD_SIZE reviews (the head of
+    a Flipkart watermark). finish() writes the product: the scraper's
+    product CSV, if it has one, and its row in the review store.
+    """
+
+    def __init__(self, platform, url):
+        self.platform = platform
+        self.url = url
+        self.product = {}
+        self.pages = 0
+        self.review_count = 0
+        self.head = []
+        self.finished = False
+        self.stamp = file_stamp()
+        self.scraped_at = datetime.now()
+        self.scraper = importlib.import_module(PLATFORMS[platform][3])
+
+    def add_page(self, reviews):
+        self.pages += 1
+        if not reviews:
+            return
+        page = ScrapeResult(self.platform, self.url, self.product, reviews)
+        try:
+            self.scraper.save_reviews(page, self.stamp, append=True)
+        except Exception as e:
+            logger.error(f"Error saving {self.platform} CSV: {str(e)}")
+        store_reviews(self.platform, self.url, reviews, self.scraped_at)
+        self.head.extend(reviews[:HEAD_SIZE - len(self.head)])
+        self.review_count += len(reviews)
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        result = ScrapeResult(self.platform, self.url, self.product, pages=self.pages,
+                              review_count=self.review_count)
+        try:
+            if not self.review_count:
+                # No review CSV was started; write the one a scrape without reviews gets
+                self.scraper.save_reviews(result, self.stamp)
+            if hasattr(self.scraper, 'save_product'):
+                self.scraper.save_product(result, self.stamp)
+        except Exception as e:
+            logger.error(f"Error saving {self.platform} CSV: {str(e)}")
+        store_result(result, self.scraped_at)
+
+def classify_reviews(reviews, platform=metrics.NO_PLATFORM, state=None):
+    """
+    Classify a list of reviews in one vectorized batch, returns (counts, total).
+
+    state is a (model, vectorizer, version) from models.versioned(), the current one if not given.
+    """
+    model, vectorizer, version = state or models.versioned()
+    with metrics.platform_scope(platform):
+        return analyze_reviews(reviews, model, vectorizer, cache=prediction_cache, version=version)
+
+def open_review_store():
+    """The review store, opened on first use; None if it is turned off or pyarrow is missing"""
+    global review_store, review_store_path
+    if review_store is None and review_store_path:
+        try:
+            from storage.review_store import ReviewStore
+        except ImportError:
+            logger.warning("pyarrow is not installed, scrape results won't be added to the review store")
+            review_store_path = None
+            return None
+        review_store = ReviewStore(review_store_path)
+    return review_store
+
+def store_write(platform, write):
+    """Queue write(store) for the review store without blocking the request"""
+    if not review_store_path:
+        return
+    def append():
+        # Runs on the single store_writer thread, so the store is only opened once
+        try:
+            store = open_review_store()
+            if store is not None:
+                write(store)
+        except Exception as e:
+            logger.error(f"Error storing {platform} reviews: {str(e)}")
+    store_writer.submit(append)
+
+def store_result(result, scraped_at=None):
+    """Queue a ScrapeResult for the review store without blocking the request"""
+    store_write(result.platform, lambda store: store.append_result(result, scraped_at))
+
+def store_reviews(platform, product_url, reviews, scraped_at):
+    """Queue one page of a streamed scrape's reviews for the review store"""
+    def append(store):
+        from storage.review_store import product_id_for
+        store.append_reviews(platform, product_id_for(platform, canonicalize_url(product_url)), reviews, scraped_at)
+    store_write(platform, append)
+
+def parse_count(value):
+    """Turn a scraped count such as '1,234' into an int (0 if there are no digits)"""
+    digits = re.sub(r'\D', '', str(value))
+    return int(digits) if digits else 0
 
 if __name__ == '__main__':
+    # Development server; pick up retrained models in place. In production
+    # run gunicorn -c gunicorn.conf.py, which reloads them with SIGHUP.
+    watch_model_files(models.reload_if_changed, patterns=models.paths)
     app.run(host='0.0.0.0', port=5050, debug=True)
@@ -0,0 +1,134 @@
+"""
+Memory per worker and cold-start time: pickled model vs memory-mapped artifact.
+
+Starts --workers fresh Python processes at once for each format. Each one
+loads the model, classifies one review and reports how long that took from
+interpreter start, and its RSS and PSS from /proc/self/smaps_rollup
+(PSS splits shared pages between the processes mapping them, so the sum of
+PSS over the workers is what they cost together). Linux only.
+
+The shipped model has a small vocabulary; --vocab-size trains a throwaway
+model on synthetic text with that many terms to show how both formats scale.
+
+Run from the repository root, after training_scripts.scripts_export_artifact:
+    python -m benchmarks.bench_artifact --workers 4
+    python -m benchmarks.bench_artifact --workers 4 --vocab-size 500000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+FORMATS = ('pickle', 'artifact')
+
+
+def memory_kb():
+    """Rss, Pss and private/shared page totals of this process in kB"""
+    totals = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                totals[parts[0].rstrip(':')] = int(parts[1])
+    return {'rss': totals['Rss'], 'pss': totals['Pss'],
+            'private': totals['Private_Clean'] + totals['Private_Dirty'],
+            'shared': totals['Shared_Clean'] + totals['Shared_Dirty']}
+
+
+def child(kind, model_path, vectorizer_path, artifact_dir, started_at):
+    """Runs in each worker: load, classify once, report, then wait for the parent"""
+    if kind == 'pickle':
+        import joblib
+        model, vectorizer = joblib.load(model_path), joblib.load(vectorizer_path)
+    else:
+        from sentiment.artifact import load_artifact
+        model, vectorizer = load_artifact(artifact_dir)
+    model.predict(vectorizer.transform(['good product, value for money']))
+    ready_ms = (time.time() - started_at) * 1000
+    print(json.dumps({'ready_ms': ready_ms, **memory_kb()}), flush=True)
+    sys.stdin.read()
+
+
+def run_workers(kind, workers, model_path, vectorizer_path, artifact_dir):
+    """Start the workers together; returns each one's report once all are loaded"""
+    procs = [subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_artifact', '--child', kind,
+                               '--model', model_path, '--vectorizer', vectorizer_path,
+                               '--artifact', artifact_dir, '--started-at', repr(time.time())],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+             for _ in range(workers)]
+    try:
+        # Every worker stays alive until all have reported, so their shared pages overlap
+        return [json.loads(proc.stdout.readline()) for proc in procs]
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+
+
+def synthetic_model(vocab_size, out_dir):
+    """Train and export a model with vocab_size terms, returns its (model, vectorizer, artifact) paths"""
+    import joblib
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+
+    from sentiment.artifact import export_artifact
+    from sentiment.cache import file_fingerprint
+
+    rng = np.random.default_rng(42)
+    terms = np.array([f"term{i}" for i in range(vocab_size)])
+    docs = [' '.join(chunk) for chunk in np.array_split(rng.permutation(terms), max(vocab_size // 20, 1))]
+    vectorizer = CountVectorizer()
+    X = vectorizer.fit_transform(docs)
+    model = MultinomialNB().fit(X, rng.choice(['negative', 'neutral', 'positive'], size=len(docs)))
+
+    paths = (os.path.join(out_dir, 'sentiment_model.pkl'), os.path.join(out_dir, 'vectorizer.pkl'))
+    joblib.dump(model, paths[0])
+    joblib.dump(vectorizer, paths[1])
+    artifact_dir = os.path.join(out_dir, 'artifact')
+    export_artifact(model, vectorizer, artifact_dir, source_fingerprint=file_fingerprint(paths))
+    return paths[0], paths[1], artifact_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RSS and cold start: pickled model vs artifact')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--vocab-size', type=int, help='Benchmark a synthetic model with this many terms')
+    parser.add_argument('--model', default='models/sentiment_model.pkl')
+    parser.add_argument('--vectorizer', default='models/vectorizer.pkl')
+    parser.add_argument('--artifact', default='models/artifact')
+    parser.add_argument('--child', choices=FORMATS, help=argparse.SUPPRESS)
+    parser.add_argument('--started-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.model, args.vectorizer, args.artifact, args.started_at)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = (args.model, args.vectorizer, args.artifact)
+        if args.vocab_size:
+            paths = synthetic_model(args.vocab_size, tmp)
+            print(f"Synthetic model with {args.vocab_size} terms")
+        for path in paths:
+            size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) \
+                if os.path.isdir(path) else os.path.getsize(path)
+            print(f"  {path}: {size / 1024:.0f} kB")
+
+        print(f"{args.workers} workers started together")
+        print(f"{'format':>10}   ready ms (mean/max)   RSS MB/worker   PSS MB/worker   PSS MB total")
+        for kind in FORMATS:
+            reports = run_workers(kind, args.workers, *paths)
+            ready = [r['ready_ms'] for r in reports]
+            rss = np.mean([r['rss'] for r in reports]) / 1024
+            pss = [r['pss'] / 1024 for r in reports]
+            print(f"{kind:>10} {np.mean(ready):>12.0f} / {max(ready):<8.0f} {rss:>13.1f} "
+                  f"{np.mean(pss):>15.1f} {sum(pss):>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
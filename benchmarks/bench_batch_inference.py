@@ -0,0 +1,85 @@
+"""
+Per-review latency of the old per-review loop vs the batch engine.
+
+The batching gain (one vectorize and predict call, no per-review overhead)
+is measured on distinct review texts. preprocess_texts also processes each
+distinct text only once, which only pays off on repeated texts; the dedup
+column reports that gain on its own. Sizes beyond the number of distinct
+reviews in data/ are drawn with replacement, so only there does dedup help.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_inference
+"""
+import glob
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from sentiment.engine import analyze_reviews, clean_reviews
+from sentiment.preprocessing import preprocess_text, setup_nltk
+
+SIZES = [10, 100, 1000, 10000]
+
+
+def preprocess_each(texts):
+    """preprocess_texts without its dedup, to time batching on its own"""
+    return [preprocess_text(text) for text in texts]
+
+
+def load_corpus():
+    """Collect every scraped review text under data/"""
+    reviews = []
+    for path in sorted(glob.glob('data/*.csv')):
+        df = pd.read_csv(path)
+        for column in ('Review', 'review_text'):
+            if column in df.columns:
+                reviews.extend(df[column].tolist())
+    return clean_reviews(reviews)
+
+
+def classify_loop(reviews, model, vectorizer):
+    """The loop the scrape routes used before the batch engine"""
+    sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
+    for review in reviews:
+        processed_text = preprocess_text(review)
+        text_vector = vectorizer.transform([processed_text])
+        prediction = model.predict(text_vector)[0]
+        sentiment_counts[prediction] += 1
+    return sentiment_counts
+
+
+def time_call(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    setup_nltk()
+    model = joblib.load('models/sentiment_model.pkl')
+    vectorizer = joblib.load('models/vectorizer.pkl')
+    corpus = list(dict.fromkeys(load_corpus()))
+    print(f"Loaded {len(corpus)} distinct reviews from data/")
+
+    rng = np.random.default_rng(42)
+    print(f"{'reviews':>8} {'sample':>9} {'loop ms/review':>15} {'batch ms/review':>16} {'+dedup ms/review':>17} "
+          f"{'batching':>9} {'dedup':>6}")
+    # Plus every distinct review once, the largest sample without repeats
+    for size in sorted(set(SIZES) | {len(corpus)}):
+        repeats = size > len(corpus)
+        reviews = rng.choice(corpus, size=size, replace=repeats).tolist()
+
+        loop_counts, loop_time = time_call(classify_loop, reviews, model, vectorizer)
+        (batch_counts, _), batch_time = time_call(analyze_reviews, reviews, model, vectorizer, preprocess_each)
+        (dedup_counts, _), dedup_time = time_call(analyze_reviews, reviews, model, vectorizer)
+        assert loop_counts == batch_counts == dedup_counts, (loop_counts, batch_counts, dedup_counts)
+
+        print(f"{size:>8} {'repeats' if repeats else 'distinct':>9} {loop_time / size * 1000:>15.3f} "
+              f"{batch_time / size * 1000:>16.3f} {dedup_time / size * 1000:>17.3f} "
+              f"{loop_time / batch_time:>8.1f}x {batch_time / dedup_time:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
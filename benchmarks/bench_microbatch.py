@@ -0,0 +1,87 @@
+"""
+Throughput of concurrent single-review predictions, direct vs micro-batched.
+
+Several threads each classify reviews one at a time, the way concurrent
+/predict requests do: first each call runs the model on its own, then every
+call goes through a MicroBatcher. The prediction cache is left out so every
+review reaches the model. Prints requests per second, latency and the batch
+size distribution for each setting of max_wait.
+
+Run from the repository root:
+    python -m benchmarks.bench_microbatch --threads 16 --requests 200
+"""
+import argparse
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from benchmarks.bench_batch_inference import load_corpus
+from sentiment.engine import predict_sentiments
+from sentiment.microbatch import MicroBatcher
+from sentiment.preprocessing import setup_nltk
+
+WAITS_MS = [0, 0.5, 2]
+
+
+def run_threads(predict_one, reviews, threads, per_thread):
+    """Call predict_one from each thread per_thread times; returns (labels, latencies, elapsed)"""
+    labels = [None] * (threads * per_thread)
+    latencies = [0.0] * (threads * per_thread)
+
+    def client(n):
+        for i in range(n * per_thread, (n + 1) * per_thread):
+            start = time.perf_counter()
+            labels[i] = predict_one(reviews[i % len(reviews)])
+            latencies[i] = time.perf_counter() - start
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return labels, latencies, time.perf_counter() - start
+
+
+def report(name, latencies, elapsed):
+    ms = np.array(latencies) * 1000
+    throughput = len(latencies) / elapsed
+    print(f"{name:>16} {throughput:>9.1f} {np.percentile(ms, 50):>8.2f} {np.percentile(ms, 99):>8.2f}")
+    return throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Direct vs micro-batched concurrent predictions')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='Predictions per thread')
+    parser.add_argument('--max-batch', type=int, default=64)
+    args = parser.parse_args()
+
+    setup_nltk()
+    model = joblib.load('models/sentiment_model.pkl')
+    vectorizer = joblib.load('models/vectorizer.pkl')
+    reviews = load_corpus() or ['Good product', 'Worst purchase ever', 'Value for money']
+
+    def run_batch(texts):
+        return predict_sentiments(texts, model, vectorizer).tolist()
+
+    print(f"{len(reviews)} reviews, {args.threads} threads x {args.requests} predictions")
+    print(f"{'':>16} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    direct_labels, latencies, elapsed = run_threads(lambda text: run_batch([text])[0],
+                                                    reviews, args.threads, args.requests)
+    direct = report('direct', latencies, elapsed)
+
+    for wait_ms in WAITS_MS:
+        batcher = MicroBatcher(run_batch, max_batch=args.max_batch, max_wait=wait_ms / 1000)
+        labels, latencies, elapsed = run_threads(batcher.submit, reviews, args.threads, args.requests)
+        throughput = report(f"batched {wait_ms}ms", latencies, elapsed)
+        stats = batcher.stats()
+        assert labels == direct_labels, 'micro-batched labels differ from direct predictions'
+        print(f"{'':>16} {throughput / direct:.2f}x  mean batch {stats['mean_batch_size']}  "
+              f"sizes {stats['batch_sizes']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Vectorize + predict latency: scikit-learn's path vs the fused NBKernel.
+
+Texts are preprocessed once up front, so only the part the kernel replaces
+is timed: vectorizer.transform + model.predict against NBKernel.predict,
+for the pickled pair and for the memory-mapped artifact. Single calls are
+timed over many repetitions; batched calls once per size (best of a few).
+The kernel's labels are checked against model.predict on the whole corpus.
+
+Run from the repository root:
+    python -m benchmarks.bench_nb_kernel
+"""
+import time
+
+import joblib
+import numpy as np
+
+from benchmarks.bench_batch_inference import load_corpus
+from sentiment.artifact import load_artifact
+from sentiment.nb_kernel import NBKernel
+from sentiment.preprocessing import preprocess_texts, setup_nltk
+
+SINGLE_CALLS = 2000
+BATCH_SIZES = [10, 100, 1000, 10000]
+REPEATS = 5
+
+
+def best_time(fn, texts, repeats=REPEATS):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    setup_nltk()
+    model = joblib.load('models/sentiment_model.pkl')
+    vectorizer = joblib.load('models/vectorizer.pkl')
+    artifact_model, artifact_vectorizer = load_artifact()
+    corpus = preprocess_texts(load_corpus())
+    print(f"Loaded {len(corpus)} reviews from data/")
+
+    paths = {
+        'sklearn': lambda texts: model.predict(vectorizer.transform(texts)),
+        'artifact': lambda texts: artifact_model.predict(artifact_vectorizer.transform(texts)),
+        'kernel': NBKernel(model, vectorizer).predict,
+        'kernel+artifact': NBKernel(artifact_model, artifact_vectorizer).predict,
+    }
+
+    expected = model.predict(vectorizer.transform(corpus))
+    for name, predict in paths.items():
+        mismatches = int((predict(corpus) != expected).sum())
+        assert mismatches == 0, f"{name}: {mismatches} labels differ from model.predict"
+    print("All paths match model.predict")
+
+    rng = np.random.default_rng(42)
+    singles = rng.choice(corpus, size=SINGLE_CALLS).tolist()
+    print(f"\n{'single call':>16} {'us/call':>9}")
+    for name, predict in paths.items():
+        start = time.perf_counter()
+        for text in singles:
+            predict([text])
+        print(f"{name:>16} {(time.perf_counter() - start) / SINGLE_CALLS * 1e6:>9.1f}")
+
+    print(f"\n{'batch':>16}" + ''.join(f"{size:>10}" for size in BATCH_SIZES) + "   (us/review)")
+    batches = {size: rng.choice(corpus, size=size).tolist() for size in BATCH_SIZES}
+    for name, predict in paths.items():
+        timings = [best_time(predict, batches[size]) / size * 1e6 for size in BATCH_SIZES]
+        print(f"{name:>16}" + ''.join(f"{t:>10.2f}" for t in timings))
+
+
+if __name__ == '__main__':
+    main()
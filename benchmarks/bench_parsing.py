@@ -0,0 +1,251 @@
+"""
+Parse time per review page: html.parser over the whole page vs scraping.parsing.
+
+Builds synthetic review pages in each scraper's markup, padded with the
+navigation, product carousels and inline scripts that make up most of a
+live page, then times:
+
+    legacy       BeautifulSoup(page_source, 'html.parser') and find/select,
+                 as the scrapers did before
+    <backend>    scraping.parsing.extract, scoped to the review containers
+    <backend>/full  the same backend parsing the whole page
+
+for every available backend, after checking each returns exactly what the
+legacy code did. The infinite-scroll case replays a Myntra list growing a
+batch at a time: the legacy loop re-parses the whole page after every
+scroll, IncrementalExtractor parses only the new containers (the outerHTML
+the browser hands back, which this benchmark slices in Python).
+
+Run from the repository root (no browser needed):
+    python -m benchmarks.bench_parsing
+    python -m benchmarks.bench_parsing --reviews 20 --filler-kb 800 --repeat 20
+"""
+import argparse
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from scraping.parsing import BACKENDS, NEW_CONTAINERS_JS, IncrementalExtractor, extract, get_backend
+
+PHRASES = [
+    'Good product', 'Value for money, display is crisp and bright',
+    'Worst purchase, stopped working after a week', 'Nice monitor for the price',
+    'Colors are okay but the stand is <b>wobbly</b>', 'Excellent build quality &amp; fast delivery',
+    'Average product,\n not as shown in pictures', 'Terrible customer support',
+]
+
+
+def phrase(i):
+    return f"{PHRASES[i % len(PHRASES)]} #{i + 1}"
+
+
+def filler(kb):
+    """Markup that isn't reviews: menus, product cards and a large inline script"""
+    blocks = []
+    size = 0
+    i = 0
+    while size < kb * 1024:
+        block = (f'<nav class="_1kidPb"><ul>' + ''.join(f'<li><a href="/c/{i}/{j}">Category {j}</a></li>' for j in range(20))
+                 + f'</ul></nav><div class="_75nlfW"><div class="slAVV4"><a class="VJA3rP" href="/p/itm{i}">'
+                 f'<img src="//img/{i}.jpg" alt="Product {i}"><div class="wjcEIp">Product {i}</div>'
+                 f'<div class="Nx9bqj">&#8377;{i * 37 % 9000}</div></a></div></div>'
+                 f'<script>window.__STATE_{i}__ = {{"items": [{",".join(str(k) for k in range(200))}]}};</script>')
+        blocks.append(block)
+        size += len(block)
+        i += 1
+    # Half before the reviews and half after, split between blocks
+    half = len(blocks) // 2
+    return ''.join(blocks[:half]), ''.join(blocks[half:])
+
+
+def page(body, padding):
+    before, after = padding
+    return f'<!DOCTYPE html><html><head><title>Reviews</title></head><body>{before}{body}{after}</body></html>'
+
+
+def flipkart_page(n, padding):
+    reviews = ''.join(f'<div class="col EPCmJX"><div class="ZmyHeo"><div><div class="">{phrase(i)}</div>'
+                      f'<span class="wTYmpv"><span>READ MORE</span></span></div></div></div>' for i in range(n))
+    return page(reviews, padding)
+
+
+def dell_page(n, padding):
+    reviews = ''.join(f'<div class="pr-review"><header><span class="pr-rd-review-headline">Title {i}</span></header>'
+                      f'<section><p class="pr-rd-description-text">{phrase(i)}</p></section></div>' for i in range(n))
+    return page(reviews, padding)
+
+
+def nike_page(n, padding):
+    reviews = ''.join(f'<div class="tt-c-review"><div class="tt-c-review__heading-text">Title {i}</div>'
+                      f'<span class="tt-c-review__text-content">{phrase(i)}</span></div>' for i in range(n))
+    return page(reviews, padding)
+
+
+def nykaa_page(n, padding):
+    reviews = ''.join(f'<section class="css-1v6g5ho"><div class="css-tm4hnq">Title {i}</div>'
+                      f'<p class="css-1n0nrdk">{phrase(i)}<br> more text</p></section>' for i in range(n))
+    return page(reviews, padding)
+
+
+def myntra_page(n, padding):
+    reviews = ''.join(f'<div class="user-review-main"><div class="user-review-reviewTextWrapper">{phrase(i)}</div></div>'
+                      for i in range(n))
+    return page(f'<div class="detailed-reviews-headline">Customer Reviews ({n})</div>{reviews}', padding)
+
+
+# The scrapers' review extraction before scraping.parsing, as (text, title) pairs
+
+def legacy_flipkart(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return [(review.select_one("div div").text.strip(), '') for review in soup.select("div.ZmyHeo")]
+
+
+def legacy_dell(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    reviews = []
+    for review in soup.find_all('div', class_='pr-review'):
+        title = review.find('span', class_='pr-rd-review-headline')
+        text = review.find('p', class_='pr-rd-description-text')
+        if title and text:
+            reviews.append((text.text.strip(), title.text.strip()))
+    return reviews
+
+
+def legacy_nike(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return [(block.select_one("span.tt-c-review__text-content").text.strip(),
+             block.select_one("div.tt-c-review__heading-text").text.strip()) for block in soup.select(".tt-c-review")]
+
+
+def legacy_nykaa(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return [(section.find("p", class_="css-1n0nrdk").get_text(strip=True),
+             section.find("div", class_="css-tm4hnq").get_text(strip=True))
+            for section in soup.find_all("section", class_="css-1v6g5ho")]
+
+
+def legacy_myntra(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return [(r.text.strip(), '') for r in soup.find_all("div", class_="user-review-reviewTextWrapper")]
+
+
+def fields_extractor(container, fields, strip_pieces=False):
+    def run(html, backend, scoped=True):
+        items = extract(html, container, fields, strip_pieces, backend, scoped)
+        return [(item['text'], item.get('title') or '') for item in items]
+    return run
+
+
+# platform -> (page builder, legacy parser, scraping.parsing equivalent)
+CASES = {
+    'flipkart': (flipkart_page, legacy_flipkart, fields_extractor("div.ZmyHeo", {'text': "div div"})),
+    'dell': (dell_page, legacy_dell, fields_extractor("div.pr-review", {
+        'title': 'span.pr-rd-review-headline', 'text': 'p.pr-rd-description-text'})),
+    'nike': (nike_page, legacy_nike, fields_extractor(".tt-c-review", {
+        'title': "div.tt-c-review__heading-text", 'text': "span.tt-c-review__text-content"})),
+    'nykaa': (nykaa_page, legacy_nykaa, fields_extractor("section.css-1v6g5ho", {
+        'title': "div.css-tm4hnq", 'text': "p.css-1n0nrdk"}, strip_pieces=True)),
+    'myntra': (myntra_page, legacy_myntra, fields_extractor("div.user-review-reviewTextWrapper", {'text': None})),
+}
+
+
+def available_backends():
+    names = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+            names.append(name)
+        except ImportError:
+            print(f"({name} not installed, skipped)")
+    return names
+
+
+def per_page_ms(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+class ReplayDriver:
+    """Stands in for the browser in IncrementalExtractor: slices the container HTML like NEW_CONTAINERS_JS"""
+
+    def __init__(self, containers):
+        self.containers = containers
+
+    def execute_script(self, script, selector, start):
+        assert script == NEW_CONTAINERS_JS
+        start = 0 if len(self.containers) < start else start
+        return [len(self.containers), self.containers[start:]]
+
+
+def bench_infinite_scroll(backends, padding, total, batch):
+    """Myntra-style list growing by batch reviews per scroll, until total are loaded"""
+    containers = [f'<div class="user-review-reviewTextWrapper">{phrase(i)}</div>' for i in range(total)]
+
+    def legacy():
+        seen = []
+        for loaded in range(batch, total + 1, batch):
+            html = page(''.join(containers[:loaded]), padding)
+            seen.extend(text for text, _ in legacy_myntra(html)[len(seen):])
+        return seen
+
+    def incremental(backend):
+        def run():
+            driver = ReplayDriver([])
+            extractor = IncrementalExtractor("div.user-review-reviewTextWrapper", {'text': None}, backend=backend)
+            seen = []
+            for loaded in range(batch, total + 1, batch):
+                driver.containers = containers[:loaded]
+                seen.extend(item['text'] for item in extractor.new_items(driver))
+            return seen
+        return run
+
+    expected = legacy()
+    rows = [('legacy', per_page_ms(legacy, 3))]
+    for name in backends:
+        if incremental(name)() != expected:
+            print(f"MISMATCH: infinite scroll with {name}")
+            return False
+        rows.append((f'{name}/incremental', per_page_ms(incremental(name), 3)))
+    print(f"\nInfinite scroll, {total} reviews in batches of {batch} (ms for the whole scroll)")
+    for label, ms in rows:
+        print(f"  {label:<24} {ms:9.2f} ms  {rows[0][1] / ms:6.1f}x")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark review page parsing backends')
+    parser.add_argument('--reviews', type=int, default=10, help='Reviews per page')
+    parser.add_argument('--filler-kb', type=int, default=400, help='Non-review markup per page, in KB')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--scroll-total', type=int, default=200, help='Reviews loaded in the infinite-scroll case')
+    args = parser.parse_args()
+
+    padding = filler(args.filler_kb)
+    backends = available_backends()
+    ok = True
+    for platform, (build, legacy, parse) in CASES.items():
+        html = build(args.reviews, padding)
+        expected = legacy(html)
+        rows = [('legacy', per_page_ms(lambda: legacy(html), args.repeat))]
+        for name in backends:
+            for scoped in (True, False):
+                if parse(html, name, scoped) != expected:
+                    print(f"MISMATCH: {platform} with {name} (scoped={scoped})")
+                    ok = False
+                    continue
+                label = name if scoped else f'{name}/full'
+                rows.append((label, per_page_ms(lambda: parse(html, name, scoped), args.repeat)))
+        print(f"\n{platform}: {len(expected)} reviews, {len(html) // 1024} KB page (ms per page)")
+        for label, ms in rows:
+            print(f"  {label:<24} {ms:9.2f} ms  {rows[0][1] / ms:6.1f}x")
+
+    ok = bench_infinite_scroll(backends, padding, args.scroll_total, 10) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
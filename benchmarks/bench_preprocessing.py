@@ -0,0 +1,90 @@
+"""
+Parity check and throughput benchmark for sentiment.preprocessing.
+
+Checks that the compiled pipeline produces exactly what the original
+app.preprocess_text produced (nltk.word_tokenize + stopword list) for every
+review under data/ plus a few tokenizer edge cases, then reports throughput
+in reviews per second. Exits non-zero on any mismatch.
+
+Run from the repository root:
+    python -m benchmarks.bench_preprocessing
+"""
+import sys
+import time
+
+import nltk
+import numpy as np
+
+from benchmarks.bench_batch_inference import load_corpus
+from sentiment.preprocessing import (
+    _FAST_PATH_RE,
+    _TREEBANK_SPLIT_RE,
+    preprocess_text,
+    preprocess_texts,
+    setup_nltk,
+)
+
+EDGE_CASES = [
+    "Good product",
+    "I cannot recommend this",
+    "gonna buy again, wanna gift one too",
+    "Don't buy!!! Worst... quality ever.",
+    "Value for money 10/10 :)",
+    "Mr. Sharma's review: it's \"ok\"",
+    "battery life  \t is\nGREAT",
+    "",
+]
+
+BENCH_SIZE = 20000
+
+
+def legacy_preprocess_text(text, stopwords):
+    """app.preprocess_text before this module, minus the per-call downloads"""
+    tokens = nltk.word_tokenize(text)
+    tokens = [word for word in tokens if word.lower() not in stopwords]
+    return ' '.join(tokens)
+
+
+def check_parity(texts, stopword_list):
+    mismatches = 0
+    for text in texts:
+        expected = legacy_preprocess_text(text, stopword_list)
+        actual = preprocess_text(text)
+        if expected != actual:
+            mismatches += 1
+            print(f"MISMATCH {text!r}\n  nltk: {expected!r}\n  fast: {actual!r}")
+    return mismatches
+
+
+def rate(fn, texts):
+    start = time.perf_counter()
+    fn(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    setup_nltk()
+    stopword_list = nltk.corpus.stopwords.words('english')
+    corpus = load_corpus()
+
+    texts = corpus + EDGE_CASES
+    mismatches = check_parity(texts, stopword_list)
+    fast = sum(1 for t in texts if _FAST_PATH_RE.fullmatch(t) and not _TREEBANK_SPLIT_RE.search(t))
+    print(f"Parity: {len(texts) - mismatches}/{len(texts)} identical, "
+          f"{fast / len(texts):.0%} took the regex fast path")
+
+    rng = np.random.default_rng(42)
+    sample = rng.choice(corpus, size=BENCH_SIZE, replace=True).tolist()
+    legacy = rate(lambda ts: [legacy_preprocess_text(t, stopword_list) for t in ts], sample)
+    single = rate(lambda ts: [preprocess_text(t) for t in ts], sample)
+    bulk = rate(preprocess_texts, sample)
+    print(f"{'legacy (list stopwords)':<26} {legacy:>10.0f} reviews/s")
+    print(f"{'preprocess_text':<26} {single:>10.0f} reviews/s ({single / legacy:.1f}x)")
+    print(f"{'preprocess_texts (bulk)':<26} {bulk:>10.0f} reviews/s ({bulk / legacy:.1f}x)")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Replay benchmark: fixed time.sleep waits vs event-driven readiness waits.
+
+Loads the saved review-page fixtures in benchmarks/fixtures/ in a pooled
+headless Chrome and walks them the way the scrapers do, once with the old
+fixed sleeps and once with scraping.waits. The fixtures replay the live
+sites' loading delay (?latency=), so the difference in wall-clock time is
+the time the fixed sleeps spent waiting on pages that were already ready.
+
+Run from the repository root (needs Chrome):
+    python -m benchmarks.bench_waits
+    python -m benchmarks.bench_waits --latency 800 --pages 20
+"""
+import argparse
+import pathlib
+import time
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from scraping import flipkart
+from scraping.Myntra import scroll_reviews
+from scraping.driver_pool import get_pool
+
+FIXTURES = pathlib.Path(__file__).resolve().parent / 'fixtures'
+
+
+def fixture_url(name, **params):
+    query = '&'.join(f"{k}={v}" for k, v in params.items())
+    return f"{(FIXTURES / name).as_uri()}?{query}"
+
+
+def legacy_go_to_next_page(driver):
+    """flipkart.go_to_next_page as it was with a fixed 2s sleep"""
+    try:
+        next_button = WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.XPATH, "//a[@class='_9QVEpD']/span[text()='Next']"))
+        )
+        parent_elem = next_button.find_element(By.XPATH, "..")
+        if 'disabled' in parent_elem.get_attribute('class'):
+            return False
+        driver.execute_script("arguments[0].scrollIntoView();", next_button)
+        driver.execute_script("arguments[0].click();", next_button)
+        time.sleep(2)
+        return True
+    except (TimeoutException, NoSuchElementException):
+        return False
+
+
+def walk_flipkart(driver, url, event_driven):
+    """Open the fixture and page through it like scrape_flipkart_reviews, returns the reviews seen"""
+    reviews = []
+    if event_driven:
+        flipkart.open_product_page(driver, url)
+        next_page = flipkart.go_to_next_page
+    else:
+        driver.get(url)
+        time.sleep(3)
+        next_page = legacy_go_to_next_page
+    while True:
+        reviews.extend(flipkart.extract_reviews(driver))
+        if not next_page(driver):
+            return reviews
+
+
+def legacy_scroll_reviews(driver, total_reviews, max_retries=5):
+    """The Myntra scroll loop as it was with 5 x 0.3s + 1.2s sleeps per round"""
+    reviews = set()
+    last_scraped = 0
+    retries = 0
+    while len(reviews) < total_reviews and retries < max_retries:
+        for _ in range(5):
+            driver.execute_script("window.scrollBy(0, 500);")
+            time.sleep(0.3)
+        time.sleep(1.2)
+        for element in driver.find_elements(By.CSS_SELECTOR, "div.user-review-reviewTextWrapper"):
+            reviews.add(element.text.strip())
+        retries = retries + 1 if len(reviews) == last_scraped else 0
+        last_scraped = len(reviews)
+    return reviews
+
+
+def walk_myntra(driver, url, total, event_driven):
+    driver.get(url)
+    if event_driven:
+        return scroll_reviews(driver)
+    time.sleep(2)
+    return legacy_scroll_reviews(driver, total)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return len(result), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=int, default=400, help='Simulated page update latency in ms')
+    parser.add_argument('--pages', type=int, default=10, help='Flipkart review pages to walk')
+    parser.add_argument('--reviews', type=int, default=100, help='Myntra reviews to scroll through')
+    args = parser.parse_args()
+
+    pool = get_pool()
+    flipkart_url = fixture_url('flipkart_reviews.html', latency=args.latency, pages=args.pages)
+    myntra_url = fixture_url('myntra_reviews.html', latency=args.latency, total=args.reviews)
+
+    print(f"Replaying fixtures with {args.latency}ms page latency")
+    print(f"{'scenario':<28} {'items':>6} {'fixed sleeps':>13} {'event waits':>12} {'saved':>7}")
+    with pool.borrow() as driver:
+        for name, run in [
+            (f"flipkart {args.pages} pages", lambda ev: walk_flipkart(driver, flipkart_url, ev)),
+            (f"myntra {args.reviews} reviews", lambda ev: walk_myntra(driver, myntra_url, args.reviews, ev)),
+        ]:
+            legacy_items, legacy_time = timed(run, False)
+            items, event_time = timed(run, True)
+            assert items == legacy_items, (name, items, legacy_items)
+            print(f"{name:<28} {items:>6} {legacy_time:>12.1f}s {event_time:>11.1f}s "
+                  f"{1 - event_time / legacy_time:>6.0%}")
+    pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Load test for POST /predict: requests per second and latency percentiles.
+
+Sends reviews from data/ to a running server from several client threads,
+each with its own keep-alive connection, for a fixed duration, then reports
+throughput and p50/p90/p99 latency. Run it against the development server
+and against gunicorn to compare:
+
+    python app.py                                   # or: gunicorn -c gunicorn.conf.py
+    python -m benchmarks.load_test_predict --url http://localhost:5050 --concurrency 16 --duration 30
+
+With --unique the reviews are made distinct, so every request goes through
+the model instead of being answered by the prediction cache.
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+import requests
+
+from benchmarks.bench_batch_inference import load_corpus
+
+
+def run_client(url, reviews, deadline, latencies, errors, lock, offset, unique):
+    session = requests.Session()
+    i = offset
+    local_latencies = []
+    local_errors = 0
+    while time.perf_counter() < deadline:
+        review = reviews[i % len(reviews)]
+        if unique:
+            review = f"{review} #{offset}-{i}"
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{url}/predict", json={'review': review}, timeout=30)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        local_latencies.append(time.perf_counter() - start)
+        if not ok:
+            local_errors += 1
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test POST /predict')
+    parser.add_argument('--url', default='http://localhost:5050')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to run')
+    parser.add_argument('--warmup', type=float, default=2, help='Seconds of unmeasured requests first')
+    parser.add_argument('--unique', action='store_true', help='Make every review distinct to bypass the cache')
+    args = parser.parse_args()
+
+    reviews = load_corpus() or ['Good product', 'Worst purchase ever', 'Value for money']
+    print(f"{len(reviews)} reviews, {args.concurrency} clients, {args.duration}s against {args.url}")
+
+    results = {}
+    for p, (phase, duration) in enumerate((('warmup', args.warmup), ('measured', args.duration))):
+        if duration <= 0:
+            continue
+        latencies, errors, lock = [], [0], threading.Lock()
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        # Each client starts at its own offset, so --unique texts never repeat across clients or phases
+        clients = [threading.Thread(target=run_client, args=(args.url, reviews, deadline, latencies, errors, lock,
+                                                             (p * args.concurrency + n) * 10 ** 7, args.unique))
+                   for n in range(args.concurrency)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        results[phase] = (latencies, errors[0], time.perf_counter() - start)
+
+    latencies, errors, elapsed = results['measured']
+    if not latencies:
+        print("No requests completed")
+        return
+    ms = np.array(latencies) * 1000
+    print(f"requests: {len(latencies)}  errors: {errors}  elapsed: {elapsed:.1f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency ms: p50 {np.percentile(ms, 50):.2f}  p90 {np.percentile(ms, 90):.2f}  "
+          f"p99 {np.percentile(ms, 99):.2f}  max {ms.max():.2f}")
+
+
+if __name__ == '__main__':
+    main()
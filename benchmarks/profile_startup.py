@@ -0,0 +1,102 @@
+"""
+Startup profile of the app: what `import app` imports and how long it takes.
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter and
+prints the total import time, the slowest top-level imports (cumulative,
+including everything they import) and which heavy libraries were loaded at
+all; the background warm-up is turned off for it (MODEL_WARM_UP=0), as
+-X importtime can't tell apart imports made by two threads at once. A
+second fresh interpreter, with the warm-up on, times `import app`, the wait
+for GET /ready to turn 200 (model loaded and NLTK set up) and the first
+/predict.
+
+Run from the repository root:
+    python -m benchmarks.profile_startup
+    python -m benchmarks.profile_startup --log importtime.txt   # keep the raw report
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Libraries worth knowing about when they are imported at startup
+HEAVY_MODULES = ('nltk', 'sklearn', 'scipy', 'pandas', 'pyarrow', 'selenium', 'bs4', 'lxml', 'requests', 'joblib')
+
+TIMING_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+while client.get('/ready').status_code != 200:
+    if time.perf_counter() - start > 120:
+        raise SystemExit('not ready after 120 s: ' + client.get('/ready').get_data(as_text=True))
+    time.sleep(0.01)
+ready = time.perf_counter()
+response = client.post('/predict', json={'review': 'Battery life is great, value for money'})
+predicted = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'ready_ms': (ready - start) * 1000,
+                  'first_predict_ms': (predicted - ready) * 1000, 'status': response.status_code}))
+"""
+
+
+def parse_importtime(stderr):
+    """(self_us, cumulative_us, depth, module) for each line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time profile of app.py')
+    parser.add_argument('--top', type=int, default=15, help='How many top-level imports to list')
+    parser.add_argument('--log', help='Write the raw -X importtime output here')
+    args = parser.parse_args()
+
+    # Keep the profile from writing to the real caches or data/
+    env = {**os.environ, 'SCRAPE_CSV': os.environ.get('SCRAPE_CSV', '0')}
+    env.pop('GUNICORN_PRELOAD', None)
+
+    profile = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                             env={**env, 'MODEL_WARM_UP': '0'}, capture_output=True, text=True)
+    if args.log:
+        with open(args.log, 'w') as f:
+            f.write(profile.stderr)
+    rows = parse_importtime(profile.stderr)
+    app_index = next((i for i, row in enumerate(rows) if row[3] == 'app' and row[2] == 0), None)
+    if profile.returncode != 0 or app_index is None:
+        print(profile.stderr[-2000:])
+        raise SystemExit('import app failed')
+
+    # Modules are listed once their imports finish, so app's own imports are the
+    # depth-1 rows between the interpreter's startup imports and app's row
+    start = max((i for i, row in enumerate(rows[:app_index]) if row[2] == 0), default=-1) + 1
+    app_rows = rows[start:app_index + 1]
+    print(f"import app: {rows[app_index][1] / 1000:.0f} ms cumulative, {len(app_rows)} modules imported")
+    direct = sorted((row for row in app_rows if row[2] == 1), key=lambda row: row[1], reverse=True)
+    print(f"\n{'cumulative ms':>14}  top-level import")
+    for _, cumulative_us, _, name in direct[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}  {name}")
+
+    print("\nheavy libraries imported at startup:")
+    for module in HEAVY_MODULES:
+        row = next((row for row in app_rows if row[3] == module), None)
+        print(f"  {module:<10} {'%.0f ms' % (row[1] / 1000) if row else 'not imported'}")
+
+    timing = subprocess.run([sys.executable, '-c', TIMING_SCRIPT], env=env, capture_output=True, text=True)
+    if timing.returncode != 0:
+        print(timing.stderr[-2000:])
+        raise SystemExit('timing run failed')
+    result = json.loads(timing.stdout.strip().splitlines()[-1])
+    print(f"\nimport app {result['import_ms']:.0f} ms, /ready after {result['ready_ms']:.0f} ms, "
+          f"first /predict {result['first_predict_ms']:.1f} ms (HTTP {result['status']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 from flask import Flask, request, jsonify
 import joblib
+import nltk
+import os
 
 app = Flask(__name__)
 
@@ -7,6 +9,11 @@ app = Flask(__name__)
 model = joblib.load('../models/sentiment_model.pkl')
 vectorizer = joblib.load('../models/vectorizer.pkl')
 
+# Download NLTK data and build the stopword set once at startup
+nltk.download('punkt', quiet=True)
+nltk.download('stopwords', quiet=True)
+STOPWORDS = frozenset(nltk.corpus.stopwords.words('english'))
+
 @app.route('/predict', methods=['POST'])
 def predict():
     data = request.get_json()
@@ -23,16 +30,36 @@ def predict():
     
     return jsonify({'sentiment': prediction[0]})
 
+# Most reviews accepted by one POST /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get('PREDICT_BATCH_MAX', 1000))
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    # A JSON array of review strings or {"review": ...} objects
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        return jsonify({'error': 'Body must be a JSON array of reviews'}), 400
+    if len(data) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} reviews per batch'}), 413
+    reviews = [item.get('review') if isinstance(item, dict) else item for item in data]
+    if not all(isinstance(review, str) for review in reviews):
+        return jsonify({'error': 'Every item must be a string or an object with a "review" string'}), 400
+    if not reviews:
+        return jsonify({'results': []})
+
+    # Vectorize and classify the whole batch at once
+    text_vectors = vectorizer.transform([preprocess_text(review) for review in reviews])
+    probabilities = model.predict_proba(text_vectors)
+    classes = model.classes_.tolist()
+    results = [{'sentiment': classes[row.argmax()], 'probabilities': dict(zip(classes, row.tolist()))}
+               for row in probabilities]
+    return jsonify({'results': results})
+
 def preprocess_text(text):
-    import nltk
-    nltk.download('punkt')
-    nltk.download('stopwords')
-    
     # Tokenize text
     tokens = nltk.word_tokenize(text)
     # Remove stopwords
-    stopwords = nltk.corpus.stopwords.words('english')
-    tokens = [word for word in tokens if word.lower() not in stopwords]
+    tokens = [word for word in tokens if word.lower() not in STOPWORDS]
     # Join tokens back into a single string
     return ' '.join(tokens)
 
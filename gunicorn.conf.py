@@ -0,0 +1,84 @@
+"""
+gunicorn settings for serving the app with several worker processes.
+
+    gunicorn -c gunicorn.conf.py
+
+The app, and with it the model and vectorizer, is imported once in the
+master (preload_app) and the workers are forked from it, so they share those
+pages copy-on-write instead of each loading its own copy. gc.freeze() moves
+everything loaded by then out of the garbage collector's reach, so
+collections in the workers don't write to those objects and un-share them.
+
+When the served model files change (the model and vectorizer pickles, or
+the manifest of the exported artifact; see ModelStore.paths), the master
+sends itself SIGHUP. Other files under models/, such as the incremental
+model scripts_train_incremental.py writes, are not watched. On SIGHUP the
+master reloads the model (on_reload), forks fresh workers with it and lets
+the old ones finish their requests before they exit. `kill -HUP <master pid>` does the same by hand.
+
+Each worker has its own Chrome pool (DriverPool), scrape result cache and
+single-flight coalescing (ResultCache) and /predict micro-batcher: two
+workers can scrape the same product at once, and each caches its own
+results. So that Chrome sessions don't grow with the worker count, the
+CHROME_SESSIONS budget (default 4) is split between the workers as their
+DRIVER_POOL_SIZE (at least 1 each) unless DRIVER_POOL_SIZE is set, which
+is then per worker.
+
+Environment: BIND (default 0.0.0.0:5050), WEB_CONCURRENCY (workers, default
+the CPU count), GUNICORN_THREADS (threads per worker, default 8),
+GUNICORN_TIMEOUT (default 120), MODEL_WATCH_INTERVAL (seconds, 0 to turn
+the model watcher off, default 2), CHROME_SESSIONS (default 4).
+"""
+import gc
+import multiprocessing
+import os
+import signal
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('BIND', '0.0.0.0:5050')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# Scrapes and SSE streams hold a request open for minutes; threads keep a
+# worker serving /predict meanwhile
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 60
+preload_app = True
+
+# Read by app.py: the master shouldn't start Chrome sessions, the workers do
+os.environ['GUNICORN_PRELOAD'] = '1'
+
+# Read by scraping.driver_pool.get_pool() in each worker
+os.environ.setdefault('DRIVER_POOL_SIZE',
+                      str(max(1, int(os.environ.get('CHROME_SESSIONS', 4)) // max(workers, 1))))
+
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 2))
+
+
+def when_ready(server):
+    gc.freeze()
+    if MODEL_WATCH_INTERVAL > 0:
+        import app
+        from sentiment.model_store import watch_model_files
+        # Only what is served: a reload recycles every worker and the scrape jobs running in them
+        watch_model_files(lambda: os.kill(os.getpid(), signal.SIGHUP), patterns=app.models.paths,
+                          interval=MODEL_WATCH_INTERVAL)
+        server.log.info("Watching the model files for changes")
+
+
+def on_reload(server):
+    # Runs in the master on SIGHUP, before the new workers are forked
+    import app
+    gc.unfreeze()
+    try:
+        app.models.load()
+        server.log.info("Reloaded the sentiment model")
+    except Exception as e:
+        server.log.error(f"Error reloading the sentiment model, keeping the old one: {e}")
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+    app.warm_driver_pool()
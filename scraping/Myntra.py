@@ -1,121 +1,150 @@
-import time
 import re
-import csv
-import pandas as pd
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import os
 
-def scrape_myntra_product(product_url):
+from scraping.driver_pool import get_pool
+from scraping.parsing import IncrementalExtractor, first_text
+from scraping.records import ReviewRecord, collect
+from scraping.sinks import data_path, file_stamp, get_csv_sink
+from scraping.waits import count_elements, wait_for_count_change, wait_for_elements
+from service.metrics import scrape_scope, span
+
+REVIEW_SELECTOR = "div.user-review-reviewTextWrapper"
+
+def stream_product(product_url):
     """
-    Scrape Myntra product details and reviews, save to CSV, and return the review CSV filename.
+    Yield ('product', details) once, then ('reviews', page) for each batch of reviews loaded.
+
+    The browser is borrowed from the shared pool while the generator runs and
+    returned when it finishes or is closed.
     """
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--log-level=3")
-    driver = webdriver.Chrome(options=options)
-    wait = WebDriverWait(driver, 10)
-    product_data = {}
-    try:
-        # Step 1: Product Info
-        driver.get(product_url)
-        title = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "pdp-title"))).text
-        product_data["product_title"] = title
-        images = driver.find_elements(By.CSS_SELECTOR, ".image-grid-imageContainer .image-grid-image")
-        image_urls = []
-        for img in images:
-            style = img.get_attribute("style")
-            if "url" in style:
-                start = style.find('("') + 2
-                end = style.find('")')
-                image_urls.append(style[start:end])
-        product_data["image_urls"] = ", ".join(image_urls)
-        try:
-            see_more = driver.find_element(By.CLASS_NAME, "index-showMoreText")
-            driver.execute_script("arguments[0].click();", see_more)
-            time.sleep(1)
-        except:
-            pass
-        try:
-            details_section = driver.find_element(By.CLASS_NAME, "pdp-product-description-content")
-            product_data["product_details"] = details_section.text.replace("\n", " ")
-        except:
-            product_data["product_details"] = "N/A"
-        try:
-            size_fit = driver.find_element(By.CLASS_NAME, "pdp-sizeFitDescContent")
-            product_data["size_fit"] = size_fit.text.replace("\n", " ")
-        except:
-            product_data["size_fit"] = "N/A"
-        try:
-            material = driver.find_elements(By.CLASS_NAME, "pdp-sizeFitDescContent")
-            if len(material) > 1:
-                product_data["material_and_care"] = material[1].text.replace("\n", " ")
-            else:
+    with get_pool().borrow() as driver:
+        with span('product_details'):
+            wait = WebDriverWait(driver, 10)
+            product_data = {}
+            # Step 1: Product Info
+            driver.get(product_url)
+            title = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "pdp-title"))).text
+            product_data["product_title"] = title
+            images = driver.find_elements(By.CSS_SELECTOR, ".image-grid-imageContainer .image-grid-image")
+            image_urls = []
+            for img in images:
+                style = img.get_attribute("style")
+                if "url" in style:
+                    start = style.find('("') + 2
+                    end = style.find('")')
+                    image_urls.append(style[start:end])
+            product_data["image_urls"] = ", ".join(image_urls)
+            try:
+                see_more = driver.find_element(By.CLASS_NAME, "index-showMoreText")
+                driver.execute_script("arguments[0].click();", see_more)
+                wait_for_elements(driver, ".pdp-product-description-content", timeout=2)
+            except:
+                pass
+            try:
+                details_section = driver.find_element(By.CLASS_NAME, "pdp-product-description-content")
+                product_data["product_details"] = details_section.text.replace("\n", " ")
+            except:
+                product_data["product_details"] = "N/A"
+            try:
+                size_fit = driver.find_element(By.CLASS_NAME, "pdp-sizeFitDescContent")
+                product_data["size_fit"] = size_fit.text.replace("\n", " ")
+            except:
+                product_data["size_fit"] = "N/A"
+            try:
+                material = driver.find_elements(By.CLASS_NAME, "pdp-sizeFitDescContent")
+                if len(material) > 1:
+                    product_data["material_and_care"] = material[1].text.replace("\n", " ")
+                else:
+                    product_data["material_and_care"] = "N/A"
+            except:
                 product_data["material_and_care"] = "N/A"
-        except:
-            product_data["material_and_care"] = "N/A"
-        try:
-            spec_keys = driver.find_elements(By.CLASS_NAME, "index-rowKey")
-            spec_values = driver.find_elements(By.CLASS_NAME, "index-rowValue")
-            for key, value in zip(spec_keys, spec_values):
-                product_data[key.text.strip()] = value.text.strip()
-        except:
-            pass
-        # Save product data
-        os.makedirs('./data', exist_ok=True)
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        product_details_file = f"./data/myntra_product_data_{timestamp}.csv"
-        with open(product_details_file, mode="w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Field", "Value"])
-            for key, value in product_data.items():
-                writer.writerow([key, value])
+            try:
+                spec_keys = driver.find_elements(By.CLASS_NAME, "index-rowKey")
+                spec_values = driver.find_elements(By.CLASS_NAME, "index-rowValue")
+                for key, value in zip(spec_keys, spec_values):
+                    product_data[key.text.strip()] = value.text.strip()
+            except:
+                pass
+        yield 'product', product_data
         # Step 2: Extract Product Code for Reviews
         product_code = driver.find_element(By.CLASS_NAME, "supplier-styleId").text.strip()
         review_url = f"https://www.myntra.com/reviews/{product_code}"
         driver.get(review_url)
-        time.sleep(2)
+        wait_for_elements(driver, "div.detailed-reviews-headline")
         # Step 3: Scrape Reviews
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        total_reviews = int(re.search(r'\((\d+)\)', soup.find("div", class_="detailed-reviews-headline").text).group(1))
-        reviews = set()
-        last_scraped = 0
-        retries = 0
-        max_retries = 5
-        while len(reviews) < total_reviews and retries < max_retries:
-            for _ in range(5):
-                driver.execute_script("window.scrollBy(0, 500);")
-                time.sleep(0.3)
-            time.sleep(1.2)
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            current_reviews = soup.find_all("div", class_="user-review-reviewTextWrapper")
-            for r in current_reviews:
-                reviews.add(r.text.strip())
-            now_scraped = len(reviews)
-            if now_scraped == last_scraped:
-                retries += 1
-            else:
-                retries = 0
-            last_scraped = now_scraped
-        reviews_file = f"./data/myntra_reviews_{timestamp}.csv"
-        df = pd.DataFrame(list(reviews), columns=["review_text"])
-        df.to_csv(reviews_file, index=False, encoding="utf-8")
-        return reviews_file
+        for batch in iter_review_batches(driver):
+            yield 'reviews', [ReviewRecord(text) for text in batch]
+
+def scrape_myntra_product(product_url, progress=None):
+    """
+    Scrape Myntra product details and reviews and return them as a ScrapeResult.
+    Both are also queued for CSV output; result.csv_file is the review CSV.
+    progress, if given, is called as progress(batches_loaded, reviews_so_far) while scrolling.
+    """
+    try:
+        with scrape_scope('myntra'):
+            result = collect('myntra', product_url, stream_product(product_url), progress)
+        result.csv_file = save_result(result)
+        return result
     except Exception as e:
         print("❌ Error:", e)
         return None
-    finally:
-        driver.quit()
 
-# URL to scrape
-PRODUCT_URL = "https://www.myntra.com/tshirts/u.s.+polo+assn.+denim+co./us-polo-assn-denim-co-brand-logo-printed-pure-cotton-slim-fit-t-shirt/27566344/buy"
+def save_result(result):
+    """Queue a ScrapeResult's product data and reviews for ./data, returns the review CSV"""
+    timestamp = file_stamp()
+    save_product(result, timestamp)
+    return save_reviews(result, timestamp)
+
+def save_product(result, stamp=None):
+    """Queue the product data CSV, returns its path"""
+    return get_csv_sink().write(data_path("myntra_product_data", stamp),
+                                [{"Field": key, "Value": value} for key, value in result.product.items()], ["Field", "Value"])
+
+def save_reviews(result, stamp=None, append=False):
+    """
+    Queue a ScrapeResult's reviews for the review CSV, returns its path.
+
+    A streamed scrape calls this once per page with the same stamp and append=True.
+    """
+    return get_csv_sink().write(data_path("myntra_reviews", stamp),
+                                [{"review_text": review.text} for review in result.reviews], ["review_text"], append)
+
+def scroll_reviews(driver, max_retries=5):
+    """Scroll the infinite review list on a Myntra /reviews page and collect every review text"""
+    reviews = set()
+    for batch in iter_review_batches(driver, max_retries):
+        reviews.update(batch)
+    return reviews
+
+def iter_review_batches(driver, max_retries=5):
+    """Scroll the infinite review list on a Myntra /reviews page, yielding each batch of new review texts"""
+    total_reviews = int(re.search(r'\((\d+)\)', first_text(driver.page_source, "div.detailed-reviews-headline")).group(1))
+    # Only the reviews loaded since the last scroll are read back and parsed
+    batches = IncrementalExtractor(REVIEW_SELECTOR, {"text": None})
+    reviews = set()
+    retries = 0
+    while len(reviews) < total_reviews and retries < max_retries:
+        # Scroll down and wait for the next batch of lazy-loaded reviews
+        review_count = count_elements(driver, REVIEW_SELECTOR)
+        driver.execute_script("window.scrollBy(0, 2500);")
+        wait_for_count_change(driver, REVIEW_SELECTOR, review_count, timeout=3)
+        current_reviews = batches.new_items(driver)
+        # dict.fromkeys keeps page order while dropping repeats within the batch
+        new_reviews = [text for text in dict.fromkeys(r["text"] for r in current_reviews) if text not in reviews]
+        if new_reviews:
+            retries = 0
+            reviews.update(new_reviews)
+            yield new_reviews
+        else:
+            retries += 1
+
+# Only scrape the example product when run directly, not on import
+if __name__ == "__main__":
+    PRODUCT_URL = "https://www.myntra.com/tshirts/u.s.+polo+assn.+denim+co./us-polo-assn-denim-co-brand-logo-printed-pure-cotton-slim-fit-t-shirt/27566344/buy"
 
-reviews_file = scrape_myntra_product(PRODUCT_URL)
-print(f"✅ Reviews saved to '{reviews_file}'")
+    result = scrape_myntra_product(PRODUCT_URL)
+    if result:
+        print(f"✅ {len(result.reviews)} reviews queued for '{result.csv_file}'")
@@ -1,58 +1,67 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-import pandas as pd
-import time
-import os
-from datetime import datetime
-
-def setup_driver():
-    options = webdriver.ChromeOptions()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--log-level=3")
-    return webdriver.Chrome(options=options)
-
-def scrape_nykaa_product(url):
-    driver = setup_driver()
-    try:
-        driver.get(url)
-        time.sleep(3)
 
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # Get product details
-        title_tag = soup.find('h1', class_='css-1gc4x7i')
-        title = title_tag.get_text(strip=True) if title_tag else "Title not found"
+from scraping.driver_pool import get_pool
+from scraping.parsing import IncrementalExtractor
+from scraping.records import ReviewRecord, collect
+from scraping.sinks import data_path, get_csv_sink
+from scraping.waits import wait_for_count_change, wait_for_elements
+from service.metrics import scrape_scope, span
 
-        img_div = soup.find('div', class_='productSelectedImage')
-        img_tag = img_div.find('img') if img_div else None
-        image_url = img_tag['src'] if img_tag else "Image not found"
+REVIEW_SELECTOR = "section.css-1v6g5ho"
+CSV_COLUMNS = ['product_title', 'image_url', 'description', 'total_ratings', 'total_reviews', 'review_title', 'review_text']
 
-        # Get description and ratings
-        description = get_product_description(soup)
-        total_ratings, total_reviews = get_ratings_reviews_count(soup)
+def stream_product(url):
+    """
+    Yield ('product', details) once, then ('reviews', page) for each batch of reviews loaded.
 
-        # Get reviews
-        reviews = get_product_reviews(driver)
+    The browser is borrowed from the shared pool while the generator runs and
+    returned when it finishes or is closed.
+    """
+    with get_pool().borrow() as driver:
+        with span('product_details'):
+            driver.get(url)
+            wait_for_elements(driver, "h1.css-1gc4x7i")
+
+            soup = BeautifulSoup(driver.page_source, 'html.parser')
+
+            # Get product details
+            title_tag = soup.find('h1', class_='css-1gc4x7i')
+            title = title_tag.get_text(strip=True) if title_tag else "Title not found"
 
-        return save_to_csv({
-            'title': title,
+            img_div = soup.find('div', class_='productSelectedImage')
+            img_tag = img_div.find('img') if img_div else None
+            image_url = img_tag['src'] if img_tag else "Image not found"
+
+            # Get description and ratings
+            description = get_product_description(soup)
+            total_ratings, total_reviews = get_ratings_reviews_count(soup)
+
+        yield 'product', {
+            'product_title': title,
             'image_url': image_url,
             'description': description,
             'total_ratings': total_ratings,
             'total_reviews': total_reviews,
-            'reviews': reviews
-        })
+        }
+
+        # Get reviews
+        for page in iter_review_pages(driver):
+            yield 'reviews', page
+
+def scrape_nykaa_product(url, progress=None):
+    """Scrape a Nykaa product, returns a ScrapeResult or None on failure"""
+    try:
+        with scrape_scope('nykaa'):
+            result = collect('nykaa', url, stream_product(url), progress)
+        result.csv_file = save_result(result)
+        return result
 
     except Exception as e:
         print(f"Error scraping product: {e}")
         return None
-    finally:
-        driver.quit()
 
 def get_product_description(soup):
     desc_element = soup.find('div', class_='product-description')
@@ -69,12 +78,11 @@ def get_ratings_reviews_count(soup):
     except:
         return "0", "0"
 
-def get_product_reviews(driver):
-    reviews = []
+def iter_review_pages(driver):
+    """Yield each batch of newly loaded reviews as a list of ReviewRecords"""
     try:
-        # Navigate to reviews section
+        # Navigate to reviews section; the wait below polls for the lazy-loaded link
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
         
         read_more_button = WebDriverWait(driver, 8).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, "a.css-1xv8iu0"))
@@ -84,78 +92,70 @@ def get_product_reviews(driver):
             full_reviews_url = "https://www.nykaa.com" + full_reviews_url
         
         driver.get(full_reviews_url)
-        time.sleep(3)
+        wait_for_elements(driver, REVIEW_SELECTOR)
 
+        # Only the sections loaded since the last batch are read back and parsed
+        sections = IncrementalExtractor(REVIEW_SELECTOR, {"title": "div.css-tm4hnq", "text": "p.css-1n0nrdk"},
+                                        strip_pieces=True)
         seen_texts = set()
         while True:
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            review_sections = soup.find_all("section", class_="css-1v6g5ho")
-
-            new_reviews_found = False
-            for section in review_sections:
-                title_tag = section.find("div", class_="css-tm4hnq")
-                text_tag = section.find("p", class_="css-1n0nrdk")
-
-                title_text = title_tag.get_text(strip=True) if title_tag else ""
-                review_text = text_tag.get_text(strip=True) if text_tag else ""
+            reviews = []
+            for section in sections.new_items(driver):
+                title_text = section["title"] or ""
+                review_text = section["text"] or ""
 
                 if review_text and review_text not in seen_texts:
                     seen_texts.add(review_text)
-                    reviews.append({
-                        'title': title_text,
-                        'text': review_text
-                    })
-                    new_reviews_found = True
+                    reviews.append(ReviewRecord(review_text, title_text))
 
-            if not new_reviews_found:
+            if not reviews:
                 break
+            yield reviews
 
             try:
                 load_more_btn = WebDriverWait(driver, 3).until(
                     EC.element_to_be_clickable((By.CSS_SELECTOR, "div.css-1a51j15 > button.css-u04n34"))
                 )
                 driver.execute_script("arguments[0].click();", load_more_btn)
-                time.sleep(2)
+                wait_for_count_change(driver, REVIEW_SELECTOR, sections.count)
             except:
                 break
 
     except Exception as e:
         print(f"Error getting reviews: {e}")
-    
-    return reviews
 
-def save_to_csv(data, filename_prefix="nykaa_product"):
+def save_result(result):
+    """Queue a ScrapeResult for the CSV sink, returns the file it is written to"""
+    return save_reviews(result)
+
+def save_reviews(result, stamp=None, append=False):
+    """
+    Queue a ScrapeResult's reviews, each with the product's columns, for the CSV sink.
+
+    A streamed scrape calls this once per page with the same stamp and
+    append=True; the 'No Reviews' row is only written when not appending.
+    """
+    return save_to_csv(result.product, result.reviews, stamp=stamp, append=append)
+
+def save_to_csv(product, reviews, filename_prefix="nykaa_product", stamp=None, append=False):
+    """Queue the product and its reviews for the background CSV sink, returns the file they are written to"""
     try:
-        os.makedirs('./data', exist_ok=True)
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"./data/{filename_prefix}_{timestamp}.csv"
-        
-        # Prepare data for DataFrame
+        # Prepare rows for the sink
         rows = []
-        if data['reviews']:
+        if reviews or append:
             rows = [{
-                'product_title': data['title'],
-                'image_url': data['image_url'],
-                'description': data['description'],
-                'total_ratings': data['total_ratings'],
-                'total_reviews': data['total_reviews'],
-                'review_title': review['title'],
-                'review_text': review['text']
-            } for review in data['reviews']]
+                **product,
+                'review_title': review.title,
+                'review_text': review.text
+            } for review in reviews]
         else:
             rows.append({
-                'product_title': data['title'],
-                'image_url': data['image_url'],
-                'description': data['description'],
-                'total_ratings': data['total_ratings'],
-                'total_reviews': data['total_reviews'],
+                **product,
                 'review_title': 'No Reviews',
                 'review_text': 'No Reviews'
             })
-        
-        df = pd.DataFrame(rows)
-        df.to_csv(filename, index=False, encoding='utf-8')
-        return filename
+
+        return get_csv_sink().write(data_path(filename_prefix, stamp), rows, CSV_COLUMNS, append)
     
     except Exception as e:
         print(f"Error saving to CSV: {e}")
@@ -163,8 +163,8 @@ def save_to_csv(data, filename_prefix="nykaa_product"):
 
 if __name__ == "__main__":
     url = "https://www.nykaa.com/moroccanoil-treatment-oil/p/8551062"
-    filename = scrape_nykaa_product(url)
-    if filename:
-        print(f"Data saved to {filename}")
+    result = scrape_nykaa_product(url)
+    if result:
+        print(f"Scraped {len(result.reviews)} reviews, saving to {result.csv_file}")
     else:
         print("Failed to scrape product data")
@@ -1,30 +1,20 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
-import pandas as pd
-import time
-import os
-from datetime import datetime
 
-def setup_driver():
-    try:
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        return driver
-    except Exception as e:
-        print(f"Error setting up Chrome driver: {e}")
-        raise
+from scraping.driver_pool import get_pool
+from scraping.parsing import extract
+from scraping.records import ReviewRecord, collect
+from scraping.sinks import data_path, get_csv_sink
+from scraping.waits import (
+    first_element, page_height, wait_for_count_change, wait_for_elements,
+    wait_for_replacement, wait_for_scroll_growth,
+)
+from service.metrics import scrape_scope, span
+
+REVIEW_SELECTOR = "div.pr-review"
+CSV_COLUMNS = ['product_title', 'product_images', 'specifications', 'review_title', 'review_text']
 
 def get_product_title(driver):
     try:
@@ -38,8 +28,10 @@ def get_product_images(driver):
         thumbnail_buttons = driver.find_elements(By.CSS_SELECTOR, ".thumb-list button")
         for button in thumbnail_buttons:
             try:
+                # Clicking a thumbnail lazy-loads its full-size figure
+                image_count = len(driver.find_elements(By.CSS_SELECTOR, "figure[data-full-img]"))
                 driver.execute_script("arguments[0].click();", button)
-                time.sleep(1)
+                wait_for_count_change(driver, "figure[data-full-img]", image_count, timeout=1)
             except:
                 continue
 
@@ -63,7 +55,7 @@ def get_product_specs(driver, product_url):
         specs = []
         specs_url = product_url + "#tech-specs-anchor"
         driver.get(specs_url)
-        time.sleep(5)
+        wait_for_elements(driver, "#tech-spec-container li.mb-2")
 
         soup = BeautifulSoup(driver.page_source, "html.parser")
         specs_container = soup.find("div", {"id": "tech-spec-container"})
@@ -81,17 +73,22 @@ def get_product_specs(driver, product_url):
         print(f"Error getting product specifications: {e}")
         return []
 
-def get_product_reviews(driver, product_url):
-    reviews = []
+def iter_review_pages(driver, product_url):
+    """Yield the reviews on each page of the ratings widget as a list of ReviewRecords"""
     try:
         ratings_url = product_url + "#ratings_section"
         driver.get(ratings_url)
         
         WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.ID, 'ratings_section')))
 
+        # Scroll until the lazy-loaded reviews widget stops growing the page
+        height = page_height(driver)
         for _ in range(5):
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            new_height = wait_for_scroll_growth(driver, height, timeout=2)
+            if new_height == height:
+                break
+            height = new_height
 
         iframes = driver.find_elements(By.TAG_NAME, "iframe")
         for iframe in iframes:
@@ -104,89 +101,105 @@ def get_product_reviews(driver, product_url):
                 continue
 
         while True:
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            review_divs = soup.find_all('div', class_='pr-review')
+            review_divs = extract(driver.page_source, REVIEW_SELECTOR, {
+                'title': 'span.pr-rd-review-headline',
+                'text': 'p.pr-rd-description-text',
+            })
 
+            reviews = []
             for review in review_divs:
-                title = review.find('span', class_='pr-rd-review-headline')
-                text = review.find('p', class_='pr-rd-description-text')
-                if title and text:
-                    reviews.append({
-                        'title': title.text.strip(),
-                        'review': text.text.strip()
-                    })
+                if review['title'] and review['text']:
+                    reviews.append(ReviewRecord(review['text'], review['title']))
+            yield reviews
 
             try:
                 next_button = WebDriverWait(driver, 5).until(
                     EC.element_to_be_clickable((By.CLASS_NAME, 'pr-rd-pagination-btn--next'))
                 )
+                current_review = first_element(driver, REVIEW_SELECTOR)
                 driver.execute_script("arguments[0].click();", next_button)
-                time.sleep(3)
+                # A widget that re-renders in place never detaches the old reviews, so a
+                # timeout just means carry on; the loop ends when Next is missing or disabled
+                wait_for_replacement(driver, REVIEW_SELECTOR, current_review)
             except:
                 break
 
         driver.switch_to.default_content()
     except Exception as e:
         print(f"Error getting product reviews: {e}")
-    
-    return reviews
-
-def save_to_csv(data, filename_prefix="dell_product"):
-    try:
-        os.makedirs('./data', exist_ok=True)
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"./data/{filename_prefix}_{timestamp}.csv"
-        
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False, encoding='utf-8')
-        return filename
-    except Exception as e:
-        print(f"Error saving to CSV: {e}")
-        return None
 
-def scrape_dell_product(url):
-    """Main function to scrape Dell product details and reviews"""
+def save_to_csv(data, filename_prefix="dell_product", stamp=None, append=False):
+    """Queue rows for the background CSV sink, returns the file they are written to"""
+    return get_csv_sink().write(data_path(filename_prefix, stamp), data, CSV_COLUMNS, append)
+
+def save_result(result):
+    """Queue a ScrapeResult's product and reviews for the CSV sink, returns the file they are written to"""
+    return save_reviews(result)
+
+def save_reviews(result, stamp=None, append=False):
+    """
+    Queue a ScrapeResult's reviews, each with the product's columns, for the CSV sink.
+
+    A streamed scrape calls this once per page with the same stamp and
+    append=True; the 'No Reviews' row is only written when not appending.
+    """
+    product = result.product
+    product_row = {
+        'product_title': product['product_title'],
+        'product_images': ', '.join(product['product_images']),
+        'specifications': ', '.join(product['specifications']),
+    }
+    return save_to_csv([{
+        **product_row,
+        'review_title': review.title,
+        'review_text': review.text
+    } for review in result.reviews] if result.reviews or append else [{
+        **product_row,
+        'review_title': 'No Reviews',
+        'review_text': 'No Reviews'
+    }], stamp=stamp, append=append)
+
+def stream_product(url):
+    """
+    Yield ('product', details) once, then ('reviews', page) for each page of reviews.
+
+    The browser is borrowed from the shared pool while the generator runs and
+    returned when it finishes or is closed.
+    """
+    with get_pool().borrow() as driver:
+        with span('product_details'):
+            driver.get(url)
+            wait_for_elements(driver, "#page-title")
+            product = {
+                'product_title': get_product_title(driver),
+                'product_images': get_product_images(driver),
+                'specifications': get_product_specs(driver, url),
+            }
+
+        yield 'product', product
+        for page in iter_review_pages(driver, url):
+            yield 'reviews', page
+
+def scrape_dell_product(url, progress=None):
+    """Main function to scrape Dell product details and reviews
+
+    progress, if given, is called as progress(pages_done, reviews_so_far)
+    after each page of reviews. Returns a ScrapeResult, or None on failure.
+    """
     try:
-        driver = setup_driver()
-        driver.get(url)
-        time.sleep(3)
-
-        # Gather all product information
-        product_data = {
-            'title': get_product_title(driver),
-            'images': get_product_images(driver),
-            'specifications': get_product_specs(driver, url),
-            'reviews': get_product_reviews(driver, url)
-        }
-
-        # Save data to CSV
-        filename = save_to_csv([{
-            'product_title': product_data['title'],
-            'product_images': ', '.join(product_data['images']),
-            'specifications': ', '.join(product_data['specifications']),
-            'review_title': review['title'],
-            'review_text': review['review']
-        } for review in product_data['reviews']] if product_data['reviews'] else [{
-            'product_title': product_data['title'],
-            'product_images': ', '.join(product_data['images']),
-            'specifications': ', '.join(product_data['specifications']),
-            'review_title': 'No Reviews',
-            'review_text': 'No Reviews'
-        }])
-
-        driver.quit()
-        return filename
+        with scrape_scope('dell'):
+            result = collect('dell', url, stream_product(url), progress)
+        result.csv_file = save_result(result)
+        return result
 
     except Exception as e:
         print(f"Error in scrape_dell_product: {e}")
-        if 'driver' in locals():
-            driver.quit()
         return None
 
 if __name__ == "__main__":
     product_url = "https://www.dell.com/en-in/shop/shop-all-deals/inspiron-15-laptop/spd/inspiron-15-3530-laptop/oin353034071rins1m"
-    filename = scrape_dell_product(product_url)
-    if filename:
-        print(f"Data saved to {filename}")
+    result = scrape_dell_product(product_url)
+    if result:
+        print(f"Scraped {len(result.reviews)} reviews, saving to {result.csv_file}")
     else:
         print("Failed to scrape product data")
@@ -0,0 +1,252 @@
+import atexit
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from service.metrics import span
+
+# Union of the flags the individual scrapers used to pass to Chrome
+CHROME_ARGUMENTS = [
+    "--disable-gpu",
+    "--window-size=1920,1080",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-extensions",
+    "--disable-notifications",
+    "--log-level=3",
+]
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def chromedriver_path():
+    """Resolve chromedriver once per process instead of once per scrape"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            try:
+                from webdriver_manager.chrome import ChromeDriverManager
+                _driver_path = ChromeDriverManager().install()
+            except ImportError:
+                # Let Selenium Manager locate the driver
+                _driver_path = ''
+        return _driver_path or None
+
+
+def create_driver(headless=True):
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    for argument in CHROME_ARGUMENTS:
+        options.add_argument(argument)
+    service = Service(chromedriver_path())
+    return webdriver.Chrome(service=service, options=options)
+
+
+def _origin(url):
+    parts = urlsplit(url or '')
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class PooledDriver:
+    """
+    Thin proxy around a Chrome WebDriver owned by a DriverPool.
+
+    Behaves like the wrapped driver (WebDriverWait and expected_conditions
+    work on it unchanged) and counts page loads so the pool can recycle
+    sessions that have served too many pages. Also remembers the origins it
+    has loaded so reset() can clear their storage.
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.pages = 0
+        self.origins = set()
+
+    def get(self, url):
+        self.pages += 1
+        self.origins.add(_origin(url))
+        with span('page_load'):
+            return self._driver.get(url)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class DriverPool:
+    """
+    Bounded pool of warm Chrome sessions shared by all scrapers.
+
+    borrow() hands out an idle session (or starts one while fewer than
+    max_size exist, otherwise waits for one to be returned). Sessions are
+    health-checked before being handed out, have cookies, storage and extra
+    windows reset when they come back, and are replaced once they have loaded
+    max_pages pages.
+    """
+
+    def __init__(self, max_size=4, max_pages=50, headless=True, borrow_timeout=300):
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.headless = headless
+        self.borrow_timeout = borrow_timeout
+
+        self._lock = threading.Lock()
+        # Limits concurrent borrowers; idle + borrowed sessions never exceed max_size
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle = []
+        self._live = 0
+        self._closed = False
+        self.created = 0
+        self.recycled = 0
+
+    def _start(self, reserved=False):
+        if not reserved:
+            with self._lock:
+                self._live += 1
+        try:
+            with span('driver_startup'):
+                driver = PooledDriver(create_driver(self.headless))
+        except BaseException:
+            with self._lock:
+                self._live -= 1
+            raise
+        with self._lock:
+            self.created += 1
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._live -= 1
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error quitting Chrome driver: {e}")
+
+    @staticmethod
+    def is_healthy(driver):
+        try:
+            driver.execute_script("return 1")
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    @staticmethod
+    def reset(driver):
+        """Drop per-request browser state so the next borrower starts clean"""
+        driver.switch_to.default_content()
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        # delete_all_cookies() and window.localStorage only reach the current origin;
+        # the DevTools protocol clears every site the session has visited
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        origins = driver.origins | {_origin(driver.current_url)}
+        for origin in origins - {None}:
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+        driver.origins = set()
+        # Straight to the wrapped driver: about:blank is neither a page nor a page_load span
+        driver._driver.get("about:blank")
+
+    def warm(self, count=None):
+        """Start up to count idle sessions ahead of time (default: fill the pool)"""
+        with self._lock:
+            room = self.max_size - self._live
+            count = room if count is None else max(0, min(count, room))
+            self._live += count
+        for _ in range(count):
+            try:
+                driver = self._start(reserved=True)
+            except Exception as e:
+                print(f"Error warming Chrome driver: {e}")
+                continue
+            with self._lock:
+                self._idle.append(driver)
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.borrow_timeout):
+            raise TimeoutError(f"No Chrome session became free within {self.borrow_timeout}s")
+        try:
+            while True:
+                with self._lock:
+                    driver = self._idle.pop() if self._idle else None
+                if driver is None:
+                    return self._start()
+                if self.is_healthy(driver):
+                    return driver
+                self._discard(driver)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, driver):
+        try:
+            if self._closed or driver.pages >= self.max_pages:
+                with self._lock:
+                    self.recycled += 1
+                self._discard(driver)
+                return
+            try:
+                self.reset(driver)
+            except Exception as e:
+                print(f"Discarding Chrome driver that failed to reset: {e}")
+                self._discard(driver)
+                return
+            with self._lock:
+                self._idle.append(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def borrow(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'live': self._live,
+                'idle': len(self._idle),
+                'created': self.created,
+                'recycled': self.recycled,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool, configured from DRIVER_POOL_SIZE, DRIVER_MAX_PAGES and DRIVER_HEADLESS"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(
+                max_size=int(os.environ.get('DRIVER_POOL_SIZE', 4)),
+                max_pages=int(os.environ.get('DRIVER_MAX_PAGES', 50)),
+                headless=os.environ.get('DRIVER_HEADLESS', '1') != '0',
+            )
+            atexit.register(_pool.close)
+        return _pool
+
@@ -0,0 +1,193 @@
+"""
+Fetch page HTML over plain HTTP when a page is server-rendered, with Chrome as the fallback.
+
+Every scraper only needs driver.page_source to hand to BeautifulSoup, and a
+pooled keep-alive HTTP request costs far less than loading the page in a
+Chrome tab. Each (platform, page type) has a fetch mode:
+
+    'http'     HTTP only
+    'browser'  a pooled Chrome session only
+    'auto'     HTTP first, falling back to Chrome when the request fails or
+               the HTML doesn't contain what the page should (e.g. a bot
+               check or a client-rendered shell)
+
+After repeated HTTP misses for a page type, 'auto' goes straight to Chrome
+for a cooldown period instead of paying for both on every page. Every page
+fetched is counted per backend, so the savings show up in /scrape/stats.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scraping.driver_pool import get_pool
+from scraping.waits import wait_for_elements, wait_for_page_ready
+from service.metrics import platform_scope, span
+
+HTTP = 'http'
+BROWSER = 'browser'
+AUTO = 'auto'
+
+# Fetch mode per (platform, page type). Only pages whose content is in the
+# server-rendered HTML belong here; the Dell, Nike and Myntra review widgets
+# and Nykaa's load-more list are built client-side and stay on the browser.
+FETCH_MODES = {
+    ('flipkart', 'reviews'): AUTO,
+}
+
+HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-IN,en;q=0.9',
+}
+
+# Page HTML and the backend that produced it
+Page = namedtuple('Page', ['url', 'html', 'backend'])
+
+
+class FetchError(Exception):
+    pass
+
+
+class HttpBackend:
+    """requests.Session with a keep-alive connection pool shared by all threads"""
+
+    def __init__(self, pool_size=16, timeout=15, retries=2):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size,
+            max_retries=Retry(total=retries, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def fetch(self, url):
+        response = self.session.get(url, timeout=self.timeout)
+        if response.status_code != 200:
+            raise FetchError(f"HTTP {response.status_code} for {url}")
+        return response.text
+
+
+class BrowserBackend:
+    """Loads the page in a Chrome session borrowed from the shared DriverPool"""
+
+    def fetch(self, url, ready_selector=None):
+        with get_pool().borrow() as driver:
+            driver.get(url)
+            if ready_selector:
+                wait_for_elements(driver, ready_selector)
+            else:
+                wait_for_page_ready(driver)
+            return driver.page_source
+
+
+class Fetcher:
+    """
+    Fetches pages with the backend configured for their platform and page type.
+
+    fetch() returns a Page recording which backend served it. is_ready(html)
+    tells whether HTTP HTML is usable; when it isn't (or the request
+    fails), 'auto' mode loads the page in Chrome instead. ready_selector is
+    what the browser waits for before reading page_source.
+    """
+
+    def __init__(self, modes=None, default_mode=None, http=None, browser=None,
+                 failure_limit=3, cooldown=600):
+        self.modes = dict(FETCH_MODES if modes is None else modes)
+        # Overrides every page type, e.g. FETCH_MODE=browser to turn HTTP off
+        self.default_mode = default_mode
+        self.http = http or HttpBackend()
+        self.browser = browser or BrowserBackend()
+        self.failure_limit = failure_limit
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._http_disabled_until = {}
+        self._stats = {}
+
+    def mode(self, platform, page_type):
+        return self.default_mode or self.modes.get((platform, page_type), BROWSER)
+
+    def _record(self, key, field, seconds=None):
+        with self._lock:
+            stats = self._stats.setdefault(f"{key[0]}/{key[1]}", {
+                'http_pages': 0, 'browser_pages': 0, 'http_misses': 0,
+                'http_seconds': 0.0, 'browser_seconds': 0.0,
+            })
+            stats[field] += 1
+            if seconds is not None:
+                backend = 'http' if field == 'http_pages' else 'browser'
+                stats[f'{backend}_seconds'] += seconds
+
+    def _http_allowed(self, key):
+        with self._lock:
+            return self._http_disabled_until.get(key, 0) <= time.monotonic()
+
+    def _http_result(self, key, ok):
+        with self._lock:
+            if ok:
+                self._failures[key] = 0
+                return
+            self._failures[key] = self._failures.get(key, 0) + 1
+            if self._failures[key] >= self.failure_limit:
+                self._failures[key] = 0
+                self._http_disabled_until[key] = time.monotonic() + self.cooldown
+
+    def fetch(self, platform, page_type, url, is_ready=None, ready_selector=None):
+        # Labels the page loads by platform even when called outside a scrape_scope
+        with platform_scope(platform):
+            return self._fetch(platform, page_type, url, is_ready, ready_selector)
+
+    def _fetch(self, platform, page_type, url, is_ready, ready_selector):
+        key = (platform, page_type)
+        mode = self.mode(platform, page_type)
+
+        if mode == HTTP or (mode == AUTO and self._http_allowed(key)):
+            start = time.perf_counter()
+            try:
+                with span('page_load'):
+                    html = self.http.fetch(url)
+                if is_ready and not is_ready(html):
+                    raise FetchError(f"Server-rendered HTML for {url} is missing the expected content")
+                self._http_result(key, True)
+                self._record(key, 'http_pages', time.perf_counter() - start)
+                return Page(url, html, HTTP)
+            except (requests.RequestException, FetchError) as e:
+                self._http_result(key, False)
+                self._record(key, 'http_misses')
+                if mode == HTTP:
+                    raise
+                print(f"HTTP fetch failed, falling back to the browser: {e}")
+
+        start = time.perf_counter()
+        html = self.browser.fetch(url, ready_selector)
+        self._record(key, 'browser_pages', time.perf_counter() - start)
+        return Page(url, html, BROWSER)
+
+    def stats(self):
+        with self._lock:
+            return {key: {k: round(v, 2) if isinstance(v, float) else v for k, v in stats.items()}
+                    for key, stats in self._stats.items()}
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Process-wide fetcher; FETCH_MODE=http|browser|auto overrides the per-page-type modes"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = Fetcher(
+                default_mode=os.environ.get('FETCH_MODE') or None,
+                http=HttpBackend(pool_size=int(os.environ.get('FETCH_HTTP_POOL_SIZE', 16))),
+            )
+        return _fetcher
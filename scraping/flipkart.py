@@ -1,44 +1,31 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
-import pandas as pd
+from contextlib import closing
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import time
-import os
 import re
-from datetime import datetime
 
-# Configure WebDriver
-def setup_driver():
-    try:
-        options = Options()
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-notifications")
-        
-        # Set up Chrome service with ChromeDriverManager
-        service = Service(ChromeDriverManager().install())
-        
-        # Initialize Chrome driver with service and options
-        driver = webdriver.Chrome(service=service, options=options)
-        return driver
-    except Exception as e:
-        print(f"Error setting up Chrome driver: {e}")
-        raise
+from scraping.driver_pool import get_pool
+from scraping.fetcher import get_fetcher
+from scraping.pagination import DEFAULT_MAX_PARALLEL, drop_page_overlap, iter_pages_concurrently
+from scraping.parsing import extract
+from scraping.records import ReviewRecord, ScrapeResult
+from scraping.sinks import data_path, get_csv_sink
+from service.metrics import PAGES_SCRAPED, scrape_scope
+from storage.watermarks import HeadMatcher
+from scraping.waits import first_element, wait_for_elements, wait_for_page_ready, wait_for_replacement
+
+REVIEW_SELECTOR = "div.ZmyHeo"
+NEXT_PAGE_SELECTOR = "a._9QVEpD"
+TOTAL_PAGES_RE = re.compile(r'Page\s+\d+\s+of\s+([\d,]+)')
 
 
 # Function to navigate to the product page
 def open_product_page(driver, url):
     driver.get(url)
-    time.sleep(3)
+    wait_for_page_ready(driver)
 
 
 # Function to find and click "All Reviews" button
@@ -48,7 +35,8 @@ def click_all_reviews(driver):
             EC.element_to_be_clickable((By.CSS_SELECTOR, "div._23J90q.RcXBOT"))
         )
         button.click()
-        time.sleep(3)
+        # Wait for the first page of reviews to render
+        wait_for_elements(driver, REVIEW_SELECTOR)
         return True
     except Exception as e:
         print(f"Error clicking 'All Reviews' button: {e}")
@@ -66,33 +54,70 @@ def clean_review_text(text):
 # Function to extract only review text
 def extract_reviews(driver):
     """Scrape only review text from the current page and remove READ MORE"""
-    reviews = []
+    return parse_reviews(driver.page_source)
 
-    # Get page source and parse with BeautifulSoup
-    soup = BeautifulSoup(driver.page_source, "html.parser")
 
-    # Find all review elements
-    review_elements = soup.select("div.ZmyHeo")
+def parse_reviews(html):
+    """Review text from review page HTML, with READ MORE removed"""
+    reviews = []
+
+    # Parse only the review elements
+    review_elements = extract(html, REVIEW_SELECTOR, {"text": "div div"})
 
     if not review_elements:
         print("No reviews found on the page.")
         return []
 
     for review in review_elements:
-        try:
-            # Extract only review text
-            review_text = review.select_one("div div").text.strip()
-            if review_text:  # Only add non-empty reviews
-                # Clean the review text by removing READ MORE
-                cleaned_text = clean_review_text(review_text)
-                reviews.append({"Review": cleaned_text})
-        except Exception as e:
-            print(f"Error extracting review: {e}")
-            continue
+        # Extract only review text
+        review_text = review["text"]
+        if review_text:  # Only add non-empty reviews
+            # Clean the review text by removing READ MORE
+            cleaned_text = clean_review_text(review_text)
+            reviews.append(ReviewRecord(cleaned_text))
 
     return reviews
 
 
+def parse_review_page(html):
+    """Parse server-rendered review page HTML, returns (reviews, has_next_page)"""
+    # A disabled Next link gets an extra class, like go_to_next_page checks
+    has_next = any(link["class"] == "_9QVEpD" and link["text"] == "Next"
+                   for link in extract(html, NEXT_PAGE_SELECTOR, {"text": None, "class": "@class"}, strip_pieces=True))
+    return parse_reviews(html), has_next
+
+
+def parse_total_pages(html):
+    """Page count from the "Page 1 of N" pagination label, or None if the page doesn't show one"""
+    match = TOTAL_PAGES_RE.search(html)
+    return int(match.group(1).replace(',', '')) if match else None
+
+
+def has_review_markup(html):
+    """Whether fetched HTML is a rendered review page rather than a bot check or JS shell"""
+    return "ZmyHeo" in html
+
+
+def review_page_url(url, page):
+    """
+    Address of the page-th "All reviews" page for a product URL.
+
+    https://www.flipkart.com/<slug>/p/<item id>?pid=<pid>&... maps to
+    https://www.flipkart.com/<slug>/product-reviews/<item id>?pid=<pid>&sortOrder=MOST_RECENT&page=<page>.
+    Reviews are listed newest first so a re-scrape can stop at the ones it
+    has already seen. Returns None for URLs that aren't product pages.
+    """
+    parts = urlsplit(url)
+    match = re.match(r'^(/[^/]+)/(?:p|product-reviews)/([^/]+)', parts.path)
+    if not match:
+        return None
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k in ('pid', 'lid')]
+    query.append(('sortOrder', 'MOST_RECENT'))
+    query.append(('page', str(page)))
+    return urlunsplit((parts.scheme or 'https', parts.netloc, f"{match.group(1)}/product-reviews/{match.group(2)}",
+                       urlencode(query), ''))
+
+
 # Function to check if next button is available and click it
 def go_to_next_page(driver):
     try:
@@ -106,10 +131,12 @@ def go_to_next_page(driver):
             print("Next button is disabled. Reached end of reviews.")
             return False
 
-        # Scroll and click the next button
+        # Scroll and click the next button, then wait for the current page
+        # of reviews to be replaced by the next one
+        current_review = first_element(driver, REVIEW_SELECTOR)
         driver.execute_script("arguments[0].scrollIntoView();", next_button)
         driver.execute_script("arguments[0].click();", next_button)
-        time.sleep(2)
+        wait_for_replacement(driver, REVIEW_SELECTOR, current_review)
         return True
     except (TimeoutException, NoSuchElementException):
         print("Next button not found or not accessible.")
@@ -117,27 +144,149 @@ def go_to_next_page(driver):
 
 
 # Function to save reviews to CSV
-def save_to_csv(all_reviews, filename_prefix="reviews"):
+def save_to_csv(all_reviews, filename_prefix="reviews", stamp=None, append=False):
+    """Queue the reviews for the background CSV sink, returns the file they are written to"""
     if all_reviews:
-        # Ensure the data directory exists
-        os.makedirs('./data', exist_ok=True)
-
-        # Generate unique filename with date and time
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"./data/{filename_prefix}_{timestamp}.csv"
-
-        # Save to CSV
-        df = pd.DataFrame(all_reviews)
-        df.to_csv(filename, index=False, encoding="utf-8")
-        
-        print(f"All {len(all_reviews)} reviews saved to {filename}")
+        filename = get_csv_sink().write(data_path(filename_prefix, stamp),
+                                        [{"Review": review.text} for review in all_reviews], ["Review"], append)
+        if filename:
+            print(f"{len(all_reviews)} reviews queued for {filename}")
         return filename
     else:
         print("No reviews found to save.")
 
 
+def save_reviews(result, stamp=None, append=False):
+    """
+    Queue a ScrapeResult's reviews for the CSV sink, returns the file they are written to.
+
+    A streamed scrape calls this once per page with the same stamp and append=True.
+    """
+    return save_to_csv(result.reviews, stamp=stamp, append=append)
+
+
+def save_result(result):
+    """Queue a ScrapeResult's reviews for the CSV sink, returns the file they are written to"""
+    return save_reviews(result)
+
+
+def stream_product(url, max_pages=None, empty_page_limit=3, max_parallel=DEFAULT_MAX_PARALLEL, matcher=None):
+    """
+    Yield ('reviews', page) for each page of Flipkart reviews as soon as it is parsed.
+
+    page is a list of ReviewRecords. Flipkart review pages carry no
+    product details, so unlike the other scrapers no ('product', details)
+    event is yielded.
+
+    Review pages of product URLs are addressed directly (page=N) and fetched
+    through the shared Fetcher, over HTTP when the server-rendered HTML has
+    the reviews and in Chrome otherwise. Up to max_parallel of those pages
+    are fetched at once and yielded in page order. Other URLs are walked in
+    a pooled browser by clicking "All reviews" and "Next".
+
+    Runs of reviews repeated at the start of a page because new ones pushed
+    them down while the pages were being fetched are dropped.
+
+    With a storage.watermarks.HeadMatcher, only reviews newer than the ones
+    the last scrape saw first are yielded, and pagination stops once those
+    are reached. That needs the newest-first order of review page URLs, so
+    the matcher is ignored when the reviews are walked in the browser.
+    """
+    if review_page_url(url, 1):
+        pages = iter_review_pages_by_url(url, max_pages, max_parallel)
+    else:
+        pages = iter_review_pages_in_browser(url)
+        matcher = None
+
+    empty_page_count = 0
+    previous = []
+    # closing() hands a borrowed browser back as soon as we stop early
+    with closing(pages):
+        for page_count, reviews in enumerate(pages, 1):
+            if reviews:
+                empty_page_count = 0  # Reset empty page counter
+                fresh = drop_page_overlap(previous, reviews)
+                if len(fresh) < len(reviews):
+                    print(f"Dropped {len(reviews) - len(fresh)} reviews repeated from page {page_count - 1}")
+                previous = reviews
+                if matcher:
+                    fresh = matcher.feed(fresh)
+                print(f"Found {len(fresh)} reviews on page {page_count}")
+                yield 'reviews', fresh
+                if matcher and matcher.reached:
+                    print("Reached reviews seen by the last scrape. Stopping.")
+                    break
+            else:
+                empty_page_count += 1
+                print(f"No reviews found on page {page_count}. Empty page count: {empty_page_count}")
+                if empty_page_count >= empty_page_limit:
+                    print(f"Reached {empty_page_limit} consecutive empty pages. Stopping.")
+                    break
+
+            # Stop if reached max_pages
+            if max_pages and page_count >= max_pages:
+                print(f"Reached maximum page limit ({max_pages})")
+                break
+
+    # Reviews held back because they looked like the start of the known ones
+    held_back = matcher.flush() if matcher else []
+    if held_back:
+        yield 'reviews', held_back
+
+
+def iter_review_pages_by_url(url, max_pages=None, max_parallel=DEFAULT_MAX_PARALLEL):
+    """
+    Fetch review pages 1, 2, ... by URL until there is no Next link, yielding each page's reviews.
+
+    Page 1 is fetched on its own to read the page count; the rest are fetched
+    max_parallel at a time. When the count isn't shown, pages are fetched
+    ahead speculatively and the ones past the last page are discarded.
+    """
+    fetcher = get_fetcher()
+
+    def fetch_page(page_number):
+        page = fetcher.fetch('flipkart', 'reviews', review_page_url(url, page_number),
+                             is_ready=has_review_markup, ready_selector=REVIEW_SELECTOR)
+        print(f"Scraping page {page_number} (via {page.backend})...")
+        reviews, has_next = parse_review_page(page.html)
+        return reviews, has_next, parse_total_pages(page.html)
+
+    reviews, has_next, total_pages = fetch_page(1)
+    yield reviews
+
+    limits = [n - 1 for n in (total_pages, max_pages) if n]
+    pages = iter_pages_concurrently(fetch_page, start=2, total_pages=min(limits) if limits else None,
+                                    max_parallel=max_parallel, is_last=lambda page: not page[1])
+    with closing(pages):
+        while has_next:
+            try:
+                reviews, has_next, _ = next(pages)
+            except StopIteration:
+                return
+            yield reviews
+    print("No Next link. Reached end of reviews.")
+
+
+def iter_review_pages_in_browser(url):
+    """Open the product page in a pooled browser and click through its review pages"""
+    with get_pool().borrow() as driver:
+        print(f"Opening product page: {url}")
+        open_product_page(driver, url)
+
+        if not click_all_reviews(driver):
+            print("Could not open reviews page.")
+            return
+
+        while True:
+            yield extract_reviews(driver)
+            # Try to go to next page
+            if not go_to_next_page(driver):
+                return
+
+
 # Main function
-def scrape_flipkart_reviews(url, max_pages=None, empty_page_limit=3):
+def scrape_flipkart_reviews(url, max_pages=None, empty_page_limit=3, progress=None,
+                            max_parallel=DEFAULT_MAX_PARALLEL, known_head=None):
     """
     Scrape Flipkart reviews
 
@@ -145,58 +294,38 @@ def scrape_flipkart_reviews(url, max_pages=None, empty_page_limit=3):
     url (str): URL of the product page
     max_pages (int, optional): Maximum number of pages to scrape
     empty_page_limit (int): Stop after this many consecutive empty pages
+    progress (callable, optional): Called as progress(pages_done, reviews_so_far) after each page
+    max_parallel (int): Review pages fetched at once when they can be addressed by URL
+    known_head (list, optional): Watermark head from the last scrape; stop once those reviews are reached
+
+    Returns a ScrapeResult, or None if the scrape failed. result.incremental
+    tells whether it stopped at the known reviews.
     """
-    driver = setup_driver()
-    all_reviews = []
-    page_count = 1
-    empty_page_count = 0
+    result = ScrapeResult('flipkart', url)
+    matcher = HeadMatcher(known_head) if known_head else None
 
     try:
-        print(f"Opening product page: {url}")
-        open_product_page(driver, url)
-
-        if click_all_reviews(driver):
-            continue_scraping = True
-
-            while continue_scraping:
-                print(f"Scraping page {page_count}...")
-                reviews = extract_reviews(driver)
-
-                if reviews:
-                    all_reviews.extend(reviews)
-                    empty_page_count = 0  # Reset empty page counter
-                    print(f"Found {len(reviews)} reviews on page {page_count}")
-                    print(f"Total reviews collected: {len(all_reviews)}")
-                else:
-                    empty_page_count += 1
-                    print(f"No reviews found on page {page_count}. Empty page count: {empty_page_count}")
-                    if empty_page_count >= empty_page_limit:
-                        print(f"Reached {empty_page_limit} consecutive empty pages. Stopping.")
-                        break
-
-                # Stop if reached max_pages
-                if max_pages and page_count >= max_pages:
-                    print(f"Reached maximum page limit ({max_pages})")
-                    break
-
-                # Try to go to next page
-                continue_scraping = go_to_next_page(driver)
-                page_count += 1
-
-            # Save all collected reviews
-            filename = save_to_csv(all_reviews)
-            print(f"Completed scraping {len(all_reviews)} reviews from {page_count - 1} pages")
-            return filename
-        else:
-            print("Could not open reviews page.")
+        with scrape_scope('flipkart'):
+            for _, reviews in stream_product(url, max_pages, empty_page_limit, max_parallel, matcher):
+                result.reviews.extend(reviews)
+                result.pages += 1
+                PAGES_SCRAPED.inc(platform='flipkart')
+                print(f"Total reviews collected: {len(result.reviews)}")
+                if progress:
+                    progress(result.pages, len(result.reviews))
+
+        result.incremental = bool(matcher and matcher.reached)
+
+        # Save all collected reviews
+        result.csv_file = save_result(result)
+        print(f"Completed scraping {len(result.reviews)} reviews from {result.pages} pages")
+        return result
     except Exception as e:
         print(f"An error occurred: {e}")
         # Save whatever reviews were collected
-        if all_reviews:
-            save_to_csv(all_reviews, f"partial_reviews_{int(time.time())}.csv")
+        if result.reviews:
+            save_to_csv(result.reviews, f"partial_reviews_{int(time.time())}")
             print("Saved partial results due to error")
-    finally:
-        driver.quit()
 
 
 # Example usage
@@ -1,59 +1,41 @@
-import time
-import csv
-import pandas as pd
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import os
+
+from scraping.driver_pool import get_pool
+from scraping.parsing import extract
+from scraping.records import ReviewRecord, collect
+from scraping.sinks import data_path, file_stamp, get_csv_sink
+from scraping.waits import first_element, wait_for_count_change, wait_for_elements, wait_for_replacement
+from service.metrics import scrape_scope, span
+
+REVIEW_SELECTOR = ".tt-c-review"
+EXPAND_SELECTOR = "button.tt-c-review__text-expand"
+TITLE_SELECTOR = "h1[data-testid='product_title']"
 
 def get_text_or_empty(soup_element):
     return soup_element.text.strip() if soup_element else ""
 
-def scrape_nike_product(url):
-    """
-    Scrape Nike product details and reviews, save to CSV, and return the review CSV filename.
-    """
-    # Step 1: Setup headless Chrome browser
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("start-maximized")
-    options.add_argument("--no-sandbox")
-    driver = webdriver.Chrome(options=options)
+def open_reviews(driver):
+    """Open the full review list on a loaded product page, returns the number of review pages"""
     wait = WebDriverWait(driver, 10)
-    driver.get(url)
-    time.sleep(5)  # Allow time for the page to load
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-    # Extract product details
-    title = get_text_or_empty(soup.find('h1', {'data-testid': 'product_title'}))
-    subtitle = get_text_or_empty(soup.find('h2', {'data-testid': 'product_subtitle'}))
-    image_url = soup.find('img', {'data-testid': 'HeroImg'})['src'] if soup.find('img', {'data-testid': 'HeroImg'}) else ""
-    price = get_text_or_empty(soup.find('span', {'data-testid': 'currentPrice-container'}))
-    description = get_text_or_empty(soup.find('p', {'data-testid': 'product-description'}))
-    benefits_list = soup.find_all('ul', {'data-testid': 'benefit-list'})
-    benefits = [li.text.strip() for li in benefits_list[0].find_all('li')] if len(benefits_list) >= 1 else []
-    product_details = [li.text.strip() for li in benefits_list[1].find_all('li')] if len(benefits_list) >= 2 else []
-
-    # Step 2: Click the Reviews dropdown
+
+    # Click the Reviews dropdown
     try:
         summary = wait.until(EC.element_to_be_clickable((By.XPATH, "//summary[.//h4[contains(text(),'Reviews')]]")))
         driver.execute_script("arguments[0].click();", summary)
-        time.sleep(2)
     except Exception as e:
         print("Error opening reviews dropdown:", str(e))
 
-    # Step 3: Click "More Reviews" button
+    # Click "More Reviews" button
     try:
         more_reviews = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-testid='more-reviews-button']")))
         driver.execute_script("arguments[0].click();", more_reviews)
-        time.sleep(3)
     except Exception as e:
         print("Error opening full review page:", str(e))
 
-    # Step 4: Get total number of reviews
+    # Get total number of reviews
     try:
         review_count_elem = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".tt-c-reviews-summary__heading")))
         total_reviews = int(review_count_elem.text.strip().split()[0])
@@ -63,67 +45,136 @@ def scrape_nike_product(url):
         total_reviews = 0
 
     # Calculate total pages
-    total_pages = 1 if total_reviews <= 10 else 1 + ((total_reviews - 10 + 19) // 20)
+    return 1 if total_reviews <= 10 else 1 + ((total_reviews - 10 + 19) // 20)
 
-    # Step 5: Scrape reviews
-    titles = []
-    texts = []
+def click_next_page(driver):
+    """Click the review list's next button and wait for the page to change, returns False if it couldn't"""
+    try:
+        next_btn = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button.tt-o-pagination__next")))
+        current_review = first_element(driver, REVIEW_SELECTOR)
+        driver.execute_script("arguments[0].click();", next_btn)
+        wait_for_replacement(driver, REVIEW_SELECTOR, current_review)
+        return True
+    except Exception as e:
+        print(f"Error navigating to next page: {e}")
+        return False
+
+def iter_review_pages(driver, total_pages):
+    """Yield the reviews of each of the review list's total_pages pages, starting from the first"""
+    wait = WebDriverWait(driver, 10)
     for page in range(total_pages):
         print(f"Scraping page {page + 1} of {total_pages}")
         try:
-            wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".tt-c-review")))
-            time.sleep(1)
-            # Click all "Read More" buttons
-            for btn in driver.find_elements(By.CSS_SELECTOR, "button.tt-c-review__text-expand"):
+            wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, REVIEW_SELECTOR)))
+            # Click all "Read More" buttons, then wait briefly for them to be replaced
+            expand_buttons = driver.find_elements(By.CSS_SELECTOR, EXPAND_SELECTOR)
+            for btn in expand_buttons:
                 try:
                     driver.execute_script("arguments[0].click();", btn)
-                    time.sleep(0.3)
                 except:
                     pass
+            if expand_buttons:
+                wait_for_count_change(driver, EXPAND_SELECTOR, len(expand_buttons), timeout=1)
             # Re-parse page content
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            review_blocks = soup.select(".tt-c-review")
-            for block in review_blocks:
-                review_title = get_text_or_empty(block.select_one("div.tt-c-review__heading-text"))
-                text = get_text_or_empty(block.select_one("span.tt-c-review__text-content"))
+            blocks = extract(driver.page_source, REVIEW_SELECTOR, {
+                'title': "div.tt-c-review__heading-text",
+                'text': "span.tt-c-review__text-content",
+            })
+            reviews = []
+            for block in blocks:
+                review_title = block['title'] or ""
+                text = block['text'] or ""
                 if text:
-                    titles.append(review_title if review_title else "No Title")
-                    texts.append(text)
+                    reviews.append(ReviewRecord(text, review_title if review_title else "No Title"))
         except Exception as e:
             print("Error scraping page:", str(e))
             continue
+        yield reviews
         # Click next page
-        if page < total_pages - 1:
-            try:
-                next_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button.tt-o-pagination__next")))
-                driver.execute_script("arguments[0].click();", next_btn)
-                time.sleep(3)
-            except Exception as e:
-                print(f"Error navigating to next page: {e}")
-                break
-    driver.quit()
-
-    # Store product details in DataFrame
-    df_product = pd.DataFrame({
-        "product_title": [title],
-        "subtitle": [subtitle],
-        "image_url": [image_url],
-        "price": [price],
-        "description": [description],
-        "benefits": ['; '.join(benefits)],
-        "product_details": ['; '.join(product_details)],
-        "total_reviews": [len(titles)]
-    })
-    df_reviews = pd.DataFrame({"review_title": titles, "review_text": texts})
-
-    # Save to CSV in ./data directory
-    os.makedirs('./data', exist_ok=True)
-    from datetime import datetime
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    product_filename = f"./data/nike_product_details_{timestamp}.csv"
-    reviews_filename = f"./data/nike_product_reviews_{timestamp}.csv"
-    df_product.to_csv(product_filename, index=False)
-    df_reviews.to_csv(reviews_filename, index=False)
-    print(f"✅ Product details saved to {product_filename}")
-    print(f"✅ {len(titles)} reviews saved to {reviews_filename}")
-    return reviews_filename
+        if page < total_pages - 1 and not click_next_page(driver):
+            print(f"Stopping after page {page + 1} of {total_pages}, the next page didn't load")
+            break
+
+def stream_product(url):
+    """
+    Yield ('product', details) once, then ('reviews', page) for each page of reviews.
+
+    The browser is borrowed from the shared pool while the generator runs and
+    returned when it finishes or is closed. The review list can only be
+    paged with its next button, so the pages are read one after another in
+    that browser; a second browser would have to click through every
+    earlier page to reach its share, which takes as long as reading them.
+    """
+    # Step 1: Borrow a warm headless Chrome browser from the shared pool
+    with get_pool().borrow() as driver:
+        with span('product_details'):
+            driver.get(url)
+            wait_for_elements(driver, TITLE_SELECTOR)  # Allow time for the page to load
+            soup = BeautifulSoup(driver.page_source, 'html.parser')
+
+            # Extract product details
+            benefits_list = soup.find_all('ul', {'data-testid': 'benefit-list'})
+            product = {
+                'product_title': get_text_or_empty(soup.find('h1', {'data-testid': 'product_title'})),
+                'subtitle': get_text_or_empty(soup.find('h2', {'data-testid': 'product_subtitle'})),
+                'image_url': soup.find('img', {'data-testid': 'HeroImg'})['src'] if soup.find('img', {'data-testid': 'HeroImg'}) else "",
+                'price': get_text_or_empty(soup.find('span', {'data-testid': 'currentPrice-container'})),
+                'description': get_text_or_empty(soup.find('p', {'data-testid': 'product-description'})),
+                'benefits': [li.text.strip() for li in benefits_list[0].find_all('li')] if len(benefits_list) >= 1 else [],
+                'product_details': [li.text.strip() for li in benefits_list[1].find_all('li')] if len(benefits_list) >= 2 else [],
+            }
+        yield 'product', product
+
+        # Step 2: Open the full review list and work out how many pages it has
+        total_pages = open_reviews(driver)
+
+        # Step 3: Scrape the review pages
+        for reviews in iter_review_pages(driver, total_pages):
+            yield 'reviews', reviews
+
+def scrape_nike_product(url, progress=None):
+    """
+    Scrape Nike product details and reviews and return them as a ScrapeResult.
+    The product details and reviews are also queued for CSV output; result.csv_file is the review CSV.
+    progress, if given, is called as progress(pages_done, reviews_so_far) after each review page.
+    """
+    with scrape_scope('nike'):
+        result = collect('nike', url, stream_product(url), progress)
+    result.csv_file = save_result(result)
+    return result
+
+def save_result(result):
+    """Queue a ScrapeResult's product details and reviews for CSV output, returns the review CSV"""
+    timestamp = file_stamp()
+    save_product(result, timestamp)
+    return save_reviews(result, timestamp)
+
+def save_product(result, stamp=None):
+    """Queue the product details CSV, returns its path"""
+    product = result.product
+    product_filename = get_csv_sink().write(data_path("nike_product_details", stamp), [{
+        "product_title": product['product_title'],
+        "subtitle": product['subtitle'],
+        "image_url": product['image_url'],
+        "price": product['price'],
+        "description": product['description'],
+        "benefits": '; '.join(product['benefits']),
+        "product_details": '; '.join(product['product_details']),
+        "total_reviews": result.review_count
+    }], ["product_title", "subtitle", "image_url", "price", "description", "benefits", "product_details", "total_reviews"])
+    if product_filename:
+        print(f"✅ Product details queued for {product_filename}")
+    return product_filename
+
+def save_reviews(result, stamp=None, append=False):
+    """
+    Queue a ScrapeResult's reviews for the review CSV, returns its path.
+
+    A streamed scrape calls this once per page with the same stamp and append=True.
+    """
+    csv_file = get_csv_sink().write(data_path("nike_product_reviews", stamp),
+                                    [{"review_title": review.title, "review_text": review.text} for review in result.reviews],
+                                    ["review_title", "review_text"], append)
+    if csv_file:
+        print(f"✅ {len(result.reviews)} reviews queued for {csv_file}")
+    return csv_file
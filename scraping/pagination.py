@@ -0,0 +1,78 @@
+"""
+Fetch paginated reviews concurrently and hand the pages back in order.
+
+iter_pages_concurrently keeps up to max_parallel pages in flight and yields
+them strictly in page order, so callers see the same sequence a serial walk
+would produce. When the page count is unknown it fetches speculatively
+ahead and stops at the first page is_last() marks as the end.
+
+Pages fetched at slightly different moments can overlap when new reviews
+push older ones onto the next page; drop_page_overlap removes the repeated
+run at each page boundary.
+"""
+import contextvars
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from service.profiling import profiled_thread
+
+DEFAULT_MAX_PARALLEL = int(os.environ.get('SCRAPE_MAX_PARALLEL_PAGES', 4))
+
+
+def iter_pages_concurrently(fetch, start=1, total_pages=None, max_parallel=DEFAULT_MAX_PARALLEL, is_last=None):
+    """
+    Yield fetch(n) for n = start, start + 1, ... in order, fetching up to max_parallel at once.
+
+    With total_pages, exactly pages start..start + total_pages - 1 are
+    fetched. Without it, fetching continues until a result for which
+    is_last(result) is true; pages already requested beyond it are dropped.
+    Closing the generator early cancels pages that haven't started.
+    """
+    end = start + total_pages if total_pages is not None else None
+    executor = ThreadPoolExecutor(max_workers=max(1, max_parallel), thread_name_prefix='page-fetch')
+    pending = deque()
+    next_page = start
+
+    def submit_more():
+        nonlocal next_page
+        while len(pending) < max_parallel and (end is None or next_page < end):
+            # In the caller's context, so the page's metrics keep the scrape's platform
+            # and a profiled request samples the fetch
+            pending.append(executor.submit(contextvars.copy_context().run, _fetch_page, fetch, next_page))
+            next_page += 1
+
+    try:
+        submit_more()
+        while pending:
+            result = pending.popleft().result()
+            yield result
+            if is_last and is_last(result):
+                return
+            submit_more()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _fetch_page(fetch, page):
+    with profiled_thread():
+        return fetch(page)
+
+
+def drop_page_overlap(previous, current, key=lambda item: item, min_run=2):
+    """
+    Remove from the start of current the longest run that repeats the end of previous.
+
+    Only the boundary is compared, so reviews that merely share text with an
+    earlier one elsewhere (common for short reviews like "Good product") are kept.
+    Runs shorter than min_run are kept too: a page ending in "Good" followed
+    by one starting with a different "Good" is far more likely than a single
+    review pushed across the boundary.
+    """
+    previous_keys = [key(item) for item in previous]
+    current_keys = [key(item) for item in current]
+    for size in range(min(len(previous_keys), len(current_keys)), max(min_run, 1) - 1, -1):
+        if previous_keys[-size:] == current_keys[:size]:
+            return current[size:]
+    return current
+
@@ -0,0 +1,183 @@
+"""
+Review extraction from page HTML with a pluggable parser backend.
+
+The scrapers only need a few fields out of each review container, but a
+review page is mostly navigation, product carousels and scripts. extract()
+parses just the container subtrees (SoupStrainer for BeautifulSoup,
+a CSS query for selectolax) with a C-backed parser:
+
+    'lxml'         BeautifulSoup on lxml (default when lxml is installed)
+    'html.parser'  BeautifulSoup on the pure-Python parser the scrapers used before
+    'selectolax'   selectolax's HTMLParser, optional
+
+HTML_PARSER picks the backend for the process. For infinite-scroll pages,
+IncrementalExtractor asks the browser for only the containers added since
+the last batch instead of re-reading the whole, ever-growing page_source.
+"""
+import os
+import re
+import threading
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from service.metrics import span
+
+# "tag.class" selectors can be turned into a SoupStrainer; anything more
+# complex is parsed in full and matched with select()
+SIMPLE_SELECTOR_RE = re.compile(r'^([a-zA-Z][\w-]*)?\.([\w-]+)$')
+
+# Review containers from index arguments[1] on, as outerHTML. Starts over if
+# the page has fewer containers than that (the list was re-rendered).
+NEW_CONTAINERS_JS = """
+const nodes = document.querySelectorAll(arguments[0]);
+const start = nodes.length < arguments[1] ? 0 : arguments[1];
+return [nodes.length, Array.from(nodes).slice(start).map(node => node.outerHTML)];
+"""
+
+
+def _strainer(selector):
+    match = SIMPLE_SELECTOR_RE.match(selector)
+    if not match:
+        return None
+    return SoupStrainer(match.group(1) or True, class_=match.group(2))
+
+
+class SoupBackend:
+    """BeautifulSoup with the given tree builder ('lxml' or 'html.parser')"""
+
+    def __init__(self, features):
+        self.name = features
+        self.features = features
+
+    def containers(self, html, selector, scoped=True):
+        strainer = _strainer(selector) if scoped else None
+        soup = BeautifulSoup(html, self.features, parse_only=strainer)
+        return soup.select(selector)
+
+    @staticmethod
+    def select_one(node, selector):
+        return node.select_one(selector)
+
+    @staticmethod
+    def text(node, strip_pieces=False):
+        return node.get_text(strip=True) if strip_pieces else node.get_text().strip()
+
+    @staticmethod
+    def attribute(node, name):
+        value = node.get(name)
+        return ' '.join(value) if isinstance(value, list) else value
+
+
+class SelectolaxBackend:
+    """selectolax's HTMLParser; parses the whole document but far faster than either soup"""
+
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.parser import HTMLParser
+        self.parser = HTMLParser
+
+    def containers(self, html, selector, scoped=True):
+        return self.parser(html).css(selector)
+
+    @staticmethod
+    def select_one(node, selector):
+        return node.css_first(selector)
+
+    @staticmethod
+    def text(node, strip_pieces=False):
+        return node.text(strip=True) if strip_pieces else node.text().strip()
+
+    @staticmethod
+    def attribute(node, name):
+        value = node.attributes.get(name)
+        return ' '.join(value.split()) if name == 'class' and value else value
+
+
+BACKENDS = {
+    'lxml': lambda: SoupBackend('lxml'),
+    'html.parser': lambda: SoupBackend('html.parser'),
+    'selectolax': SelectolaxBackend,
+}
+
+
+def default_backend_name():
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name=None):
+    """The named backend, or the process default from HTML_PARSER (lxml if installed)"""
+    name = name or os.environ.get('HTML_PARSER') or default_backend_name()
+    with _backends_lock:
+        if name not in _backends:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown HTML parser {name!r}, expected one of {', '.join(BACKENDS)}")
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
+
+
+def extract(html, container, fields, strip_pieces=False, backend=None, scoped=True):
+    """
+    One dict per element matching the container selector, in page order.
+
+    fields maps a name to what to read from each container:
+        None        the container's own text
+        '@attr'     an attribute of the container (class as a space-joined string)
+        'selector'  the text of the first matching descendant, None if there is none
+
+    Texts are stripped; with strip_pieces every text node is stripped before
+    joining, like BeautifulSoup's get_text(strip=True). scoped=False parses
+    the whole document, which is only useful for comparison.
+    """
+    backend = backend if hasattr(backend, 'containers') else get_backend(backend)
+    items = []
+    with span('parse'):
+        for node in backend.containers(html, container, scoped):
+            item = {}
+            for name, spec in fields.items():
+                if spec is None:
+                    item[name] = backend.text(node, strip_pieces)
+                elif spec.startswith('@'):
+                    item[name] = backend.attribute(node, spec[1:])
+                else:
+                    child = backend.select_one(node, spec)
+                    item[name] = backend.text(child, strip_pieces) if child is not None else None
+            items.append(item)
+    return items
+
+
+def first_text(html, selector, backend=None):
+    """Text of the first element matching a simple selector, or None"""
+    items = extract(html, selector, {'text': None}, backend=backend)
+    return items[0]['text'] if items else None
+
+
+class IncrementalExtractor:
+    """
+    extract() over the containers an infinite-scroll page added since the last call.
+
+    The browser returns only the outerHTML of the new containers, so each
+    batch costs the size of the batch rather than of everything loaded so
+    far. count is how many containers the page had at the last call.
+    """
+
+    def __init__(self, container, fields, strip_pieces=False, backend=None):
+        self.container = container
+        self.fields = fields
+        self.strip_pieces = strip_pieces
+        self.backend = backend
+        self.count = 0
+
+    def new_items(self, driver):
+        self.count, fragments = driver.execute_script(NEW_CONTAINERS_JS, self.container, self.count)
+        if not fragments:
+            return []
+        return extract(''.join(fragments), self.container, self.fields, self.strip_pieces, self.backend)
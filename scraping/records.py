@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+from service.metrics import PAGES_SCRAPED
+
+# One scraped review. title is '' on sites that don't show review titles.
+ReviewRecord = namedtuple('ReviewRecord', ['text', 'title'], defaults=[''])
+
+
+class ScrapeResult:
+    """
+    Everything one scrape produced, kept in memory.
+
+    product is the dict of product details the scraper found (empty for
+    Flipkart), reviews the list of ReviewRecords in page order, pages the
+    number of review pages or batches read, and csv_file the path the CSV
+    sink is writing the reviews to (None when CSV output is disabled).
+    incremental is True when the scrape stopped at reviews a previous scrape
+    had already seen, so reviews holds only the ones newer than those.
+
+    A streamed scrape saves its reviews page by page instead of keeping them;
+    its final ScrapeResult has no reviews and passes review_count instead.
+    """
+
+    def __init__(self, platform, url, product=None, reviews=None, pages=0, csv_file=None, incremental=False,
+                 review_count=None):
+        self.platform = platform
+        self.url = url
+        self.product = product or {}
+        self.reviews = reviews or []
+        self.pages = pages
+        self.csv_file = csv_file
+        self.incremental = incremental
+        self._review_count = review_count
+
+    @property
+    def texts(self):
+        return [review.text for review in self.reviews]
+
+    @property
+    def review_count(self):
+        """Number of reviews scraped, len(reviews) unless they were saved page by page"""
+        return len(self.reviews) if self._review_count is None else self._review_count
+
+
+def collect(platform, url, events, progress=None):
+    """
+    Drain a scraper's stream_product() events into a ScrapeResult.
+
+    progress, if given, is called as progress(pages_done, reviews_so_far)
+    after each page of reviews.
+    """
+    result = ScrapeResult(platform, url)
+    for kind, data in events:
+        if kind == 'product':
+            result.product = data
+            continue
+        result.reviews.extend(data)
+        result.pages += 1
+        PAGES_SCRAPED.inc(platform=platform)
+        if progress:
+            progress(result.pages, len(result.reviews))
+    return result
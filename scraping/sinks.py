@@ -0,0 +1,103 @@
+import atexit
+import csv
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+
+DATA_DIR = './data'
+
+
+def file_stamp():
+    """
+    Timestamp plus a random suffix for CSV names, e.g. 2025-01-31_12-00-00_3f9c2a1b.
+
+    Jobs and batch scrapes run side by side, so two scrapes of one platform
+    can finish within the same second; the suffix keeps their files apart.
+    """
+    return f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def data_path(prefix, timestamp=None):
+    """Stamped CSV path under ./data, e.g. ./data/reviews_2025-01-31_12-00-00_3f9c2a1b.csv"""
+    return f"{DATA_DIR}/{prefix}_{timestamp or file_stamp()}.csv"
+
+
+class CsvSink:
+    """
+    Writes scrape results to CSV files on a background thread.
+
+    write() only queues the rows and returns the path they will be written
+    to, so scrapers and API requests never wait on serialization or disk.
+    With append=True the rows are added to the end of the file (which gets
+    the header if it is new), so a streamed scrape can save page by page.
+    When disabled, write() drops the rows and returns None.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.written = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='csv-sink', daemon=True)
+                self._thread.start()
+
+    def write(self, path, rows, fieldnames, append=False):
+        """Queue rows (a list of dicts) to be written to path with the given columns"""
+        if not self.enabled:
+            return None
+        self._ensure_started()
+        self._queue.put((path, rows, fieldnames, append))
+        return path
+
+    def _run(self):
+        while True:
+            path, rows, fieldnames, append = self._queue.get()
+            try:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                with open(path, 'a' if append else 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                    if f.tell() == 0:
+                        writer.writeheader()
+                    writer.writerows(rows)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Error writing {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued file has been written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'pending': self._queue.qsize(),
+            'written': self.written,
+            'failed': self.failed,
+        }
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_csv_sink():
+    """Process-wide CSV sink; SCRAPE_CSV=0 turns CSV output off"""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = CsvSink(enabled=os.environ.get('SCRAPE_CSV', '1') != '0')
+            # Finish pending writes before the interpreter exits
+            atexit.register(_sink.flush)
+        return _sink
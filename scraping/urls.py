@@ -0,0 +1,54 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track how the user reached the page. Flipkart
+# adds most of these to every product link; utm_* and click ids come from ads.
+TRACKING_PARAMS = {
+    'otracker', 'otracker1', 'ssid', 'iid', 'lid', 'srno', 'fm', 'ppt', 'ppn',
+    'marketplace', 'store', 'qH', 'spotlightTagId', 'gclid', 'fbclid',
+}
+TRACKING_PREFIXES = ('utm_', 'otracker')
+
+
+def is_tracking_param(name):
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """
+    Reduce a product URL to a stable cache key.
+
+    Lowercases the scheme and host, drops the fragment, a trailing slash and
+    tracking parameters, and sorts the remaining query parameters, so
+    https://www.flipkart.com/x/p/itm1?pid=A&otracker=search&ssid=123 and
+    https://www.flipkart.com/x/p/itm1?ssid=456&pid=A map to the same key.
+    """
+    parts = urlsplit(url.strip())
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not is_tracking_param(k))
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+# Same domain checks as detectPlatform() in static/index.js
+PLATFORM_DOMAINS = [
+    ('flipkart.com', 'flipkart'),
+    ('dell.com', 'dell'),
+    ('nykaa.com', 'nykaa'),
+    ('nike.com', 'nike'),
+    ('myntra.com', 'myntra'),
+]
+
+
+def detect_platform(url, default='flipkart'):
+    """Guess the platform of a product URL from its domain"""
+    for domain, platform in PLATFORM_DOMAINS:
+        if domain in url:
+            return platform
+    return default
+
+
+def is_platform_url(url, platform):
+    """True if url is on one of platform's domains (or their subdomains)"""
+    host = (urlsplit(url.strip()).hostname or '').lower()
+    return any(host == domain or host.endswith('.' + domain)
+               for domain, name in PLATFORM_DOMAINS if name == platform)
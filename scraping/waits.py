@@ -0,0 +1,89 @@
+"""
+Event-driven readiness waits used by the scrapers instead of fixed sleeps.
+
+Every helper polls a DOM condition and returns as soon as it holds, or gives
+up after a bounded timeout. They never raise on timeout: a page that is slow
+to change is treated the same way a fixed sleep treated it, and the scraper
+carries on with whatever is on the page.
+"""
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+DEFAULT_TIMEOUT = 10
+POLL_FREQUENCY = 0.1
+
+
+def _wait(driver, condition, timeout):
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+    except TimeoutException:
+        return None
+
+
+def wait_for_page_ready(driver, timeout=DEFAULT_TIMEOUT):
+    """Wait until document.readyState is 'complete'"""
+    return _wait(driver, lambda d: d.execute_script("return document.readyState") == "complete", timeout) is not None
+
+
+def count_elements(driver, css_selector):
+    return len(driver.find_elements(By.CSS_SELECTOR, css_selector))
+
+
+def wait_for_elements(driver, css_selector, timeout=DEFAULT_TIMEOUT, min_count=1):
+    """Wait until at least min_count elements match css_selector, returns the count"""
+    def enough(d):
+        count = count_elements(d, css_selector)
+        return count if count >= min_count else False
+    return _wait(driver, enough, timeout) or count_elements(driver, css_selector)
+
+
+def wait_for_count_change(driver, css_selector, previous_count, timeout=DEFAULT_TIMEOUT):
+    """Wait until the number of matching elements differs from previous_count, returns the new count"""
+    def changed(d):
+        count = count_elements(d, css_selector)
+        # Return a truthy value even when the count drops to 0
+        return (count,) if count != previous_count else False
+    result = _wait(driver, changed, timeout)
+    return result[0] if result else previous_count
+
+
+def wait_for_staleness(driver, element, timeout=DEFAULT_TIMEOUT):
+    """Wait until element is detached from the DOM (e.g. the old page of reviews was replaced)"""
+    if element is None:
+        return False
+    return _wait(driver, EC.staleness_of(element), timeout) is not None
+
+
+def first_element(driver, css_selector):
+    """First element matching css_selector or None, handy as a staleness marker"""
+    elements = driver.find_elements(By.CSS_SELECTOR, css_selector)
+    return elements[0] if elements else None
+
+
+def wait_for_replacement(driver, css_selector, old_element, timeout=DEFAULT_TIMEOUT):
+    """
+    Wait for a page of content to be swapped out after clicking pagination.
+
+    Waits for old_element to go stale and then for fresh css_selector matches
+    to render. Returns True if the content was replaced within timeout.
+    """
+    if not wait_for_staleness(driver, old_element, timeout):
+        return False
+    return wait_for_elements(driver, css_selector, timeout) > 0
+
+
+def page_height(driver):
+    return driver.execute_script("return document.body.scrollHeight")
+
+
+def wait_for_scroll_growth(driver, previous_height, timeout=DEFAULT_TIMEOUT):
+    """Wait until the page grows past previous_height (lazy-loaded content), returns the new height"""
+    def grown(d):
+        try:
+            height = page_height(d)
+        except WebDriverException:
+            return False
+        return height if height > previous_height else False
+    return _wait(driver, grown, timeout) or previous_height
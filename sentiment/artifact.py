@@ -0,0 +1,172 @@
+"""
+Compact, memory-mapped form of the sentiment model and vectorizer.
+
+joblib.load on models/vectorizer.pkl rebuilds the CountVectorizer's
+vocabulary_ dict (one Python str and int per term) in every process that
+loads it, and unpickling the model imports scikit-learn. An artifact
+directory holds the same model as plain NumPy files instead:
+
+    vocabulary.npy        terms as UTF-8 bytes, sorted, for binary search
+    columns.npy           the feature column of each sorted term
+    feature_log_prob.npy  MultinomialNB.feature_log_prob_, (classes, features)
+    class_log_prior.npy   MultinomialNB.class_log_prior_
+    manifest.json         classes, tokenizer settings and the fingerprint of
+                          the pickles it was exported from; written last
+
+load_artifact opens the arrays with mmap_mode='r', so loading is a few
+file opens, and the pages come from the OS page cache, shared by every
+worker that maps the same files. The returned ArtifactVectorizer and
+ArtifactModel have the transform / predict / predict_proba / classes_
+methods predict_sentiments and predict_probabilities use, and give the
+same labels as the pickled pair.
+
+Export after training:
+    python -m training_scripts.scripts_export_artifact
+"""
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+DEFAULT_ARTIFACT_DIR = 'models/artifact'
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+
+ARRAYS = ('vocabulary', 'columns', 'feature_log_prob', 'class_log_prior')
+
+# CountVectorizer settings the artifact's tokenizer reproduces; any other
+# value changes tokenization and can't be exported
+SUPPORTED_VECTORIZER_PARAMS = {
+    'analyzer': 'word', 'binary': False, 'ngram_range': (1, 1), 'preprocessor': None,
+    'stop_words': None, 'strip_accents': None, 'tokenizer': None,
+}
+
+
+def export_artifact(model, vectorizer, out_dir=DEFAULT_ARTIFACT_DIR, source_fingerprint=None):
+    """Write a fitted CountVectorizer + MultinomialNB pair to out_dir, returns the manifest"""
+    params = vectorizer.get_params()
+    unsupported = {name: params[name] for name, value in SUPPORTED_VECTORIZER_PARAMS.items()
+                   if params[name] != value}
+    if unsupported:
+        raise ValueError(f"Can't export a CountVectorizer with {unsupported}")
+    if not hasattr(model, 'feature_log_prob_') or not hasattr(model, 'class_log_prior_'):
+        raise ValueError(f"Can't export {type(model).__name__}, expected a fitted MultinomialNB")
+
+    terms = sorted((term.encode('utf-8'), column) for term, column in vectorizer.vocabulary_.items())
+    arrays = {
+        'vocabulary': np.array([term for term, _ in terms], dtype=bytes),
+        'columns': np.array([column for _, column in terms], dtype=np.int32),
+        'feature_log_prob': np.ascontiguousarray(model.feature_log_prob_, dtype=np.float64),
+        'class_log_prior': np.ascontiguousarray(model.class_log_prior_, dtype=np.float64),
+    }
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'classes': model.classes_.tolist(),
+        'n_features': int(model.feature_log_prob_.shape[1]),
+        'lowercase': params['lowercase'],
+        'token_pattern': params['token_pattern'],
+        'source_fingerprint': source_fingerprint,
+        'exported_at': time.time(),
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+    # The manifest goes last and is swapped in whole, so a reader never sees
+    # a new manifest next to arrays that are still being written
+    tmp_path = os.path.join(out_dir, f"{MANIFEST}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST))
+    return manifest
+
+
+def read_manifest(artifact_dir=DEFAULT_ARTIFACT_DIR):
+    with open(os.path.join(artifact_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {manifest.get('format_version')} in {artifact_dir}")
+    return manifest
+
+
+def load_artifact(artifact_dir=DEFAULT_ARTIFACT_DIR, mmap=True):
+    """Return (model, vectorizer) backed by the artifact's arrays, memory-mapped unless mmap=False"""
+    manifest = read_manifest(artifact_dir)
+    mmap_mode = 'r' if mmap else None
+    arrays = {name: np.load(os.path.join(artifact_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+              for name in ARRAYS}
+    vectorizer = ArtifactVectorizer(arrays['vocabulary'], arrays['columns'], manifest['n_features'],
+                                    manifest['token_pattern'], manifest['lowercase'])
+    model = ArtifactModel(np.array(manifest['classes']),
+                          arrays['feature_log_prob'], arrays['class_log_prior'])
+    return model, vectorizer
+
+
+class ArtifactVectorizer:
+    """CountVectorizer.transform over a sorted vocabulary array"""
+
+    def __init__(self, vocabulary, columns, n_features, token_pattern, lowercase=True):
+        self.vocabulary = vocabulary
+        self.columns = columns
+        self.n_features = n_features
+        self.lowercase = lowercase
+        self.token_re = re.compile(token_pattern)
+
+    def tokenize(self, doc):
+        return self.token_re.findall(doc.lower() if self.lowercase else doc)
+
+    def lookup(self, tokens):
+        """
+        Returns (found, columns): a mask of the tokens that are in the
+        vocabulary and the feature columns of those tokens, in token order.
+        """
+        if not tokens or not len(self.vocabulary):
+            return np.zeros(len(tokens), dtype=bool), np.empty(0, dtype=self.columns.dtype)
+        encoded = np.array([token.encode('utf-8') for token in tokens], dtype=bytes)
+        positions = np.searchsorted(self.vocabulary, encoded)
+        # Tokens sorting after the last term can't be in it; check them against any term
+        positions[positions == len(self.vocabulary)] = 0
+        found = self.vocabulary[positions] == encoded
+        return found, self.columns[positions[found]]
+
+    def transform(self, docs):
+        """Term-count matrix of shape (len(docs), n_features), like CountVectorizer.transform"""
+        # SciPy is imported on first use; NBKernel predicts without building this matrix
+        import scipy.sparse as sp
+
+        tokens, doc_ids = [], []
+        for i, doc in enumerate(docs):
+            doc_tokens = self.tokenize(doc)
+            tokens.extend(doc_tokens)
+            doc_ids.extend([i] * len(doc_tokens))
+
+        found, columns = self.lookup(tokens)
+        rows = np.array(doc_ids, dtype=np.int64)[found]
+        counts = sp.csr_matrix((np.ones(len(columns), dtype=np.int64), (rows, columns)),
+                               shape=(len(docs), self.n_features))
+        # Duplicate (row, column) entries are summed into term counts
+        counts.sum_duplicates()
+        return counts
+
+
+class ArtifactModel:
+    """MultinomialNB prediction from its feature_log_prob_ and class_log_prior_ arrays"""
+
+    def __init__(self, classes, feature_log_prob, class_log_prior):
+        self.classes_ = classes
+        self.feature_log_prob_ = feature_log_prob
+        self.class_log_prior_ = class_log_prior
+
+    def joint_log_likelihood(self, X):
+        # The same computation as MultinomialNB._joint_log_likelihood
+        return np.asarray(X @ self.feature_log_prob_.T) + self.class_log_prior_
+
+    def predict(self, X):
+        return self.classes_[self.joint_log_likelihood(X).argmax(axis=1)]
+
+    def predict_proba(self, X):
+        from scipy.special import logsumexp
+        jll = self.joint_log_likelihood(X)
+        return np.exp(jll - logsumexp(jll, axis=1, keepdims=True))
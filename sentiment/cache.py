@@ -0,0 +1,175 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+DEFAULT_DB_PATH = 'cache/predictions.sqlite3'
+
+
+def normalize_text(text):
+    """
+    Normalize a review for cache lookups.
+
+    The vectorizer lowercases and only keeps word tokens, so case and
+    whitespace differences never change a prediction and are folded together.
+    """
+    return ' '.join(text.lower().split())
+
+
+def file_fingerprint(paths):
+    """SHA-1 over the contents of the model files, used as the model version"""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def bytes_fingerprint(blobs):
+    """file_fingerprint of files already read into memory, in the same order"""
+    digest = hashlib.sha1()
+    for blob in blobs:
+        digest.update(blob)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Two-tier cache of predicted labels keyed by hash(model version + normalized text).
+
+    Lookups go to an in-process LRU first and then to a SQLite table on disk
+    that survives restarts and is shared by every process using the same
+    db_path. The model version is the fingerprint of the model that is
+    loaded, set with set_version() whenever it is swapped (see
+    ModelStore.add_listener); then the LRU is cleared and rows for other
+    versions are deleted. Callers pass the version of the model they
+    classified with, so labels from a model that has just been replaced are
+    neither served nor stored.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_memory_items=100000):
+        self.db_path = db_path
+        self.max_memory_items = max_memory_items
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._pid = None
+        self._connection = None
+        self._db  # Create the table up front
+        self.version = None
+
+    @property
+    def _db(self):
+        """
+        This process's SQLite connection.
+
+        A connection must not be used across fork(), so a process forked
+        after the cache was created (e.g. a gunicorn worker of a preloaded
+        app) opens its own on first use.
+        """
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS predictions '
+                                     '(key TEXT PRIMARY KEY, version TEXT NOT NULL, label TEXT NOT NULL)')
+            self._connection.commit()
+            self._pid = os.getpid()
+        return self._connection
+
+    def set_version(self, version):
+        """Switch to the labels of another model version, dropping everyone else's"""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._memory.clear()
+            self._db.execute('DELETE FROM predictions WHERE version != ?', (version,))
+            self._db.commit()
+
+    def _key(self, text):
+        return hashlib.sha1(f"{self.version}\0{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+    def get_many(self, texts, version=None):
+        """
+        Return {text: label} for every text already cached.
+
+        With a version other than the current one (a model that has been
+        swapped out) nothing is found.
+        """
+        found = {}
+        with self._lock:
+            if self.version is None or (version is not None and version != self.version):
+                return found
+            keys = {}
+            for text in texts:
+                if text in found or text in keys:
+                    continue
+                key = self._key(text)
+                label = self._memory.get(key)
+                if label is not None:
+                    self._memory.move_to_end(key)
+                    found[text] = label
+                    self._memory_hits += 1
+                else:
+                    keys[text] = key
+
+            if keys:
+                rows = []
+                key_list = list(keys.values())
+                # Stay under SQLite's default bound-parameter limit
+                for i in range(0, len(key_list), 500):
+                    batch = key_list[i:i + 500]
+                    rows.extend(self._db.execute(
+                        f"SELECT key, label FROM predictions WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall())
+                disk = dict(rows)
+                for text, key in keys.items():
+                    label = disk.get(key)
+                    if label is None:
+                        self._misses += 1
+                        continue
+                    found[text] = label
+                    self._disk_hits += 1
+                    self._remember(key, label)
+        return found
+
+    def put_many(self, items, version=None):
+        """Store (text, label) pairs in both tiers, unless they came from another model version"""
+        with self._lock:
+            if self.version is None or (version is not None and version != self.version):
+                return
+            rows = []
+            for text, label in items:
+                key = self._key(text)
+                self._remember(key, label)
+                rows.append((key, self.version, label))
+            self._db.executemany('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)', rows)
+            self._db.commit()
+
+    def _remember(self, key, label):
+        self._memory[key] = label
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            hits = self._memory_hits + self._disk_hits
+            return {
+                'model_version': self.version,
+                'lookups': lookups,
+                'memory_hits': self._memory_hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_items': len(self._memory),
+            }
@@ -0,0 +1,122 @@
+import numpy as np
+
+from sentiment.nb_kernel import kernel_for
+from sentiment.preprocessing import preprocess_texts
+from service.metrics import REVIEWS_CLASSIFIED, current_platform, span
+
+SENTIMENT_LABELS = ('positive', 'neutral', 'negative')
+
+# Placeholder row the Dell/Nykaa scrapers write when a product has no reviews
+NO_REVIEWS = 'No Reviews'
+
+
+def clean_reviews(reviews):
+    """Drop placeholder rows and empty/NaN cells, coercing the rest to str"""
+    cleaned = []
+    for review in reviews:
+        # None or NaN (NaN != NaN) cells come from pd.read_csv on empty fields
+        if review is None or review != review:
+            continue
+        review = str(review)
+        if review.strip() and review != NO_REVIEWS:
+            cleaned.append(review)
+    return cleaned
+
+
+def predict_labels(texts, model, vectorizer):
+    """
+    model.predict(vectorizer.transform(texts)) for preprocessed texts.
+
+    A MultinomialNB over a CountVectorizer (pickled or from the artifact) is
+    scored by the fused NBKernel instead, with the same labels; it vectorizes
+    as it scores, so its time is all in the 'predict' stage.
+    """
+    kernel = kernel_for(model, vectorizer)
+    if kernel is not None:
+        with span('predict'):
+            return kernel.predict(texts)
+    with span('vectorize'):
+        X = vectorizer.transform(texts)
+    with span('predict'):
+        return model.predict(X)
+
+
+def _preprocess(preprocess, texts):
+    with span('preprocess'):
+        return preprocess(texts)
+
+
+def predict_sentiments(texts, model, vectorizer, preprocess=preprocess_texts, cache=None, version=None):
+    """
+    Classify a list of review texts in one pass.
+
+    All texts are preprocessed in bulk by preprocess (list in, list out), then
+    vectorized and classified in one predict_labels call. Returns a NumPy array of labels in the same
+    order as texts.
+
+    With a PredictionCache, only texts missing from the cache go through the
+    model and their labels are stored for next time. version is the model's
+    (ModelStore.versioned()), so a model that has just been swapped out
+    neither reads nor stores the new model's labels.
+    """
+    if not texts:
+        return np.array([], dtype=object)
+    REVIEWS_CLASSIFIED.inc(len(texts), platform=current_platform())
+    if cache is None:
+        return predict_labels(_preprocess(preprocess, texts), model, vectorizer)
+
+    cached = cache.get_many(texts, version)
+    misses = list(dict.fromkeys(text for text in texts if text not in cached))
+    if misses:
+        labels = predict_labels(_preprocess(preprocess, misses), model, vectorizer).tolist()
+        cache.put_many(zip(misses, labels), version)
+        cached.update(zip(misses, labels))
+    return np.array([cached[text] for text in texts], dtype=object)
+
+
+def predict_probabilities(texts, model, vectorizer, preprocess=preprocess_texts):
+    """
+    Classify a list of review texts and return their class probabilities.
+
+    Like predict_sentiments, texts go through one bulk preprocess, one
+    vectorizer.transform and one model.predict_proba call. Returns
+    (labels, probabilities, classes): labels is a NumPy array in the order
+    of texts, probabilities an array of shape (len(texts), len(classes)) and
+    classes the model's class labels, the column order of probabilities.
+    The labels are the most probable class, the same as model.predict gives.
+    """
+    classes = model.classes_
+    if not texts:
+        return np.array([], dtype=object), np.empty((0, len(classes))), classes
+    REVIEWS_CLASSIFIED.inc(len(texts), platform=current_platform())
+    texts = _preprocess(preprocess, texts)
+    with span('vectorize'):
+        X = vectorizer.transform(texts)
+    with span('predict'):
+        probabilities = model.predict_proba(X)
+    return classes[probabilities.argmax(axis=1)], probabilities, classes
+
+
+def count_sentiments(predictions):
+    """Tally predicted labels into a {'positive', 'neutral', 'negative'} dict of ints"""
+    sentiment_counts = dict.fromkeys(SENTIMENT_LABELS, 0)
+    predictions = np.asarray(predictions)
+    if predictions.size == 0:
+        return sentiment_counts
+
+    labels, counts = np.unique(predictions, return_counts=True)
+    # tolist() gives plain Python str/int so the dict is JSON serializable
+    for label, count in zip(labels.tolist(), counts.tolist()):
+        sentiment_counts[label] = count
+    return sentiment_counts
+
+
+def analyze_reviews(reviews, model, vectorizer, preprocess=preprocess_texts, cache=None, version=None):
+    """
+    Clean, classify and tally a list of scraped reviews.
+
+    Returns (sentiment_counts, total_reviews_analyzed).
+    """
+    texts = clean_reviews(reviews)
+    predictions = predict_sentiments(texts, model, vectorizer, preprocess, cache, version)
+    return count_sentiments(predictions), len(texts)
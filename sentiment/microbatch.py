@@ -0,0 +1,142 @@
+"""
+Dynamic micro-batching for single-review predictions.
+
+Every /predict request used to run its own vectorizer.transform and
+model.predict on a one-row matrix. MicroBatcher queues concurrent requests
+and lets one background thread run them together: it takes the first
+waiting item plus every item already queued behind it (up to max_batch),
+runs them in one call and hands each caller its own result. It only waits
+for more, up to max_wait seconds, when other requests were already queued,
+so a lone request is never held back; batches form from the requests that
+arrive while the previous batch runs.
+
+If a batch fails, its items are run again one at a time, so a bad item
+only fails its own caller.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+def _bucket(size):
+    """Power-of-two histogram bucket label for a batch size: '1', '2', '3-4', '5-8', ..."""
+    if size <= 2:
+        return str(size)
+    upper = 1 << (size - 1).bit_length()
+    return f"{upper // 2 + 1}-{upper}"
+
+
+class MicroBatcher:
+    """
+    Runs run_batch(items) -> results over items submitted from many threads.
+
+    submit(item) blocks until the batch containing item has run and returns
+    its result (or raises the exception running it raised). run_batch must
+    return one result per item, in order.
+    """
+
+    def __init__(self, run_batch, max_batch=64, max_wait=0.0):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._sizes = {}
+        self._queue_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def _ensure_worker(self):
+        # Started on first use in each process, so a forked worker gets its own thread
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                threading.Thread(target=self._work, args=(self._queue,), name='micro-batcher', daemon=True).start()
+                self._pid = os.getpid()
+            return self._queue
+
+    def submit(self, item):
+        future = Future()
+        self._ensure_worker().put((item, future, time.perf_counter()))
+        return future.result()
+
+    def _collect(self, pending):
+        batch = [pending.get()]
+        # Take whatever is already queued without waiting
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(pending.get_nowait())
+            except queue.Empty:
+                break
+        if len(batch) == 1 or self.max_wait <= 0:
+            return batch
+        # Requests are arriving together; give the next few up to max_wait to join
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, items):
+        """(results, None) for items, or (None, exception) if run_batch failed"""
+        try:
+            results = self.run_batch(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"run_batch returned {len(results)} results for {len(items)} items")
+            return results, None
+        except Exception as e:
+            return None, e
+
+    def _work(self, pending):
+        while True:
+            batch = self._collect(pending)
+            start = time.perf_counter()
+            results, error = self._run([item for item, _, _ in batch])
+            if error is not None and len(batch) > 1:
+                # One bad item shouldn't fail the requests batched with it
+                outcomes = [self._run([item]) for item, _, _ in batch]
+            else:
+                outcomes = [(None, error)] * len(batch) if error is not None else [([r], None) for r in results]
+            finished = time.perf_counter()
+
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._errors += sum(item_error is not None for _, item_error in outcomes)
+                bucket = _bucket(len(batch))
+                self._sizes[bucket] = self._sizes.get(bucket, 0) + 1
+                self._queue_seconds += sum(start - queued_at for _, _, queued_at in batch)
+                self._run_seconds += finished - start
+
+            for (_, future, _), (result, item_error) in zip(batch, outcomes):
+                if item_error is not None:
+                    future.set_exception(item_error)
+                else:
+                    future.set_result(result[0])
+
+    def stats(self):
+        """Batch size distribution, time queued per item and model time per batch and per item"""
+        with self._lock:
+            batches, items = self._batches, self._items
+            return {
+                'max_batch': self.max_batch,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': batches,
+                'items': items,
+                'errors': self._errors,
+                'mean_batch_size': round(items / batches, 2) if batches else 0.0,
+                'batch_sizes': dict(sorted(self._sizes.items(), key=lambda kv: int(kv[0].split('-')[0]))),
+                'mean_queue_ms': round(self._queue_seconds / items * 1000, 3) if items else 0.0,
+                'mean_batch_run_ms': round(self._run_seconds / batches * 1000, 3) if batches else 0.0,
+                'mean_item_run_ms': round(self._run_seconds / items * 1000, 3) if items else 0.0,
+            }
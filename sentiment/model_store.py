@@ -0,0 +1,197 @@
+"""
+The loaded sentiment model and vectorizer, swappable while the app runs.
+
+ModelStore holds the (model, vectorizer) pair behind one attribute so a
+reload replaces both at once: a request that already took the pair keeps
+using it, the next one gets the new pair. watch_model_files polls the model
+files' mtimes on a background thread and calls back when they change;
+under gunicorn the master uses it to send itself SIGHUP (see
+gunicorn.conf.py), under the development server it reloads in place.
+
+With an artifact_dir holding an export of the pickles (see
+sentiment/artifact.py), the pair is memory-mapped from it instead of
+unpickled, unless the pickles have changed since it was exported.
+
+Each loaded pair has a version: the fingerprint of the pickles it was
+loaded from (for an artifact, the one recorded when it was exported), taken
+from the same bytes that were loaded, so it names the model in memory and
+not whatever is on disk by now.
+"""
+import glob
+import io
+import os
+import threading
+import time
+
+from sentiment.artifact import MANIFEST, load_artifact, read_manifest
+from sentiment.cache import bytes_fingerprint, file_fingerprint
+
+DEFAULT_MODEL_PATH = 'models/sentiment_model.pkl'
+DEFAULT_VECTORIZER_PATH = 'models/vectorizer.pkl'
+
+
+def file_stamps(paths):
+    """(path, mtime_ns, size) for every path that exists, used to notice changed model files"""
+    stamps = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        stamps.append((path, stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+
+class ModelStore:
+    """The current (model, vectorizer) pair, memory-mapped from an artifact or loaded with joblib"""
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, vectorizer_path=DEFAULT_VECTORIZER_PATH, artifact_dir=None):
+        self.model_path = model_path
+        self.vectorizer_path = vectorizer_path
+        self.artifact_dir = artifact_dir
+        # 'artifact' or 'pickle', whichever the current pair came from
+        self.source = None
+        # Serializes loads; readers never take it once a pair is loaded
+        self._load_lock = threading.Lock()
+        # (model, vectorizer, version), replaced as a whole
+        self._state = None
+        self._listeners = []
+        self._stamps = None
+        self.loaded_at = None
+        self.loads = 0
+
+    @property
+    def paths(self):
+        """Files whose changes call for a reload"""
+        paths = [self.model_path, self.vectorizer_path]
+        if self.artifact_dir:
+            paths.append(os.path.join(self.artifact_dir, MANIFEST))
+        return paths
+
+    def _use_artifact(self):
+        if not self.artifact_dir or not os.path.exists(os.path.join(self.artifact_dir, MANIFEST)):
+            return False
+        pickles = (self.model_path, self.vectorizer_path)
+        if not all(os.path.exists(path) for path in pickles):
+            return True
+        if read_manifest(self.artifact_dir)['source_fingerprint'] != file_fingerprint(pickles):
+            print(f"{self.artifact_dir} was exported from other model files, loading the pickles instead")
+            return False
+        return True
+
+    def _load_pickles(self):
+        """(model, vectorizer, version), hashing the same bytes that are unpickled"""
+        # Unpickling imports scikit-learn, which the artifact doesn't need
+        import joblib
+        blobs = []
+        for path in (self.model_path, self.vectorizer_path):
+            with open(path, 'rb') as f:
+                blobs.append(f.read())
+        return joblib.load(io.BytesIO(blobs[0])), joblib.load(io.BytesIO(blobs[1])), bytes_fingerprint(blobs)
+
+    def _load_artifact(self):
+        manifest = read_manifest(self.artifact_dir)
+        model, vectorizer = load_artifact(self.artifact_dir)
+        # Artifacts exported without a fingerprint are versioned by their manifest
+        version = manifest.get('source_fingerprint') or file_fingerprint([os.path.join(self.artifact_dir, MANIFEST)])
+        return model, vectorizer, version
+
+    def load(self):
+        """Load the model and swap it in; on error the previous pair stays in place"""
+        with self._load_lock:
+            stamps = file_stamps(self.paths)
+            if self._use_artifact():
+                state, source = self._load_artifact(), 'artifact'
+            else:
+                state, source = self._load_pickles(), 'pickle'
+            self._state = state
+            self._stamps = stamps
+            self.source = source
+            self.loaded_at = time.time()
+            self.loads += 1
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(state[2])
+        return state[:2]
+
+    def add_listener(self, listener):
+        """Call listener(version) after every swap, and now if a pair is already loaded"""
+        with self._load_lock:
+            self._listeners.append(listener)
+            state = self._state
+        if state is not None:
+            listener(state[2])
+
+    def reload_if_changed(self):
+        """Reload if the files changed since the last load, returns whether it did"""
+        if file_stamps(self.paths) == self._stamps:
+            return False
+        self.load()
+        return True
+
+    def current(self):
+        """The (model, vectorizer) pair, loading it on first use"""
+        return self.versioned()[:2]
+
+    def versioned(self):
+        """(model, vectorizer, version) of the current pair, loading it on first use"""
+        state = self._state
+        if state is None:
+            with self._load_lock:
+                state = self._state
+            if state is None:
+                self.load()
+                state = self._state
+        return state
+
+    @property
+    def version(self):
+        return self._state[2] if self._state is not None else None
+
+    @property
+    def loaded(self):
+        return self._state is not None
+
+    def stats(self):
+        return {
+            'model_path': self.model_path,
+            'vectorizer_path': self.vectorizer_path,
+            'artifact_dir': self.artifact_dir,
+            'source': self.source,
+            'loaded': self.loaded,
+            'version': self.version,
+            'loaded_at': self.loaded_at,
+            'loads': self.loads,
+        }
+
+
+def watch_model_files(on_change, patterns=('models/*.pkl', 'models/*/manifest.json'), interval=2.0):
+    """
+    Call on_change() from a daemon thread whenever files matching patterns change.
+
+    A change is only reported once the files have stopped changing for one
+    interval, so a model that is still being written isn't picked up half-way.
+    """
+    def matching_stamps():
+        return file_stamps(sorted(path for pattern in patterns for path in glob.glob(pattern)))
+
+    def watch():
+        last = matching_stamps()
+        while True:
+            time.sleep(interval)
+            stamps = matching_stamps()
+            if stamps == last:
+                continue
+            time.sleep(interval)
+            settled = matching_stamps()
+            if settled != stamps:
+                continue
+            last = settled
+            try:
+                on_change()
+            except Exception as e:
+                print(f"Error reloading models: {e}")
+
+    thread = threading.Thread(target=watch, name='model-watcher', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,115 @@
+"""
+Fused Naive Bayes scoring, without building a sparse matrix per call.
+
+For MultinomialNB, predict is argmax(class_log_prior_ + X @ feature_log_prob_.T)
+over the CountVectorizer term counts X. Going through
+vectorizer.transform and model.predict builds and validates a CSR matrix
+on every call, which for a handful of short reviews costs far more than
+the arithmetic. NBKernel tokenizes the texts the way the vectorizer does,
+maps the tokens to feature columns and adds each token's column of
+feature_log_prob_ straight onto its text's class scores.
+
+Summing per token instead of per (column, count) can change the scores in
+the last bits, so rows whose two best classes are within TIE_TOLERANCE of
+each other are scored again the way MultinomialNB does; the labels are
+always the ones model.predict gives.
+"""
+import re
+import threading
+import weakref
+
+import numpy as np
+
+from sentiment.artifact import SUPPORTED_VECTORIZER_PARAMS, ArtifactModel, ArtifactVectorizer
+
+# Relative gap between the two best class scores below which a row is re-scored exactly
+TIE_TOLERANCE = 1e-9
+
+
+def supports(model, vectorizer):
+    """Whether NBKernel reproduces this pair: a MultinomialNB over a plain word-count CountVectorizer"""
+    if isinstance(model, ArtifactModel) and isinstance(vectorizer, ArtifactVectorizer):
+        return True
+    # Compared by name so checking doesn't import scikit-learn
+    if type(model).__name__ != 'MultinomialNB' or type(vectorizer).__name__ != 'CountVectorizer':
+        return False
+    if not hasattr(model, 'feature_log_prob_') or not hasattr(vectorizer, 'vocabulary_'):
+        return False
+    params = vectorizer.get_params()
+    return all(params[name] == value for name, value in SUPPORTED_VECTORIZER_PARAMS.items())
+
+
+class NBKernel:
+    """Labels for texts from a fitted (model, vectorizer) pair that supports() accepts"""
+
+    def __init__(self, model, vectorizer):
+        # Only the model's arrays are kept, so a cached kernel doesn't keep a replaced model alive
+        self.vectorizer = vectorizer
+        self.exact = ArtifactModel(model.classes_, model.feature_log_prob_, model.class_log_prior_)
+        self.classes = model.classes_
+        self.feature_log_prob = model.feature_log_prob_
+        self.class_log_prior = np.asarray(model.class_log_prior_)
+        if isinstance(vectorizer, ArtifactVectorizer):
+            self.token_re = vectorizer.token_re
+            self.lowercase = vectorizer.lowercase
+            self._lookup = vectorizer.lookup
+        else:
+            params = vectorizer.get_params()
+            self.token_re = re.compile(params['token_pattern'])
+            self.lowercase = params['lowercase']
+            self._lookup = self._lookup_dict
+
+    def _lookup_dict(self, tokens):
+        columns = np.fromiter((self.vectorizer.vocabulary_.get(token, -1) for token in tokens),
+                              dtype=np.int64, count=len(tokens))
+        found = columns >= 0
+        return found, columns[found]
+
+    def scores(self, texts):
+        """Joint log-likelihood of each class, shape (len(texts), len(classes))"""
+        tokens, rows = [], []
+        for i, text in enumerate(texts):
+            text_tokens = self.token_re.findall(text.lower() if self.lowercase else text)
+            tokens.extend(text_tokens)
+            rows.extend([i] * len(text_tokens))
+        found, columns = self._lookup(tokens)
+        rows = np.array(rows, dtype=np.int64)[found]
+
+        scores = np.empty((len(texts), len(self.classes)))
+        for k in range(len(self.classes)):
+            scores[:, k] = np.bincount(rows, weights=self.feature_log_prob[k, columns], minlength=len(texts))
+        scores += self.class_log_prior
+        return scores
+
+    def predict(self, texts):
+        """The labels model.predict(vectorizer.transform(texts)) gives"""
+        if not len(texts):
+            return self.classes[np.empty(0, dtype=np.int64)]
+        scores = self.scores(texts)
+        best = scores.argmax(axis=1)
+        if len(self.classes) > 1:
+            top_two = np.partition(scores, -2, axis=1)[:, -2:]
+            gap = top_two[:, 1] - top_two[:, 0]
+            close = np.flatnonzero(gap <= TIE_TOLERANCE * np.maximum(1.0, np.abs(top_two[:, 1])))
+            if len(close):
+                exact = self.exact.predict(self.vectorizer.transform([texts[i] for i in close]))
+                labels = self.classes[best]
+                labels[close] = exact
+                return labels
+        return self.classes[best]
+
+
+_kernels = weakref.WeakKeyDictionary()
+_kernels_lock = threading.Lock()
+
+
+def kernel_for(model, vectorizer):
+    """The NBKernel for this pair, built once per model; None if the pair isn't supported"""
+    with _kernels_lock:
+        cached = _kernels.get(model)
+    if cached is not None and cached[0] is vectorizer:
+        return cached[1]
+    kernel = NBKernel(model, vectorizer) if supports(model, vectorizer) else None
+    with _kernels_lock:
+        _kernels[model] = (vectorizer, kernel)
+    return kernel
@@ -0,0 +1,85 @@
+import re
+import threading
+
+# (package, resource path) pairs needed by word_tokenize and the stopword list.
+# Newer NLTK releases load punkt_tab instead of punkt, so both are fetched.
+NLTK_RESOURCES = [
+    ('punkt', 'tokenizers/punkt'),
+    ('punkt_tab', 'tokenizers/punkt_tab'),
+    ('stopwords', 'corpora/stopwords'),
+]
+
+# Text made only of ASCII letters, digits and whitespace tokenizes to a plain
+# whitespace split under nltk.word_tokenize, so it can skip NLTK entirely...
+_FAST_PATH_RE = re.compile(r'[A-Za-z0-9 \t\r\n]*')
+# ...except for the contractions the Treebank tokenizer splits without an
+# apostrophe ("cannot" -> "can not", "gonna" -> "gon na", ...)
+_TREEBANK_SPLIT_RE = re.compile(r'(?i)\b(?:cannot|gimme|gonna|gotta|lemme|wanna)\b')
+
+_stopwords = None
+_setup_lock = threading.Lock()
+
+
+def setup_nltk():
+    """
+    Import NLTK, download missing resources and build the stopword set, once per process.
+
+    NLTK is only imported here and not when this module is: importing it
+    pulls in scikit-learn, SciPy and pandas, which takes seconds.
+    """
+    global _stopwords
+    if _stopwords is not None:
+        return
+    with _setup_lock:
+        if _stopwords is not None:
+            return
+        import nltk
+
+        for package, path in NLTK_RESOURCES:
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                nltk.download(package, quiet=True)
+
+        _stopwords = frozenset(nltk.corpus.stopwords.words('english'))
+
+
+def nltk_ready():
+    """Whether setup_nltk() has finished in this process"""
+    return _stopwords is not None
+
+
+def tokenize(text):
+    """nltk.word_tokenize with a regex fast path for plain alphanumeric text"""
+    if _FAST_PATH_RE.fullmatch(text) and not _TREEBANK_SPLIT_RE.search(text):
+        return text.split()
+    import nltk
+    return nltk.word_tokenize(text)
+
+
+def preprocess_text(text):
+    """Tokenize a review, drop English stopwords and join the tokens back"""
+    if _stopwords is None:
+        setup_nltk()
+    # Ensure the input is a string
+    if not isinstance(text, str):
+        text = str(text)
+    stopwords = _stopwords
+    return ' '.join([word for word in tokenize(text) if word.lower() not in stopwords])
+
+
+def preprocess_texts(texts):
+    """
+    Preprocess a list of reviews in bulk.
+
+    Scraped reviews repeat a lot ("Good product", "Nice"), so each distinct
+    text is only processed once and the result is reused for its duplicates.
+    """
+    processed = {}
+    results = []
+    for text in texts:
+        result = processed.get(text)
+        if result is None:
+            result = processed[text] = preprocess_text(text)
+        results.append(result)
+    return results
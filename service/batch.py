@@ -0,0 +1,160 @@
+"""
+Scrape and analyze many product URLs at once.
+
+URLs are dispatched by platform (detected from the domain) from one queue
+per platform: a URL is only handed to a worker once its platform has fewer
+than per_domain scrapes running, so no site sees more than that and a
+platform with many URLs can't tie up the workers other platforms' URLs are
+waiting for. The browsers themselves come from the shared DriverPool.
+
+Used by POST /scrape/batch and runnable from the repository root:
+    python -m service.batch urls.txt
+    python -m service.batch https://www.nike.com/t/... https://www.myntra.com/... --per-domain 2
+"""
+import argparse
+import json
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from scraping.urls import detect_platform
+
+
+def run_batch(urls, analyzers, per_domain=2, max_workers=4, validate=None, progress=None):
+    """
+    Analyze every URL and return a report.
+
+    analyzers maps platform -> analyze(url) callable. validate(platform, url)
+    may return an error message to skip a URL without scraping it.
+    progress, if given, is called as progress(products_done, total) after
+    each URL. The report lists one entry per URL, in input order, with its
+    platform, status ('ok' or 'error'), result or error and seconds taken,
+    plus a summary with the throughput in products/minute.
+    """
+    per_domain, max_workers = max(1, per_domain), max(1, max_workers)
+    # Unknown domains are reported as errors rather than tried as Flipkart
+    entries = [{'url': url, 'platform': detect_platform(url, default=None)} for url in urls]
+    done = [0]
+
+    def finish(entry, start):
+        entry['seconds'] = round(time.perf_counter() - start, 2)
+        done[0] += 1
+        if progress:
+            progress(done[0], len(entries))
+
+    def run(entry):
+        start = time.perf_counter()
+        try:
+            entry['result'] = analyzers[entry['platform']](entry['url'])
+            entry['status'] = 'ok'
+        except Exception as e:
+            entry['status'] = 'error'
+            entry['error'] = str(e)
+        return entry, start
+
+    start = time.perf_counter()
+    waiting = {}
+    for entry in entries:
+        if entry['platform'] is None:
+            error = 'Could not detect the platform from the URL'
+        else:
+            error = validate(entry['platform'], entry['url']) if validate else None
+        if error:
+            entry['status'] = 'error'
+            entry['error'] = error
+            finish(entry, time.perf_counter())
+        else:
+            waiting.setdefault(entry['platform'], deque()).append(entry)
+
+    running = {platform: 0 for platform in waiting}
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch-scrape') as executor:
+        while waiting or in_flight:
+            # Hand out URLs round-robin over the platforms that have a free slot
+            dispatched = True
+            while dispatched and len(in_flight) < max_workers:
+                dispatched = False
+                for platform in list(waiting):
+                    if len(in_flight) >= max_workers:
+                        break
+                    if running[platform] >= per_domain:
+                        continue
+                    entry = waiting[platform].popleft()
+                    if not waiting[platform]:
+                        del waiting[platform]
+                    running[platform] += 1
+                    in_flight.add(executor.submit(run, entry))
+                    dispatched = True
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                entry, entry_start = future.result()
+                running[entry['platform']] -= 1
+                finish(entry, entry_start)
+    elapsed = time.perf_counter() - start
+
+    succeeded = sum(entry['status'] == 'ok' for entry in entries)
+    by_platform = {}
+    for entry in entries:
+        platform = entry['platform'] or 'unknown'
+        by_platform[platform] = by_platform.get(platform, 0) + 1
+    return {
+        'products': entries,
+        'summary': {
+            'total': len(entries),
+            'succeeded': succeeded,
+            'failed': len(entries) - succeeded,
+            'by_platform': by_platform,
+            'per_domain': per_domain,
+            'elapsed_seconds': round(elapsed, 2),
+            'products_per_minute': round(len(entries) / elapsed * 60, 2) if elapsed else 0.0,
+        },
+    }
+
+
+def read_urls(sources):
+    """URLs given directly, or read one per line from files (blank lines and # comments skipped)"""
+    urls = []
+    for source in sources:
+        if source.startswith(('http://', 'https://')):
+            urls.append(source)
+            continue
+        with open(source, encoding='utf-8') as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.lstrip().startswith('#'))
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape and analyze many product URLs in parallel')
+    parser.add_argument('sources', nargs='+', help='Product URLs or files with one URL per line')
+    parser.add_argument('--per-domain', type=int, default=2, help='Concurrent scrapes per platform')
+    parser.add_argument('--workers', type=int, default=None, help='Total concurrent scrapes (default: browser pool size)')
+    parser.add_argument('--output', help='Write the full JSON report here')
+    args = parser.parse_args()
+
+    # Importing the app loads the model and the scrapers
+    from app import PLATFORMS, batch_analyzers, validate_product_url
+    from scraping.driver_pool import get_pool
+
+    urls = read_urls(args.sources)
+    workers = args.workers or get_pool().max_size
+    print(f"Scraping {len(urls)} products, {args.per_domain} per platform, {workers} at a time")
+
+    def progress(done, total):
+        print(f"  {done}/{total} products done")
+
+    report = run_batch(urls, batch_analyzers(), args.per_domain, workers, validate_product_url, progress)
+    for entry in report['products']:
+        name = PLATFORMS[entry['platform']][0] if entry['platform'] in PLATFORMS else 'Unknown'
+        outcome = entry['result'].get('sentiment_analysis', entry['result']) if entry['status'] == 'ok' else entry['error']
+        print(f"{name:<9} {entry['status']:<6} {entry['seconds']:>7.1f}s  {entry['url']}\n          {outcome}")
+    summary = report['summary']
+    print(f"{summary['succeeded']}/{summary['total']} succeeded in {summary['elapsed_seconds']}s "
+          f"({summary['products_per_minute']} products/minute)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
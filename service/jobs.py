@@ -0,0 +1,223 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class Job:
+    """State of one background scrape, updated by its worker and read by pollers"""
+
+    def __init__(self, platform, url, on_change=None):
+        self.on_change = on_change
+        self.id = uuid.uuid4().hex
+        # The process running the job; jobs die with it
+        self.owner_pid = os.getpid()
+        self.platform = platform
+        self.url = url
+        self.status = QUEUED
+        self.progress = {'pages_done': 0, 'reviews_so_far': 0}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def report_progress(self, pages_done, reviews_so_far):
+        """Progress callback handed to the scrapers"""
+        self.progress = {'pages_done': pages_done, 'reviews_so_far': reviews_so_far}
+        self.changed()
+
+    def report_batch_progress(self, products_done, products_total):
+        """Progress callback for batch jobs, which count products rather than pages"""
+        self.progress = {'products_done': products_done, 'products_total': products_total}
+        self.changed()
+
+    def changed(self):
+        if self.on_change:
+            self.on_change(self)
+
+    @property
+    def finished(self):
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'platform': self.platform,
+            'url': self.url,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data['platform'], data['url'])
+        job.id = data['job_id']
+        job.owner_pid = data.get('owner_pid')
+        for name in ('status', 'progress', 'result', 'error', 'created_at', 'started_at', 'finished_at'):
+            setattr(job, name, data[name])
+        return job
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Job state in a SQLite table, so every gunicorn worker can answer
+    GET /jobs/<id> for a job another worker runs. Only the newest max_jobs
+    jobs are kept; older finished ones are deleted.
+
+    A job still queued or running when its process is gone (a worker
+    recycled by a reload or killed after graceful_timeout) is marked failed
+    when it is loaded, so pollers don't wait for it forever.
+    """
+
+    def __init__(self, db_path, max_jobs=1000):
+        self.db_path = db_path
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._pid = None
+        self._connection = None
+        self._db  # Create the table up front
+
+    @property
+    def _db(self):
+        """This process's SQLite connection, opened again after a fork like PredictionCache's"""
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, '
+                                     'state TEXT NOT NULL, finished INTEGER NOT NULL, created_at REAL NOT NULL)')
+            self._connection.commit()
+            self._pid = os.getpid()
+        return self._connection
+
+    def save(self, job):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)',
+                             (job.id, json.dumps({**job.to_dict(), 'owner_pid': job.owner_pid}),
+                              int(job.finished), job.created_at))
+            self._db.commit()
+
+    def load(self, job_id):
+        """The job, or None; only called for jobs this process doesn't have in memory"""
+        with self._lock:
+            row = self._db.execute('SELECT state FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = Job.from_dict(json.loads(row[0]))
+        # Not in this process's memory, so a job it owns is a previous process's with a reused pid
+        if not job.finished and (job.owner_pid == os.getpid() or not _pid_alive(job.owner_pid)):
+            job.status = FAILED
+            job.error = 'The worker running this job exited before it finished'
+            job.finished_at = time.time()
+            self.save(job)
+        return job
+
+    def evict(self):
+        with self._lock:
+            self._db.execute('DELETE FROM jobs WHERE finished = 1 AND job_id NOT IN '
+                             '(SELECT job_id FROM jobs ORDER BY created_at DESC LIMIT ?)', (self.max_jobs,))
+            self._db.commit()
+
+
+class JobManager:
+    """
+    Runs scrape jobs on a bounded pool of worker threads.
+
+    submit(platform, url, run) queues run(job) and returns the Job straight
+    away; run receives the job so it can pass job.report_progress to the
+    scraper. Jobs waiting for a worker stay 'queued'. The last max_jobs jobs
+    are kept for polling, finished ones are dropped oldest first.
+
+    With a db_path, every change to a job is also written to a JobStore, and
+    get() falls back to it for jobs run by another process. Jobs run in the
+    process that accepted them.
+    """
+
+    def __init__(self, max_workers=2, max_jobs=1000, db_path=None):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.store = JobStore(db_path, max_jobs) if db_path else None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape-job')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+
+    def submit(self, platform, url, run):
+        job = Job(platform, url, on_change=self.store.save if self.store else None)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        if self.store:
+            self.store.save(job)
+            self.store.evict()
+        self._executor.submit(self._run, job, run)
+        return job
+
+    def _evict(self):
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _run(job, run):
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.changed()
+        try:
+            job.result = run(job)
+            job.status = SUCCEEDED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            try:
+                job.changed()
+            except Exception as e:
+                # e.g. a result that isn't JSON serializable; pollers in this process still see it
+                print(f"Error saving job {job.id}: {e}")
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store:
+            job = self.store.load(job_id)
+        return job
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for job in jobs:
+            counts[job.status] += 1
+        return {'max_workers': self.max_workers, 'jobs': counts}
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
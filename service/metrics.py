@@ -0,0 +1,205 @@
+"""
+Prometheus-style metrics, rendered in the text exposition format for GET /metrics.
+
+Counters and histograms are plain in-process objects with one series per
+label combination; collectors registered with add_collector() report values
+kept elsewhere (cache hit counts, micro-batch totals) when /metrics is read.
+Under gunicorn every worker has its own registry, so scrape each worker or
+run a single one when the totals matter.
+
+Scraper code times its phases with span(stage): the time is observed in
+STAGE_SECONDS under the platform set by the enclosing platform_scope().
+The platform is kept in a context variable, so shared code such as the
+driver pool and the HTML parser is attributed to the scrape that called it.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from a millisecond prediction to a multi-minute scrape
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _format_labels(self.labels, key), value) for key, value in self._values.items()]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets, with their sum and count, per label combination"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            # Counted in the first bucket whose bound is >= value; larger values only reach +Inf
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        rows = []
+        with self._lock:
+            for key, (counts, total, count) in self._series.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    rows.append((f"{self.name}_bucket", _format_labels(self.labels, key, [('le', bound)]), cumulative))
+                rows.append((f"{self.name}_bucket", _format_labels(self.labels, key, [('le', '+Inf')]), count))
+                rows.append((f"{self.name}_sum", _format_labels(self.labels, key), total))
+                rows.append((f"{self.name}_count", _format_labels(self.labels, key), count))
+        return rows
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, name, kind, help_text, collect):
+        """
+        Report values kept elsewhere: collect() returns a list of
+        (labels dict, value) read each time the metrics are rendered.
+        """
+        with self._lock:
+            self._collectors.append((name, kind, help_text, collect))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        for name, kind, help_text, collect in collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                print(f"Error collecting metric {name}: {e}")
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in values:
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'sentiment_stage_seconds',
+    'Time spent in each scraping and classification stage',
+    labels=('platform', 'stage')))
+PAGES_SCRAPED = REGISTRY.register(Counter(
+    'sentiment_pages_scraped_total', 'Review pages or batches read by the scrapers', labels=('platform',)))
+REVIEWS_CLASSIFIED = REGISTRY.register(Counter(
+    'sentiment_reviews_classified_total', 'Reviews given a sentiment label, cached or not', labels=('platform',)))
+SCRAPE_FAILURES = REGISTRY.register(Counter(
+    'sentiment_scrape_failures_total', 'Scrapes that failed and returned no result', labels=('platform',)))
+
+# Platform label for work done outside any platform_scope, e.g. POST /predict
+NO_PLATFORM = 'api'
+
+_platform = contextvars.ContextVar('metrics_platform', default=NO_PLATFORM)
+
+
+def current_platform():
+    return _platform.get()
+
+
+@contextmanager
+def platform_scope(platform):
+    """Attribute spans and counters inside the block to platform"""
+    token = _platform.set(platform)
+    try:
+        yield
+    finally:
+        _platform.reset(token)
+
+
+@contextmanager
+def span(stage, platform=None):
+    """Time the block and observe it in STAGE_SECONDS, also when it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, platform=platform or _platform.get(), stage=stage)
+
+
+@contextmanager
+def scrape_scope(platform):
+    """
+    A whole scrape: sets the platform for the block, times it as the
+    'scrape' stage and counts an exception escaping it as a failure.
+    """
+    with platform_scope(platform), span('scrape'):
+        try:
+            yield
+        except Exception:
+            SCRAPE_FAILURES.inc(platform=platform)
+            raise
+
+
+def render():
+    return REGISTRY.render()
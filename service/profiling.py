@@ -0,0 +1,226 @@
+"""
+Opt-in sampling profiler for single requests.
+
+A RequestProfiler samples the stacks of the request's thread, and of the
+worker threads doing the request's work (the page fetches of a scrape, which
+enter profiled_thread() in the request's copied context), every `interval`
+seconds with sys._current_frames(). Other requests' threads are never
+sampled. It never hooks function calls, so the profiled code runs at close
+to full speed, and requests that don't ask for a profile pay nothing.
+
+Stacks are written in the collapsed format, one `frame;frame;... count` line
+per distinct stack with the thread name as the root frame, next to a small
+JSON file describing the request. Both flamegraph.pl and speedscope
+(https://www.speedscope.app) open the .folded file as it is.
+"""
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_SUFFIX = '.folded'
+META_SUFFIX = '.json'
+
+# Request IDs become file names, so only these characters are kept from a client's X-Request-ID
+_ID_CHARS = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_.')
+
+# The profiler of the request whose context this is, if it asked for one
+_active = contextvars.ContextVar('request_profiler', default=None)
+
+
+def safe_request_id(request_id):
+    """request_id reduced to file-name-safe characters, or a new random ID if nothing is left"""
+    cleaned = ''.join(c for c in (request_id or '') if c in _ID_CHARS)[:64].lstrip('.')
+    return cleaned or uuid.uuid4().hex
+
+
+def _import_roots():
+    """The working directory and sys.path entries, longest first, to shorten file names by"""
+    roots = {os.path.join(os.path.abspath(path), '') for path in [os.getcwd()] + sys.path if path}
+    return sorted(roots, key=len, reverse=True)
+
+
+def _frame_name(code, roots):
+    filename = code.co_filename
+    for root in roots:
+        if filename.startswith(root):
+            filename = filename[len(root):]
+            break
+    # ';' separates frames and the last space separates the count in the collapsed format
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+
+
+@contextmanager
+def profiled_thread():
+    """
+    Sample the calling thread with the profiler of the current context, if any, until exit.
+
+    Worker threads enter this in a context copied from the request
+    (contextvars.copy_context().run), so their work lands in its profile.
+    """
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    ident = threading.get_ident()
+    profiler._track(ident)
+    try:
+        yield
+    finally:
+        profiler._untrack(ident)
+
+
+class RequestProfiler:
+    """Samples one request's threads until stop(), then holds the collapsed stacks"""
+
+    def __init__(self, request_id, interval=0.005, max_seconds=600):
+        self.request_id = request_id
+        # Clients may reuse an X-Request-ID, so each profile gets its own file name
+        self.profile_id = f"{request_id}-{uuid.uuid4().hex[:8]}"
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples = 0
+        self.stacks = Counter()
+        self.started_at = None
+        self.duration = None
+        self._roots = _import_roots()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._tracked = Counter()
+        self._names = {}
+
+    def start(self):
+        """Start sampling the calling thread and, through profiled_thread(), its workers"""
+        self._track(threading.get_ident())
+        _active.set(self)
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=f'profiler-{self.request_id}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None or self._stop.is_set():
+            return self
+        if _active.get() is self:
+            _active.set(None)
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.time() - self.started_at
+        return self
+
+    def _track(self, ident):
+        with self._lock:
+            self._tracked[ident] += 1
+
+    def _untrack(self, ident):
+        with self._lock:
+            self._tracked[ident] -= 1
+            if self._tracked[ident] <= 0:
+                del self._tracked[ident]
+
+    def _thread_name(self, ident):
+        name = self._names.get(ident)
+        if name is None:
+            for thread in threading.enumerate():
+                self._names.setdefault(thread.ident, thread.name)
+            name = self._names.setdefault(ident, f'thread-{ident}')
+        return name
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frames = sys._current_frames()
+            if self._stop.is_set():
+                # The request is over; this sample would only show stop() itself
+                break
+            with self._lock:
+                tracked = set(self._tracked)
+            for ident, frame in frames.items():
+                if ident not in tracked:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code, self._roots))
+                    frame = frame.f_back
+                stack.append(self._thread_name(ident))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Profiles saved as <profile_id>.folded plus <profile_id>.json in one directory, newest `keep` kept"""
+
+    def __init__(self, directory='profiles', keep=100):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def save(self, profiler, **meta):
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, profiler.profile_id)
+        with open(base + PROFILE_SUFFIX, 'w') as f:
+            f.write(profiler.collapsed())
+        meta = {
+            'profile_id': profiler.profile_id,
+            'request_id': profiler.request_id,
+            'started_at': profiler.started_at,
+            'duration_ms': round(profiler.duration * 1000, 1),
+            'samples': profiler.samples,
+            'interval_ms': profiler.interval * 1000,
+            'file': profiler.profile_id + PROFILE_SUFFIX,
+            **meta,
+        }
+        with open(base + META_SUFFIX, 'w') as f:
+            json.dump(meta, f)
+        self._prune()
+        return meta
+
+    def list(self, limit=50):
+        """Metadata of the most recent profiles, newest first"""
+        profiles = []
+        for name in self._meta_files():
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        profiles.sort(key=lambda meta: meta.get('started_at') or 0, reverse=True)
+        return profiles[:limit]
+
+    def path(self, profile_id):
+        """Path of a saved profile's .folded file, or None if there is none"""
+        path = os.path.join(self.directory, safe_request_id(profile_id) + PROFILE_SUFFIX)
+        return path if os.path.isfile(path) else None
+
+    def _meta_files(self):
+        try:
+            return [name for name in os.listdir(self.directory) if name.endswith(META_SUFFIX)]
+        except FileNotFoundError:
+            return []
+
+    def _prune(self):
+        with self._lock:
+            files = []
+            for name in self._meta_files():
+                try:
+                    files.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+                except FileNotFoundError:
+                    # Pruned by another worker sharing the directory
+                    continue
+            files.sort()
+            for _, name in files[:max(len(files) - self.keep, 0)]:
+                base = os.path.join(self.directory, name[:-len(META_SUFFIX)])
+                for suffix in (META_SUFFIX, PROFILE_SUFFIX):
+                    try:
+                        os.remove(base + suffix)
+                    except FileNotFoundError:
+                        pass
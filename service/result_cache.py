@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """One in-progress computation that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    TTL cache with single-flight coalescing.
+
+    get_or_compute(key, compute) returns the cached value for key if it is
+    younger than ttl seconds. Otherwise the first caller runs compute() while
+    any concurrent callers for the same key block and receive the same result
+    (or the same exception). Failures are never cached.
+
+    Callers that can't run the computation inside one call (a streamed
+    scrape yields as it goes) use claim() and finish() instead.
+    """
+
+    def __init__(self, ttl=600, max_items=1000):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_compute(self, key, compute):
+        status, value = self.claim(key)
+        if status == 'hit':
+            return value
+        flight = value
+        if status == 'follower':
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            result = compute()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, result)
+        return result
+
+    def claim(self, key):
+        """
+        Look key up without blocking.
+
+        Returns ('hit', value) for a cached value. Otherwise returns
+        ('leader', flight) to the first caller, which must compute the value
+        and pass it (or the exception) to finish(), and ('follower', flight)
+        to the callers after it, which wait on flight.done and then read
+        flight.result or flight.error.
+        """
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._results.move_to_end(key)
+                self.hits += 1
+                return 'hit', entry[1]
+
+            flight = self._in_flight.get(key)
+            if flight is None:
+                flight = self._in_flight[key] = _Flight()
+                self.misses += 1
+                return 'leader', flight
+            self.coalesced += 1
+            return 'follower', flight
+
+    def finish(self, key, flight, result=None, error=None):
+        """Complete a claimed flight, caching result unless error is given, and wake its followers"""
+        flight.result, flight.error = result, error
+        with self._lock:
+            if error is None:
+                self._results[key] = (time.monotonic() + self.ttl, result)
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_items:
+                    self._results.popitem(last=False)
+            del self._in_flight[key]
+        flight.done.set()
+
+    def invalidate(self, key):
+        with self._lock:
+            self._results.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ttl_seconds': self.ttl,
+                'entries': len(self._results),
+                'in_flight': len(self._in_flight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+            }
@@ -3,6 +3,7 @@ const form = document.getElementById('analyze-form');
 const productUrlInput = document.getElementById('product-url');
 const platformSelect = document.getElementById('platform-select');
 const loadingSection = document.getElementById('loading-section');
+const loadingStatus = document.getElementById('loading-status');
 const resultSection = document.getElementById('result-section');
 const productImage = document.getElementById('product-image');
 const productTitle = document.getElementById('product-title');
@@ -14,6 +15,73 @@ const sentimentChartCanvas = document.getElementById('sentiment-chart');
 const analyzeAnotherBtn = document.getElementById('analyze-another');
 
 let selectedPlatform = 'flipkart';
+const JOB_POLL_INTERVAL = 1500;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Queue a scrape job and poll it until it finishes, showing progress meanwhile
+async function runScrapeJob(url, platform) {
+    const response = await fetch('/jobs', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ url, platform })
+    });
+    let job = await response.json();
+    if (job.error) throw new Error(job.error);
+    const jobId = job.job_id;
+    while (job.status === 'queued' || job.status === 'running') {
+        await sleep(JOB_POLL_INTERVAL);
+        const poll = await fetch(`/jobs/${jobId}`);
+        job = await poll.json();
+        if (!poll.ok || job.error && !job.status) {
+            throw new Error(job.error || `Polling the scrape job failed (HTTP ${poll.status})`);
+        }
+        if (job.status === 'queued') {
+            loadingStatus.textContent = 'Waiting for a free scraper...';
+        } else if (job.progress && job.progress.pages_done) {
+            loadingStatus.textContent = `Scraped ${job.progress.pages_done} page(s), ${job.progress.reviews_so_far} reviews so far...`;
+        }
+    }
+    if (job.status === 'failed') throw new Error(job.error);
+    return job.result;
+}
+
+// Thrown when the SSE stream could not be opened at all, so the caller can fall back to a job
+class StreamUnavailable extends Error {}
+
+// Subscribe to the SSE scrape stream, rendering running counts as each page of reviews is classified
+function streamScrape(url, platform) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/scrape/${platform}/stream?url=${encodeURIComponent(url)}`);
+        const data = {};
+        let started = false;
+        source.addEventListener('product', (e) => {
+            started = true;
+            Object.assign(data, JSON.parse(e.data));
+        });
+        source.addEventListener('page', (e) => {
+            started = true;
+            const progress = JSON.parse(e.data);
+            data.sentiment_analysis = progress.sentiment_analysis;
+            loadingStatus.textContent = `Scraped ${progress.pages_done} page(s), ${progress.reviews_so_far} reviews so far...`;
+            renderResult(data);
+        });
+        source.addEventListener('done', (e) => {
+            source.close();
+            data.sentiment_analysis = JSON.parse(e.data).sentiment_analysis;
+            resolve(data);
+        });
+        source.addEventListener('scrape_error', (e) => {
+            source.close();
+            reject(new Error(JSON.parse(e.data).error));
+        });
+        // Connection errors: refused or rejected (e.g. a 400) before any event, or dropped midway
+        source.onerror = () => {
+            source.close();
+            reject(started ? new Error('Lost connection while streaming results') : new StreamUnavailable());
+        };
+    });
+}
 
 function detectPlatform(url) {
     if (url.includes('flipkart.com')) return 'flipkart';
@@ -41,94 +109,60 @@ productUrlInput.addEventListener('input', (e) => {
     });
 });
 
-form.addEventListener('submit', async (e) => {
-    e.preventDefault();
-    const url = productUrlInput.value.trim();
-    if (!url) {
-        productUrlInput.classList.add('input-error');
-        productUrlInput.placeholder = 'Please enter a product URL!';
-        return;
+function renderResult(data) {
+    // Show product info if available
+    if (data.product_title) {
+        productTitle.textContent = data.product_title;
+        productTitle.style.display = 'block';
+    } else {
+        productTitle.textContent = '';
+        productTitle.style.display = 'none';
     }
-    productUrlInput.classList.remove('input-error');
-    form.style.display = 'none';
-    loadingSection.style.display = 'flex';
-    resultSection.style.display = 'none';
-
-    let apiUrl;
-    switch (selectedPlatform) {
-        case 'flipkart':
-            apiUrl = `/scrape?url=${encodeURIComponent(url)}`;
-            break;
-        case 'dell':
-            apiUrl = `/scrape/dell?url=${encodeURIComponent(url)}`;
-            break;
-        case 'nykaa':
-            apiUrl = `/scrape/nykaa?url=${encodeURIComponent(url)}`;
-            break;
-        case 'nike':
-            apiUrl = `/scrape/nike?url=${encodeURIComponent(url)}`;
-            break;
-        case 'myntra':
-            apiUrl = `/scrape/myntra?url=${encodeURIComponent(url)}`;
-            break;
-        default:
-            apiUrl = `/scrape?url=${encodeURIComponent(url)}`;
+    if (data.description) {
+        productDesc.textContent = data.description;
+        productDesc.style.display = 'block';
+    } else if (data.product_details) {
+        productDesc.textContent = data.product_details;
+        productDesc.style.display = 'block';
+    } else {
+        productDesc.textContent = '';
+        productDesc.style.display = 'none';
     }
-
-    try {
-        const response = await fetch(apiUrl);
-        const data = await response.json();
-        loadingSection.style.display = 'none';
-        if (data.error) throw new Error(data.error);
-        // Show product info if available
-        if (data.product_title) {
-            productTitle.textContent = data.product_title;
-            productTitle.style.display = 'block';
-        } else {
-            productTitle.textContent = '';
-            productTitle.style.display = 'none';
-        }
-        if (data.description) {
-            productDesc.textContent = data.description;
-            productDesc.style.display = 'block';
-        } else if (data.product_details) {
-            productDesc.textContent = data.product_details;
-            productDesc.style.display = 'block';
-        } else {
-            productDesc.textContent = '';
-            productDesc.style.display = 'none';
-        }
-        if (data.image_url) {
-            productImage.src = data.image_url;
-            productImage.style.display = 'block';
-        } else if (data.image_urls) {
-            productImage.src = data.image_urls.split(',')[0];
-            productImage.style.display = 'block';
-        } else {
-            productImage.style.display = 'none';
-        }
-        // Sentiment stats
-        let sentiment;
-        if (data.sentiment_analysis) {
-            sentiment = data.sentiment_analysis;
-        } else {
-            sentiment = data;
-        }
-        const total = (sentiment.positive || 0) + (sentiment.neutral || 0) + (sentiment.negative || 0);
-        const posPct = total ? (sentiment.positive / total * 100) : 0;
-        const neuPct = total ? (sentiment.neutral / total * 100) : 0;
-        const negPct = total ? (sentiment.negative / total * 100) : 0;
-        positivePct.textContent = `${posPct.toFixed(1)}%`;
-        neutralPct.textContent = `${neuPct.toFixed(1)}%`;
-        negativePct.textContent = `${negPct.toFixed(1)}%`;
-        // Chart
-        if (window.sentimentChart) window.sentimentChart.destroy();
+    if (data.image_url) {
+        productImage.src = data.image_url;
+        productImage.style.display = 'block';
+    } else if (data.image_urls) {
+        productImage.src = data.image_urls.split(',')[0];
+        productImage.style.display = 'block';
+    } else {
+        productImage.style.display = 'none';
+    }
+    // Sentiment stats
+    let sentiment;
+    if (data.sentiment_analysis) {
+        sentiment = data.sentiment_analysis;
+    } else {
+        sentiment = data;
+    }
+    const total = (sentiment.positive || 0) + (sentiment.neutral || 0) + (sentiment.negative || 0);
+    const posPct = total ? (sentiment.positive / total * 100) : 0;
+    const neuPct = total ? (sentiment.neutral / total * 100) : 0;
+    const negPct = total ? (sentiment.negative / total * 100) : 0;
+    positivePct.textContent = `${posPct.toFixed(1)}%`;
+    neutralPct.textContent = `${neuPct.toFixed(1)}%`;
+    negativePct.textContent = `${negPct.toFixed(1)}%`;
+    // Chart: update in place while results stream in, create it on the first render
+    const counts = [sentiment.positive, sentiment.neutral, sentiment.negative];
+    if (window.sentimentChart) {
+        window.sentimentChart.data.datasets[0].data = counts;
+        window.sentimentChart.update();
+    } else {
         window.sentimentChart = new Chart(sentimentChartCanvas, {
             type: 'doughnut',
             data: {
                 labels: ['Positive', 'Neutral', 'Negative'],
                 datasets: [{
-                    data: [sentiment.positive, sentiment.neutral, sentiment.negative],
+                    data: counts,
                     backgroundColor: [
                         'rgba(0, 200, 117, 0.8)',
                         'rgba(255, 205, 86, 0.8)',
@@ -157,9 +191,44 @@ form.addEventListener('submit', async (e) => {
                 }
             }
         });
-        resultSection.style.display = 'flex';
+    }
+    resultSection.style.display = 'flex';
+}
+
+form.addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const url = productUrlInput.value.trim();
+    if (!url) {
+        productUrlInput.classList.add('input-error');
+        productUrlInput.placeholder = 'Please enter a product URL!';
+        return;
+    }
+    productUrlInput.classList.remove('input-error');
+    form.style.display = 'none';
+    loadingSection.style.display = 'flex';
+    resultSection.style.display = 'none';
+    analyzeAnotherBtn.style.display = 'none';
+    loadingStatus.textContent = 'Analyzing reviews and product details...';
+    if (window.sentimentChart) {
+        window.sentimentChart.destroy();
+        window.sentimentChart = null;
+    }
+
+    try {
+        let data;
+        try {
+            data = window.EventSource ? await streamScrape(url, selectedPlatform) : await runScrapeJob(url, selectedPlatform);
+        } catch (err) {
+            if (!(err instanceof StreamUnavailable)) throw err;
+            data = await runScrapeJob(url, selectedPlatform);
+        }
+        loadingSection.style.display = 'none';
+        analyzeAnotherBtn.style.display = '';
+        renderResult(data);
     } catch (err) {
         loadingSection.style.display = 'none';
+        resultSection.style.display = 'none';
+        analyzeAnotherBtn.style.display = '';
         form.style.display = 'block';
         alert('Error: ' + err.message);
     }
@@ -170,4 +239,4 @@ analyzeAnotherBtn.addEventListener('click', () => {
     form.style.display = 'block';
     productUrlInput.value = '';
     productUrlInput.focus();
-});
\ No newline at end of file
+});
@@ -0,0 +1,178 @@
+"""
+Migrate the timestamped scraper CSVs in data/ into the Parquet review store.
+
+Understands every layout the scrapers have written:
+    reviews_*.csv, partial_reviews_*.csv         Flipkart, one 'Review' column
+    dell_product_*.csv, nykaa_product_*.csv      product columns repeated on every review row
+    nike_product_details_*.csv + nike_product_reviews_*.csv
+    myntra_product_data_*.csv (Field/Value) + myntra_reviews_*.csv
+
+Files are paired by their stamp, and its timestamp becomes the scrape
+date. The CSVs don't record the product URL, so a product is identified by
+its platform and title, and only files without a title (Flipkart's) count
+as one product each. Migrated files are recorded in <store>/_migrated.json,
+by their path relative to the working directory (run it from the
+repository root), and skipped on later runs, so the tool can be re-run as
+new CSVs arrive.
+
+Run from the repository root:
+    python -m storage.migrate_csv
+    python -m storage.migrate_csv data scraping/data --store store --dry-run
+"""
+import argparse
+import glob
+import json
+import os
+import re
+from datetime import datetime
+
+import pandas as pd
+
+from sentiment.engine import clean_reviews
+from storage.review_store import ReviewStore, product_id_for
+
+# Newer files have a random suffix after the timestamp (scraping.sinks.file_stamp)
+TIMESTAMP_RE = re.compile(r'(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(?:_[0-9a-f]+)?\.csv$')
+
+
+def file_timestamp(path):
+    match = TIMESTAMP_RE.search(path)
+    if match:
+        return datetime.strptime(match.group(1), '%Y-%m-%d_%H-%M-%S')
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+# Placeholders the scrapers write when they couldn't read the title
+MISSING_TITLES = {'', 'title not found', 'n/a'}
+
+
+def legacy_id(platform, path, product):
+    """Product id for a CSV: by title, so re-scrapes of a product share one id, else by file"""
+    title = ' '.join(str(product.get('product_title') or '').lower().split())
+    if title not in MISSING_TITLES:
+        return product_id_for(platform, f"legacy-title:{title}")
+    return product_id_for(platform, f"legacy:{os.path.relpath(path)}")
+
+
+def read_csv(path):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def review_pairs(df, text_column, title_column=None):
+    texts = df[text_column].tolist() if text_column in df.columns else []
+    titles = df[title_column].tolist() if title_column in df.columns else [''] * len(texts)
+    return [(text, title) for text, title in zip(texts, titles) if clean_reviews([text])]
+
+
+def normalize_columns(df):
+    """Old Nike files use 'Image URL' style headers, newer ones image_url"""
+    df = df.rename(columns=lambda c: c.strip().lower().replace(' ', '_'))
+    return df.rename(columns={'title': 'product_title'})
+
+
+def flipkart_file(path):
+    return 'flipkart', {}, review_pairs(read_csv(path), 'Review')
+
+
+def wide_file(platform):
+    """Dell/Nykaa layout: product fields repeated on every review row"""
+    def load(path):
+        df = read_csv(path)
+        product_columns = [c for c in df.columns if c not in ('review_title', 'review_text')]
+        product = df[product_columns].iloc[0].to_dict() if len(df) else {}
+        if 'product_images' in product:
+            product['product_images'] = product['product_images'].split(', ')
+        return platform, product, review_pairs(df, 'review_text', 'review_title')
+    return load
+
+
+def nike_file(path):
+    product = {}
+    details_path = path.replace('nike_product_reviews_', 'nike_product_details_')
+    if os.path.exists(details_path):
+        details = normalize_columns(read_csv(details_path))
+        product = details.iloc[0].to_dict() if len(details) else {}
+    return 'nike', product, review_pairs(read_csv(path), 'review_text', 'review_title')
+
+
+def myntra_file(path):
+    product = {}
+    details_path = path.replace('myntra_reviews_', 'myntra_product_data_')
+    if os.path.exists(details_path):
+        details = read_csv(details_path)
+        product = dict(zip(details['Field'], details['Value']))
+    return 'myntra', product, review_pairs(read_csv(path), 'review_text')
+
+
+# Filename prefix -> loader. Product-only files (nike_product_details_,
+# myntra_product_data_) are read alongside their review file.
+LOADERS = [
+    ('partial_reviews_', flipkart_file),
+    ('reviews_', flipkart_file),
+    ('dell_product_', wide_file('dell')),
+    ('nykaa_product_', wide_file('nykaa')),
+    ('nike_product_reviews_', nike_file),
+    ('myntra_reviews_', myntra_file),
+]
+
+
+def loader_for(path):
+    name = os.path.basename(path)
+    for prefix, loader in LOADERS:
+        if name.startswith(prefix):
+            return loader
+    return None
+
+
+def manifest_path(store_root):
+    return os.path.join(store_root, '_migrated.json')
+
+
+def load_manifest(store_root):
+    path = manifest_path(store_root)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(store_root, manifest):
+    os.makedirs(store_root, exist_ok=True)
+    with open(manifest_path(store_root), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def migrate(data_dirs, store_root, dry_run=False):
+    store = ReviewStore(store_root)
+    manifest = load_manifest(store_root)
+    products = reviews = 0
+    for path in sorted(p for d in data_dirs for p in glob.glob(os.path.join(d, '*.csv'))):
+        loader = loader_for(path)
+        # Relative to the working directory, so same-named files in different data dirs stay apart
+        key = os.path.relpath(path)
+        # Manifests written before keys were relative used absolute paths
+        if loader is None or key in manifest or os.path.abspath(path) in manifest:
+            continue
+        platform, product, pairs = loader(path)
+        print(f"{path}: {platform}, {len(pairs)} reviews")
+        if not dry_run:
+            store.append(platform, product, pairs, scraped_at=file_timestamp(path),
+                         product_id=legacy_id(platform, path, product), source=f"migrated:{os.path.basename(path)}")
+            manifest[key] = len(pairs)
+            save_manifest(store_root, manifest)
+        products += 1
+        reviews += len(pairs)
+    print(f"{'Would migrate' if dry_run else 'Migrated'} {products} products and {reviews} reviews into {store_root}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate scraper CSVs into the Parquet review store')
+    parser.add_argument('data_dirs', nargs='*', default=['data'])
+    parser.add_argument('--store', default=os.environ.get('REVIEW_STORE_PATH', 'store'))
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    migrate(args.data_dirs, args.store, args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
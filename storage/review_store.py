@@ -0,0 +1,194 @@
+"""
+Columnar review store: scraped products and reviews as partitioned Parquet.
+
+Two hive-partitioned datasets live under the store root:
+
+    products/platform=<platform>/date=<YYYY-MM-DD>/part-*.parquet
+    reviews/platform=<platform>/date=<YYYY-MM-DD>/part-*.parquet
+
+A product row is written once per scrape, with its details stored once
+instead of being repeated on every review row. Review rows carry only the
+product_id they belong to. Reads go through pyarrow.dataset, so a platform
+or date filter skips whole partitions, other filters are pushed down to the
+Parquet row groups, and only the requested columns are decoded.
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from scraping.urls import canonicalize_url
+
+PARTITIONING = ds.partitioning(pa.schema([('platform', pa.string()), ('date', pa.string())]), flavor='hive')
+
+PRODUCT_SCHEMA = pa.schema([
+    ('product_id', pa.string()),
+    ('url', pa.string()),
+    ('title', pa.string()),
+    ('image_url', pa.string()),
+    ('description', pa.string()),
+    # Remaining platform-specific fields as a JSON object
+    ('details', pa.string()),
+    ('review_count', pa.int64()),
+    ('scraped_at', pa.timestamp('s')),
+    ('source', pa.string()),
+    ('platform', pa.string()),
+    ('date', pa.string()),
+])
+
+REVIEW_SCHEMA = pa.schema([
+    ('product_id', pa.string()),
+    ('review_title', pa.string()),
+    ('review_text', pa.string()),
+    ('scraped_at', pa.timestamp('s')),
+    ('platform', pa.string()),
+    ('date', pa.string()),
+])
+
+# Product fields that get their own column; anything else goes into details
+PRODUCT_COLUMNS = {'product_title', 'image_url', 'description'}
+
+
+def product_id_for(platform, key):
+    """Stable id for a product: a hash of the platform and its canonical URL (or another unique key)"""
+    return hashlib.sha1(f"{platform}:{key}".encode('utf-8')).hexdigest()[:16]
+
+
+def _first_image(product):
+    if product.get('image_url'):
+        return product['image_url']
+    images = product.get('product_images') or product.get('image_urls') or []
+    if isinstance(images, str):
+        images = images.split(', ')
+    return images[0] if images else ''
+
+
+def _scalar(value):
+    return '' if value is None or value != value else str(value)
+
+
+class ReviewStore:
+    """Appends scrape results to the Parquet datasets under root and reads them back"""
+
+    def __init__(self, root='store'):
+        self.root = root
+        self.products_path = os.path.join(root, 'products')
+        self.reviews_path = os.path.join(root, 'reviews')
+        self._lock = threading.Lock()
+
+    def append(self, platform, product, reviews, url='', scraped_at=None, product_id=None, source='scrape',
+               review_count=None):
+        """
+        Write one scraped product and its reviews.
+
+        product is the scraper's product dict, reviews an iterable of
+        (text, title) pairs such as ReviewRecords. product_id defaults to a
+        hash of the canonical URL. review_count overrides the number of
+        reviews recorded for the product, for reviews written separately
+        with append_reviews(). Returns the product_id.
+        """
+        scraped_at = (scraped_at or datetime.now()).replace(microsecond=0)
+        date = scraped_at.strftime('%Y-%m-%d')
+        product_id = product_id or product_id_for(platform, canonicalize_url(url))
+        review_table = self._review_table(platform, product_id, reviews, scraped_at)
+
+        details = {key: value for key, value in product.items() if key not in PRODUCT_COLUMNS}
+        products = pa.Table.from_pydict({
+            'product_id': [product_id],
+            'url': [url],
+            'title': [_scalar(product.get('product_title'))],
+            'image_url': [_first_image(product)],
+            'description': [_scalar(product.get('description'))],
+            'details': [json.dumps(details, default=str)],
+            'review_count': [review_table.num_rows if review_count is None else review_count],
+            'scraped_at': [scraped_at],
+            'source': [source],
+            'platform': [platform],
+            'date': [date],
+        }, schema=PRODUCT_SCHEMA)
+
+        with self._lock:
+            self._write(products, self.products_path)
+            if review_table.num_rows:
+                self._write(review_table, self.reviews_path)
+        return product_id
+
+    def append_reviews(self, platform, product_id, reviews, scraped_at=None):
+        """Write reviews of a product whose row append() writes on its own, e.g. a page of a streamed scrape"""
+        scraped_at = (scraped_at or datetime.now()).replace(microsecond=0)
+        review_table = self._review_table(platform, product_id, reviews, scraped_at)
+        if review_table.num_rows:
+            with self._lock:
+                self._write(review_table, self.reviews_path)
+
+    def append_result(self, result, scraped_at=None):
+        """Write a scraping.records.ScrapeResult"""
+        return self.append(result.platform, result.product, result.reviews, result.url, scraped_at,
+                           review_count=result.review_count)
+
+    @staticmethod
+    def _review_table(platform, product_id, reviews, scraped_at):
+        texts, titles = [], []
+        for text, title in reviews:
+            texts.append(text)
+            titles.append(title or '')
+        return pa.Table.from_pydict({
+            'product_id': [product_id] * len(texts),
+            'review_title': titles,
+            'review_text': texts,
+            'scraped_at': [scraped_at] * len(texts),
+            'platform': [platform] * len(texts),
+            'date': [scraped_at.strftime('%Y-%m-%d')] * len(texts),
+        }, schema=REVIEW_SCHEMA)
+
+    @staticmethod
+    def _write(table, path):
+        # A fresh basename per write so appends never overwrite earlier files
+        ds.write_dataset(
+            table, path, format='parquet', partitioning=PARTITIONING,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+        )
+
+    @staticmethod
+    def _read(path, schema, columns, platform, since, until, filter):
+        if not os.path.isdir(path):
+            return schema.empty_table().select(columns) if columns else schema.empty_table()
+        dataset = ds.dataset(path, format='parquet', partitioning=PARTITIONING, schema=schema)
+        expression = filter
+        for condition in (
+            _isin('platform', platform),
+            ds.field('date') >= since if since else None,
+            ds.field('date') <= until if until else None,
+        ):
+            if condition is not None:
+                expression = condition if expression is None else expression & condition
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def read_reviews(self, columns=None, platform=None, since=None, until=None, filter=None):
+        """
+        Read reviews as a pyarrow.Table.
+
+        columns limits what is decoded (e.g. ['review_text']). platform is a
+        name or list of names, since/until are inclusive 'YYYY-MM-DD' dates;
+        both prune partitions. filter is any extra pyarrow.dataset expression,
+        e.g. ds.field('product_id') == pid, and is pushed down to Parquet.
+        """
+        return self._read(self.reviews_path, REVIEW_SCHEMA, columns, platform, since, until, filter)
+
+    def read_products(self, columns=None, platform=None, since=None, until=None, filter=None):
+        """Read product rows (one per scrape) as a pyarrow.Table, same arguments as read_reviews"""
+        return self._read(self.products_path, PRODUCT_SCHEMA, columns, platform, since, until, filter)
+
+
+def _isin(name, values):
+    if values is None:
+        return None
+    if isinstance(values, str):
+        return ds.field(name) == values
+    return ds.field(name).isin(list(values))
@@ -0,0 +1,137 @@
+"""
+Per-product watermarks for incremental re-scrapes.
+
+A watermark records, for one product, the hashes of the newest reviews seen
+by the last scrape (the "head" of the newest-first review list) together
+with the running sentiment counts over every review scraped so far and the
+model version that produced them.
+
+A re-scrape that reads reviews newest-first passes the head to a
+HeadMatcher, stops paginating once it reaches that run of known reviews,
+and only the reviews before it are classified and added to the stored
+counts. Matching a run of several consecutive reviews rather than a single
+one keeps a new "Good product" from being mistaken for an old one.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from sentiment.cache import normalize_text
+
+DEFAULT_DB_PATH = 'cache/watermarks.sqlite3'
+
+# How many of the newest reviews make up the head
+HEAD_SIZE = 3
+
+# head: hashes of the newest reviews, newest first; counts: sentiment label -> count
+Watermark = namedtuple('Watermark', ['head', 'counts', 'total', 'model_version', 'updated_at'])
+
+
+def review_hash(review):
+    """Hash of a ReviewRecord's normalized text and title"""
+    return hashlib.sha1(f"{normalize_text(review.title)}\0{normalize_text(review.text)}".encode('utf-8')).hexdigest()
+
+
+class HeadMatcher:
+    """
+    Splits a newest-first review stream into new reviews and the known ones after them.
+
+    feed() takes each page in order and returns the reviews on it that are
+    known to be new. Up to len(head) - 1 reviews are held back while they
+    could be the start of the head; once the whole head has been seen,
+    reached is True and everything after it is ignored. flush() returns the
+    held-back reviews when the stream ends without reaching the head.
+    """
+
+    def __init__(self, head):
+        self.head = list(head or [])
+        self.reached = False
+        self._pending = []
+
+    def feed(self, reviews):
+        if not self.head:
+            return list(reviews)
+        new = []
+        for review in reviews:
+            if self.reached:
+                break
+            self._pending.append((review_hash(review), review))
+            # Release reviews from the front until what's held back could still start the head
+            while self._pending and [h for h, _ in self._pending] != self.head[:len(self._pending)]:
+                new.append(self._pending.pop(0)[1])
+            if len(self._pending) == len(self.head):
+                self.reached = True
+                self._pending = []
+        return new
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        return [review for _, review in pending]
+
+
+class WatermarkStore:
+    """Watermarks keyed by (platform, canonical product URL) in a SQLite table"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._pid = None
+        self._connection = None
+        self._db  # Create the table up front
+
+    @property
+    def _db(self):
+        """This process's SQLite connection, opened again after a fork like PredictionCache's"""
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS watermarks '
+                                     '(platform TEXT NOT NULL, product_key TEXT NOT NULL, head TEXT NOT NULL, '
+                                     'counts TEXT NOT NULL, total INTEGER NOT NULL, model_version TEXT, '
+                                     'updated_at REAL NOT NULL, PRIMARY KEY (platform, product_key))')
+            self._connection.commit()
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, platform, product_key, model_version=None):
+        """The product's watermark, or None if it has none or its counts came from another model version"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT head, counts, total, model_version, updated_at FROM watermarks '
+                'WHERE platform = ? AND product_key = ?', (platform, product_key)).fetchone()
+        if row is None or (model_version is not None and row[3] != model_version):
+            return None
+        return Watermark(json.loads(row[0]), json.loads(row[1]), row[2], row[3], row[4])
+
+    def update(self, platform, product_key, new_reviews, counts, total, previous=None, model_version=None):
+        """
+        Record a scrape and return the product's combined (counts, total).
+
+        new_reviews are the reviews this scrape found, newest first, and
+        counts/total their sentiment tally. With previous (the watermark the
+        scrape resumed from) the tally is added to the stored one; without
+        it the scrape is taken to have read every review and replaces it.
+        """
+        if previous is not None:
+            counts = {label: previous.counts.get(label, 0) + counts.get(label, 0)
+                      for label in {**previous.counts, **counts}}
+            total = previous.total + total
+        head = [review_hash(review) for review in new_reviews[:HEAD_SIZE]]
+        if previous is not None:
+            head = (head + previous.head)[:HEAD_SIZE]
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (platform, product_key, json.dumps(head), json.dumps(counts), total,
+                              model_version, time.time()))
+            self._db.commit()
+        return counts, total
+
+    def stats(self):
+        with self._lock:
+            products = self._db.execute('SELECT COUNT(*) FROM watermarks').fetchone()[0]
+        return {'products': products}
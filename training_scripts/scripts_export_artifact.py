@@ -0,0 +1,67 @@
+"""
+Export the trained model to the memory-mapped artifact the API loads.
+
+Run after scripts_train_model.py, from the repository root:
+    python -m training_scripts.scripts_export_artifact
+
+Reads models/sentiment_model.pkl and models/vectorizer.pkl, writes
+models/artifact/ (see sentiment/artifact.py) and checks that the artifact
+predicts the same labels as the pickles on the scraped reviews in data/.
+The artifact records the pickles' fingerprint, so after retraining without
+exporting again the API notices it is stale and loads the pickles instead.
+"""
+import argparse
+import glob
+
+import joblib
+import pandas as pd
+
+from sentiment.artifact import DEFAULT_ARTIFACT_DIR, export_artifact, load_artifact
+from sentiment.cache import file_fingerprint
+from sentiment.engine import clean_reviews
+from sentiment.preprocessing import preprocess_texts, setup_nltk
+
+TEXT_COLUMNS = ('Review', 'review_text')
+
+
+def check_artifact(model, vectorizer, artifact_dir, paths):
+    """Number of texts from the CSVs at paths where the artifact's label differs from the pickles'"""
+    texts = []
+    for path in paths:
+        df = pd.read_csv(path)
+        for column in TEXT_COLUMNS:
+            if column in df.columns:
+                texts.extend(df[column].tolist())
+    texts = preprocess_texts(clean_reviews(texts))
+    if not texts:
+        return 0, 0
+    artifact_model, artifact_vectorizer = load_artifact(artifact_dir)
+    expected = model.predict(vectorizer.transform(texts))
+    actual = artifact_model.predict(artifact_vectorizer.transform(texts))
+    return int((expected != actual).sum()), len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the sentiment model as a memory-mapped artifact')
+    parser.add_argument('--model', default='models/sentiment_model.pkl')
+    parser.add_argument('--vectorizer', default='models/vectorizer.pkl')
+    parser.add_argument('--out', default=DEFAULT_ARTIFACT_DIR)
+    parser.add_argument('--check', default='data/*.csv', help="CSVs to compare predictions on, '' to skip")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    vectorizer = joblib.load(args.vectorizer)
+    manifest = export_artifact(model, vectorizer, args.out,
+                               source_fingerprint=file_fingerprint((args.model, args.vectorizer)))
+    print(f"Exported {manifest['n_features']} features, classes {manifest['classes']} to {args.out}")
+
+    if args.check:
+        setup_nltk()
+        mismatches, checked = check_artifact(model, vectorizer, args.out, sorted(glob.glob(args.check)))
+        print(f"Checked {checked} reviews: {mismatches} predictions differ")
+        if mismatches:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Chunked, multi-process version of scripts_preprocess.py.
+
+Streams the dataset in fixed-size chunks, preprocesses the chunks across a
+process pool and appends each finished chunk to the output CSV in order. A
+checkpoint file records how many chunks (and output bytes) are complete, so
+an interrupted run picks up from the last finished chunk. A finished run is
+marked complete, so running again only reports that (--restart redoes it).
+
+Run from the repository root:
+    python -m training_scripts.scripts_preprocess_parallel
+    python -m training_scripts.scripts_preprocess_parallel --workers 8 --chunksize 100000
+    python -m training_scripts.scripts_preprocess_parallel --scaling
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from sentiment.preprocessing import preprocess_texts, setup_nltk
+
+DEFAULT_INPUT = './dataset/Dataset-SA.csv'
+DEFAULT_OUTPUT = 'trained_data/preprocessed_reviews.csv'
+
+
+# Map overall ratings to sentiment labels
+def map_sentiment(rating):
+    if rating >= 4:
+        return 'positive'
+    elif rating == 3:
+        return 'neutral'
+    else:
+        return 'negative'
+
+
+def process_chunk(chunk):
+    """Same transformation scripts_preprocess.py applies to the whole dataset"""
+    chunk['Rate'] = pd.to_numeric(chunk['Rate'], errors='coerce')
+    chunk['Review'] = preprocess_texts(chunk['Review'].tolist())
+    chunk['label'] = chunk['Rate'].apply(map_sentiment)
+    return chunk
+
+
+def load_checkpoint(checkpoint_path, input_path, chunksize):
+    """Return the saved checkpoint if it belongs to this input and chunk size"""
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('input') != input_path or checkpoint.get('chunksize') != chunksize:
+        print(f"Ignoring checkpoint {checkpoint_path}: it was written for a different input or chunk size")
+        return None
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path, checkpoint):
+    # Write to a temp file and rename so a crash never leaves a torn checkpoint
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def run_pipeline(input_path, output_path, chunksize, workers, checkpoint_path, resume=True):
+    """
+    Preprocess input_path into output_path, returns (rows processed, seconds).
+
+    Returns None without doing anything if the checkpoint says an earlier
+    run already finished and its output is still there.
+    """
+    checkpoint = load_checkpoint(checkpoint_path, input_path, chunksize) if resume else None
+    if checkpoint and (not os.path.exists(output_path)
+                       or os.path.getsize(output_path) < checkpoint['output_bytes']):
+        print(f"Ignoring checkpoint {checkpoint_path}: {output_path} is missing or shorter than it records")
+        checkpoint = None
+    if checkpoint and checkpoint.get('complete'):
+        print(f"{output_path} is already complete ({checkpoint['rows_done']} rows), "
+              f"pass --restart to preprocess again")
+        return None
+    if checkpoint:
+        # Drop anything written after the last completed chunk
+        with open(output_path, 'r+b') as f:
+            f.truncate(checkpoint['output_bytes'])
+        print(f"Resuming after chunk {checkpoint['chunks_done']} ({checkpoint['rows_done']} rows already done)")
+    else:
+        checkpoint = {'input': input_path, 'chunksize': chunksize,
+                      'chunks_done': 0, 'rows_done': 0, 'output_bytes': 0}
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        open(output_path, 'w').close()
+
+    chunks = pd.read_csv(input_path, chunksize=chunksize)
+    chunks = itertools.islice(chunks, checkpoint['chunks_done'], None)
+
+    rows = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=setup_nltk) as executor, \
+            open(output_path, 'a', encoding='utf-8', newline='') as out:
+
+        def write_result(result):
+            nonlocal rows
+            result.to_csv(out, index=False, header=checkpoint['output_bytes'] == 0)
+            out.flush()
+            os.fsync(out.fileno())
+
+            rows += len(result)
+            checkpoint['chunks_done'] += 1
+            checkpoint['rows_done'] += len(result)
+            checkpoint['output_bytes'] = out.tell()
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            elapsed = time.perf_counter() - start
+            print(f"Chunk {checkpoint['chunks_done']}: {checkpoint['rows_done']} rows done, "
+                  f"{rows / elapsed:.0f} rows/sec")
+
+        # Keep a bounded number of chunks in flight so memory stays flat, and
+        # write them back in submission order so the output matches the input
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(process_chunk, chunk))
+            if len(pending) >= workers * 2:
+                write_result(pending.popleft().result())
+        while pending:
+            write_result(pending.popleft().result())
+
+    checkpoint['complete'] = True
+    save_checkpoint(checkpoint_path, checkpoint)
+    return rows, time.perf_counter() - start
+
+
+def measure_scaling(input_path, chunksize, max_workers, sample_chunks=8):
+    """Preprocess the first sample_chunks chunks with 1..max_workers processes and report the speedup"""
+    sample = list(itertools.islice(pd.read_csv(input_path, chunksize=chunksize), sample_chunks))
+    total_rows = sum(len(chunk) for chunk in sample)
+
+    worker_counts = sorted({1, max_workers} | {n for n in (2, 4, 8, 16, 32) if n < max_workers})
+    baseline = None
+    print(f"Scaling over {total_rows} rows in {len(sample)} chunks")
+    print(f"{'workers':>8} {'rows/sec':>10} {'speedup':>8}")
+    for workers in worker_counts:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=setup_nltk) as executor:
+            for _ in executor.map(process_chunk, [chunk.copy() for chunk in sample]):
+                pass
+        rate = total_rows / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>10.0f} {rate / baseline:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=DEFAULT_INPUT)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <output>.checkpoint.json)')
+    parser.add_argument('--restart', action='store_true', help='Ignore any existing checkpoint')
+    parser.add_argument('--scaling', action='store_true',
+                        help='Only measure rows/sec and speedup across worker counts, write nothing')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        raise FileNotFoundError(f"Dataset file not found: {args.input}")
+
+    if args.scaling:
+        measure_scaling(args.input, args.chunksize, args.workers)
+        return
+
+    checkpoint_path = args.checkpoint or args.output + '.checkpoint.json'
+    result = run_pipeline(args.input, args.output, args.chunksize, args.workers,
+                          checkpoint_path, resume=not args.restart)
+    if result is None:
+        return
+    rows, elapsed = result
+    print(f"Preprocessed {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/sec) "
+          f"with {args.workers} workers into {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Out-of-core training with HashingVectorizer + MultinomialNB.partial_fit.
+
+scripts_train_model.py builds a CountVectorizer vocabulary over the whole
+corpus in memory. This script streams the preprocessed CSV in chunks instead,
+hashes each chunk with a stateless HashingVectorizer and feeds it to
+MultinomialNB.partial_fit, so memory use depends on the chunk size and not on
+the corpus size.
+
+    train   Stream trained_data/preprocessed_reviews.csv into a new model, then
+            stream it again to score the held-out rows.
+    update  Fold new CSVs (default: data/*.csv) into an existing streaming model
+            without retraining. Files already folded in are listed in a
+            manifest next to the model and skipped on later runs.
+
+Scraped CSVs only carry review text, so update needs a label column
+('label') or a rating column ('Rate' / 'rating') to learn from. Files with
+neither are skipped unless --pseudo-label is given, which labels them with
+the current model's own predictions.
+
+Run from the repository root:
+    python -m training_scripts.scripts_train_incremental train
+    python -m training_scripts.scripts_train_incremental update 'data/*.csv'
+"""
+import argparse
+import glob
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.naive_bayes import MultinomialNB
+
+from sentiment.engine import NO_REVIEWS
+from sentiment.preprocessing import preprocess_texts
+
+CLASSES = np.array(['negative', 'neutral', 'positive'])
+
+DEFAULT_DATA = 'trained_data/preprocessed_reviews.csv'
+DEFAULT_MODEL = 'models/streaming_model.pkl'
+DEFAULT_VECTORIZER = 'models/hashing_vectorizer.pkl'
+
+TEXT_COLUMNS = ('Review', 'review_text')
+RATING_COLUMNS = ('Rate', 'rating')
+
+
+# Map overall ratings to sentiment labels, as in scripts_preprocess.py
+def map_sentiment(rating):
+    if rating >= 4:
+        return 'positive'
+    elif rating == 3:
+        return 'neutral'
+    else:
+        return 'negative'
+
+
+def make_vectorizer(n_features):
+    # alternate_sign=False and norm=None give plain non-negative term counts,
+    # which is what MultinomialNB expects (same as CountVectorizer output)
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+
+
+def split_mask(n_rows, rng, test_size):
+    """True for rows held out for evaluation; reproducible when rng is reseeded"""
+    return rng.random(n_rows) < test_size
+
+
+def train(data_path, model_path, vectorizer_path, chunksize, n_features, test_size, seed):
+    vectorizer = make_vectorizer(n_features)
+    model = MultinomialNB()
+
+    # Pass 1: learn from the training rows of every chunk
+    rng = np.random.default_rng(seed)
+    train_rows = 0
+    for chunk in pd.read_csv(data_path, chunksize=chunksize, usecols=['Review', 'label']):
+        is_test = split_mask(len(chunk), rng, test_size)
+        chunk = chunk[~is_test]
+        if chunk.empty:
+            continue
+        X = vectorizer.transform(chunk['Review'].fillna(''))
+        model.partial_fit(X, chunk['label'], classes=CLASSES)
+        train_rows += len(chunk)
+        print(f"Trained on {train_rows} rows")
+
+    save_model(model, vectorizer, model_path, vectorizer_path)
+    save_manifest(model_path, {'trained_on': data_path, 'train_rows': train_rows, 'folded_files': {}})
+
+    # Pass 2: replay the same split and score only the held-out rows
+    rng = np.random.default_rng(seed)
+    y_true, y_pred = [], []
+    for chunk in pd.read_csv(data_path, chunksize=chunksize, usecols=['Review', 'label']):
+        is_test = split_mask(len(chunk), rng, test_size)
+        chunk = chunk[is_test]
+        if chunk.empty:
+            continue
+        y_true.extend(chunk['label'].tolist())
+        y_pred.extend(model.predict(vectorizer.transform(chunk['Review'].fillna(''))).tolist())
+
+    if y_true:
+        print(f'Accuracy: {accuracy_score(y_true, y_pred)}')
+        print('Classification Report:')
+        print(classification_report(y_true, y_pred))
+
+
+def labelled_chunks(path, chunksize, model, vectorizer, pseudo_label):
+    """Yield (preprocessed texts, labels) chunks from a raw scraped CSV"""
+    columns = pd.read_csv(path, nrows=0).columns
+    text_column = next((c for c in TEXT_COLUMNS if c in columns), None)
+    if text_column is None:
+        print(f"Skipping {path}: no review text column")
+        return
+
+    if 'label' in columns:
+        label_column = 'label'
+    else:
+        label_column = next((c for c in RATING_COLUMNS if c in columns), None)
+    if label_column is None and not pseudo_label:
+        print(f"Skipping {path}: no label or rating column (use --pseudo-label to self-label it)")
+        return
+
+    usecols = [text_column] + ([label_column] if label_column else [])
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=usecols):
+        if label_column == 'label':
+            labels = chunk['label'].where(chunk['label'].isin(CLASSES))
+        elif label_column:
+            ratings = pd.to_numeric(chunk[label_column], errors='coerce')
+            labels = ratings[ratings.notna()].apply(map_sentiment).reindex(chunk.index)
+        else:
+            labels = None
+
+        # Same rows clean_reviews keeps: no NaN, empty or placeholder reviews
+        text = chunk[text_column]
+        keep = text.notna() & (text.astype(str).str.strip() != '') & (text != NO_REVIEWS)
+        if labels is not None:
+            keep &= labels.notna()
+
+        texts = preprocess_texts(text[keep].astype(str).tolist())
+        if not texts:
+            continue
+        if labels is None:
+            yield texts, model.predict(vectorizer.transform(texts))
+        else:
+            yield texts, labels[keep].to_numpy()
+
+
+def update(paths, model_path, vectorizer_path, chunksize, pseudo_label):
+    model = joblib.load(model_path)
+    vectorizer = joblib.load(vectorizer_path)
+    if not isinstance(vectorizer, HashingVectorizer):
+        raise ValueError(f"{vectorizer_path} is not a HashingVectorizer; "
+                         "incremental updates need a model from the 'train' mode")
+    manifest = load_manifest(model_path)
+
+    folded = 0
+    for path in paths:
+        stat = os.stat(path)
+        signature = [stat.st_size, int(stat.st_mtime)]
+        if manifest['folded_files'].get(path) == signature:
+            continue
+
+        rows = 0
+        for texts, labels in labelled_chunks(path, chunksize, model, vectorizer, pseudo_label):
+            model.partial_fit(vectorizer.transform(texts), labels, classes=CLASSES)
+            rows += len(texts)
+        if rows:
+            manifest['folded_files'][path] = signature
+            folded += rows
+            print(f"Folded {rows} reviews from {path}")
+
+    save_model(model, vectorizer, model_path, vectorizer_path)
+    save_manifest(model_path, manifest)
+    print(f"Folded {folded} new reviews into {model_path}")
+
+
+def save_model(model, vectorizer, model_path, vectorizer_path):
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    joblib.dump(model, model_path)
+    joblib.dump(vectorizer, vectorizer_path)
+
+
+def manifest_path(model_path):
+    return os.path.splitext(model_path)[0] + '_manifest.json'
+
+
+def load_manifest(model_path):
+    path = manifest_path(model_path)
+    if not os.path.exists(path):
+        return {'folded_files': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(model_path, manifest):
+    with open(manifest_path(model_path), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', choices=['train', 'update'])
+    parser.add_argument('paths', nargs='*',
+                        help="CSV files or glob patterns to fold in (update mode, default: 'data/*.csv')")
+    parser.add_argument('--data', default=DEFAULT_DATA, help='Preprocessed training CSV (train mode)')
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--vectorizer', default=DEFAULT_VECTORIZER)
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--n-features', type=int, default=2 ** 20)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pseudo-label', action='store_true',
+                        help='Label unlabelled CSVs with the current model (update mode)')
+    # Intermixed, so paths may also come after options: update --pseudo-label data/a.csv data/b.csv
+    args = parser.parse_intermixed_args()
+
+    if args.mode == 'train':
+        train(args.data, args.model, args.vectorizer, args.chunksize, args.n_features,
+              args.test_size, args.seed)
+    else:
+        paths = sorted({p for pattern in (args.paths or ['data/*.csv']) for p in glob.glob(pattern)})
+        update(paths, args.model, args.vectorizer, args.chunksize, args.pseudo_label)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+"""
+WSGI entry point for production serving.
+
+    gunicorn -c gunicorn.conf.py
+
+or with any other WSGI server, pointing it at wsgi:app.
+"""
+from app import app
+
+application = app